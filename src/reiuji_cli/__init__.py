@@ -1,13 +1,21 @@
 """A command line interface for Reiuji."""
 
-from . import lister
-from . import designer
-from . import converter
+from . import lazy
 
 import typer
 
 
-app = typer.Typer(name="reiuji")
-app.command("list")(lister.list_components)
-app.add_typer(designer.designer_app, name="design")
-app.add_typer(converter.converter_app, name="convert")
+app = typer.Typer(name="reiuji", cls=lazy.lazy_group({
+    "list": ("reiuji_cli.lister", "list_components", "List the components for a multiblock."),
+    "design": ("reiuji_cli.designer", "designer_app", "Commands for invoking Reiuji's Designer."),
+    "convert": ("reiuji_cli.converter", "converter_app", "Commands for converting JSON blueprints to .schematic files."),
+    "cache": ("reiuji_cli.cache", "cache_app", "Commands for managing the solution cache."),
+    "store": ("reiuji_cli.store", "store_app", "Commands for querying the design store."),
+    "bench": ("reiuji_cli.bench", "bench_app", "Commands for benchmarking the Reiuji CLI."),
+    "serve": ("reiuji_cli.server", "serve", "Run a server that queues designer and converter jobs.")
+}))
+
+
+@app.callback()
+def main() -> None:
+    """A command line interface for Reiuji."""
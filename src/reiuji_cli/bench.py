@@ -0,0 +1,470 @@
+"""CLI for benchmarking the Reiuji CLI."""
+
+from . import jobs
+from . import profiler
+
+import concurrent.futures
+import datetime
+import fnmatch
+import importlib.metadata
+import json
+import os
+import pathlib
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import typing
+
+import pydantic
+import typer
+import rich
+import rich.markup
+import rich.table
+
+
+bench_app = typer.Typer(help="Commands for benchmarking the Reiuji CLI.")
+
+DEFAULT_IMPORT_COMMANDS = ["--help", "list --help", "design --help", "convert --help", "cache --help", "bench --help", "serve --help", "store --help"]
+IMPORT_SCRIPT = "import sys; from reiuji_cli import app; sys.argv[0] = 'reiuji'; app()"
+
+
+def measure_import_time(args: list[str]) -> dict[str, typing.Any]:
+    """Runs the CLI in a fresh interpreter with `-X importtime` and summarizes the imports."""
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", IMPORT_SCRIPT, *args], capture_output=True, text=True)
+    wall_time = time.perf_counter() - start
+    modules = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        modules.append((name.strip(), int(cumulative), level))
+    top_level = sorted((module for module in modules if module[2] == 0), key=lambda module: module[1], reverse=True)
+    return {
+        "command": " ".join(args),
+        "exit_code": process.returncode,
+        "wall_time": wall_time,
+        "import_time": sum(module[1] for module in top_level) / 1e6,
+        "modules": len(modules),
+        "heaviest": [{"module": name, "cumulative": cumulative / 1e6} for name, cumulative, _ in top_level[:5]]
+    }
+
+
+@bench_app.command("import-time")
+def bench_import_time(
+    commands: typing.Annotated[typing.Optional[list[str]], typer.Argument(help="The commands to measure, e.g. \"design --help\". Defaults to the help of every subcommand.")] = None,
+    repeat: typing.Annotated[int, typer.Option("--repeat", "-r", help="The number of runs per command. The fastest run is reported.", rich_help_panel="Benchmark Options")] = 3,
+    max_import_time: typing.Annotated[typing.Optional[float], typer.Option("--max-import-time", help="Fail if any command spends longer than this importing modules, in seconds.", rich_help_panel="Benchmark Options")] = None,
+    output: typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--output", "-O", help="The path to write the results to as JSON.", rich_help_panel="Output Options")] = None
+) -> None:
+    """Measure the cold-start import cost of CLI commands."""
+    results = []
+    for command in commands or DEFAULT_IMPORT_COMMANDS:
+        runs = [measure_import_time(command.split()) for _ in range(max(repeat, 1))]
+        results.append(min(runs, key=lambda run: run["import_time"]))
+    table = rich.table.Table(title="Import Time")
+    table.add_column("Command")
+    table.add_column("Wall Time")
+    table.add_column("Import Time")
+    table.add_column("Modules")
+    table.add_column("Heaviest Import")
+    for result in results:
+        heaviest = result["heaviest"][0] if len(result["heaviest"]) > 0 else None
+        table.add_row(
+            f"reiuji {rich.markup.escape(result["command"])}" if result["exit_code"] == 0 else f"[red]reiuji {rich.markup.escape(result["command"])} (exit code {result["exit_code"]})[/red]",
+            f"{result["wall_time"] * 1000:.0f} ms",
+            f"{result["import_time"] * 1000:.0f} ms",
+            str(result["modules"]),
+            "-" if isinstance(heaviest, type(None)) else f"{heaviest["module"]} ({heaviest["cumulative"] * 1000:.0f} ms)"
+        )
+    rich.print(table)
+    if isinstance(output, pathlib.Path):
+        with output.open("w") as file:
+            json.dump(results, file, indent=4)
+    if not isinstance(max_import_time, type(None)):
+        slow = [result for result in results if result["import_time"] > max_import_time]
+        for result in slow:
+            rich.print(f"[red][bold]ERROR:[/bold] reiuji {rich.markup.escape(result["command"])} spent {result["import_time"] * 1000:.0f} ms importing modules.[/red]")
+        if len(slow) > 0:
+            raise typer.Exit(code=1)
+
+
+class BenchCase(pydantic.BaseModel):
+    """A designer job in the benchmark corpus, optionally followed by a conversion of its result.
+
+    String arguments of the conversion may use `{dir}` for the directory holding every case's blueprint and `{blueprint}` for this case's blueprint.
+    Cases named in `requires` are run first whenever this case is selected, so that their blueprints are in `{dir}`.
+    """
+    name: str
+    kind: str
+    args: dict[str, typing.Any] = {}
+    convert: typing.Optional[jobs.Job] = None
+    requires: list[str] = []
+
+
+def _turbine(size: str, shaft_width: int) -> jobs.Job:
+    return jobs.Job(kind="convert overhauled turbine", args={"rotor_file": f"{{dir}}/rotor-{size}.json", "dynamo_file": "{blueprint}", "shaft_width": shaft_width})
+
+
+def select_cases(corpus: list[BenchCase], patterns: typing.Optional[list[str]]) -> list[BenchCase]:
+    """Selects the cases matching any of the glob patterns, or every case, along with the cases they require, in corpus order."""
+    by_name = {case.name: case for case in corpus}
+    pending = [case.name for case in corpus if isinstance(patterns, type(None)) or any(fnmatch.fnmatch(case.name, pattern) for pattern in patterns)]
+    wanted = set()
+    while len(pending) > 0:
+        name = pending.pop()
+        if name in wanted:
+            continue
+        if name not in by_name:
+            raise ValueError(f"Unknown required case: {name}")
+        wanted.add(name)
+        pending.extend(by_name[name].requires)
+    return [case for case in corpus if case.name in wanted]
+
+
+ACCELERATOR = jobs.Job(kind="convert qmd accelerator", args={"blueprint_file": "{blueprint}"})
+NUCLEOSYNTHESIS = jobs.Job(kind="convert qmd nucleosynthesis", args={"blueprint_file": "{blueprint}"})
+
+CORPUS = [
+    BenchCase(name="rotor-small", kind="overhauled turbine-rotor", args={"length": 8, "expansion": 4.0}),
+    BenchCase(name="rotor-medium", kind="overhauled turbine-rotor", args={"length": 16, "expansion": 4.0}),
+    BenchCase(name="rotor-large", kind="overhauled turbine-rotor", args={"length": 24, "expansion": 4.0}),
+    BenchCase(name="dynamo-small", kind="overhauled turbine-dynamo", args={"side_length": 5, "shaft_width": 1}, convert=_turbine("small", 1), requires=["rotor-small"]),
+    BenchCase(name="dynamo-medium", kind="overhauled turbine-dynamo", args={"side_length": 9, "shaft_width": 3}, convert=_turbine("medium", 3), requires=["rotor-medium"]),
+    BenchCase(name="dynamo-large", kind="overhauled turbine-dynamo", args={"side_length": 13, "shaft_width": 3}, convert=_turbine("large", 3), requires=["rotor-large"]),
+    BenchCase(name="linear-small", kind="qmd linear", args={"length": 4, "minimum_energy": 500, "maximum_energy": 1000, "target_focus": 0.5, "charge": 1.0, "beam_strength": 1, "initial_focus": 1.0}, convert=ACCELERATOR),
+    BenchCase(name="linear-medium", kind="qmd linear", args={"length": 8, "minimum_energy": 1000, "maximum_energy": 2000, "target_focus": 0.5, "charge": 1.0, "beam_strength": 1, "initial_focus": 1.0}, convert=ACCELERATOR),
+    BenchCase(name="linear-large", kind="qmd linear", args={"length": 12, "minimum_energy": 2000, "maximum_energy": 4000, "target_focus": 0.5, "charge": 1.0, "beam_strength": 1, "initial_focus": 1.0}, convert=ACCELERATOR),
+    BenchCase(name="synchrotron-small", kind="qmd synchrotron", args={"side_length": 5, "minimum_energy": 1000, "maximum_energy": 100000, "target_focus": 0.5, "charge": -1.0, "mass": 0.511, "beam_strength": 1, "initial_focus": 1.0}, convert=ACCELERATOR),
+    BenchCase(name="synchrotron-medium", kind="qmd synchrotron", args={"side_length": 7, "minimum_energy": 1000, "maximum_energy": 100000, "target_focus": 0.5, "charge": -1.0, "mass": 0.511, "beam_strength": 1, "initial_focus": 1.0}, convert=ACCELERATOR),
+    BenchCase(name="synchrotron-large", kind="qmd synchrotron", args={"side_length": 9, "minimum_energy": 1000, "maximum_energy": 100000, "target_focus": 0.5, "charge": -1.0, "mass": 0.511, "beam_strength": 1, "initial_focus": 1.0}, convert=ACCELERATOR),
+    BenchCase(name="decelerator-small", kind="qmd decelerator", args={"side_length": 5, "minimum_energy": 1, "maximum_energy": 10, "target_focus": 0.5, "charge": 1.0, "mass": 938.272, "beam_strength": 1, "initial_focus": 1.0}, convert=ACCELERATOR),
+    BenchCase(name="decelerator-medium", kind="qmd decelerator", args={"side_length": 7, "minimum_energy": 1, "maximum_energy": 10, "target_focus": 0.5, "charge": 1.0, "mass": 938.272, "beam_strength": 1, "initial_focus": 1.0}, convert=ACCELERATOR),
+    BenchCase(name="decelerator-large", kind="qmd decelerator", args={"side_length": 9, "minimum_energy": 1, "maximum_energy": 10, "target_focus": 0.5, "charge": 1.0, "mass": 938.272, "beam_strength": 1, "initial_focus": 1.0}, convert=ACCELERATOR),
+    BenchCase(name="nucleosynthesis-small", kind="qmd nucleosynthesis", args={"recipe_heat": 100}, convert=NUCLEOSYNTHESIS),
+    BenchCase(name="nucleosynthesis-medium", kind="qmd nucleosynthesis", args={"recipe_heat": 500}, convert=NUCLEOSYNTHESIS),
+    BenchCase(name="nucleosynthesis-large", kind="qmd nucleosynthesis", args={"recipe_heat": 2000}, convert=NUCLEOSYNTHESIS)
+]
+
+METRICS = {
+    "first_solution": ("First Solution", "time to first solution"),
+    "optimal_time": ("Optimal", "time to optimal"),
+    "write_time": ("Write", "schematic write time"),
+    "peak_rss": ("Peak RSS", "peak RSS")
+}
+STATUS_RANKS = {"OPTIMAL": 3, "INFEASIBLE": 3, "FEASIBLE": 2, "DONE": 2, "UNKNOWN": 1, "MODEL_INVALID": 0, "ERROR": 0}
+
+
+def run_case(case: BenchCase, directory: pathlib.Path, timeout: typing.Optional[float], search_workers: typing.Optional[int], seed: int) -> dict[str, typing.Any]:
+    """Runs a benchmark case and its conversion, meant to be called in a fresh process so that the peak RSS belongs to the case alone."""
+    from . import solver
+
+    first_solution = []
+    session = solver.Session(listeners=[lambda solution: first_solution.append(solution.elapsed)])
+    blueprint = directory / f"{case.name}.json"
+    job = jobs.Job(name=case.name, kind=case.kind, args={**case.args, "use_cache": False, "seed": seed, "output": [str(blueprint)]})
+    result = jobs.run_job(job, timeout, search_workers, session=session)
+    record = {
+        "name": case.name,
+        "kind": case.kind,
+        "status": result.status,
+        "objective": result.objective,
+        "wall_time": result.wall_time,
+        "solve_time": result.solve_time,
+        "first_solution": first_solution[0] if len(first_solution) > 0 else None,
+        "optimal_time": result.solve_time if result.status == "OPTIMAL" else None,
+        "write_time": None,
+        "peak_rss": None,
+        "error": result.error
+    }
+    if not isinstance(case.convert, type(None)) and blueprint.is_file():
+        args = {key: value.format(dir=directory, blueprint=blueprint) if isinstance(value, str) else value for key, value in case.convert.args.items()}
+        missing = [value for key, value in args.items() if key.endswith("_file") and not pathlib.Path(value).is_file()]
+        if len(missing) > 0:
+            record["error"] = f"Skipped the conversion because {", ".join(missing)} does not exist; the case that writes it found no design or is missing from `requires`."
+        else:
+            converted = jobs.run_job(jobs.Job(name=case.name, kind=case.convert.kind, args={**args, "output": str(directory / f"{case.name}.schematic")}))
+            if converted.status == "ERROR":
+                record["error"] = converted.error
+            else:
+                record["write_time"] = converted.wall_time
+    record["peak_rss"] = profiler.peak_rss()
+    return record
+
+
+def load_run(path: pathlib.Path) -> dict[str, typing.Any]:
+    """Loads a benchmark run from a baseline file, or the latest run from a history file."""
+    with path.open("r") as file:
+        data = json.load(file)
+    if isinstance(data, list):
+        if len(data) == 0:
+            raise ValueError(f"{path} contains no runs.")
+        data = data[-1]
+    return data
+
+
+def compare(
+        results: list[dict[str, typing.Any]],
+        baseline: dict[str, typing.Any],
+        time_threshold: float,
+        memory_threshold: float,
+        min_delta: float
+    ) -> list[str]:
+    """Lists the regressions of a run against a baseline run."""
+    previous = {result["name"]: result for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        old = previous.get(result["name"])
+        if isinstance(old, type(None)):
+            continue
+        if STATUS_RANKS.get(result["status"], 0) < STATUS_RANKS.get(old["status"], 0):
+            regressions.append(f"{result["name"]}: status went from {old["status"]} to {result["status"]}")
+        for metric, (_, description) in METRICS.items():
+            before, after = old.get(metric), result.get(metric)
+            if isinstance(before, type(None)):
+                continue
+            if isinstance(after, type(None)):
+                regressions.append(f"{result["name"]}: {description} is no longer measured")
+                continue
+            if metric == "peak_rss":
+                if after > before * (1 + memory_threshold):
+                    regressions.append(f"{result["name"]}: {description} grew from {before / 1024 / 1024:.1f} MiB to {after / 1024 / 1024:.1f} MiB")
+            elif after > before * (1 + time_threshold) and after - before > min_delta:
+                regressions.append(f"{result["name"]}: {description} grew from {before:.2f} s to {after:.2f} s")
+    return regressions
+
+
+def _format_time(value: typing.Optional[float]) -> str:
+    return "-" if isinstance(value, type(None)) else f"{value:.2f} s"
+
+
+@bench_app.command("corpus")
+def bench_corpus(
+    cases: typing.Annotated[typing.Optional[list[str]], typer.Argument(help="Glob patterns selecting the cases to run, e.g. \"rotor-*\". Cases required by the selected ones, such as the rotor of a dynamo case, are run too. Defaults to every case.")] = None,
+    corpus_file: typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--corpus", help="The path to a JSON list of cases to use instead of the built-in corpus.", rich_help_panel="Benchmark Options")] = None,
+    timeout: typing.Annotated[typing.Optional[float], typer.Option("--timeout", "-T", help="The maximum time to spend on each case in seconds.", rich_help_panel="Benchmark Options")] = 60.0,
+    search_workers: typing.Annotated[typing.Optional[int], typer.Option("--search-workers", help="The number of parallel search workers used by the solver.", rich_help_panel="Benchmark Options")] = None,
+    seed: typing.Annotated[int, typer.Option("--seed", help="The random seed used by the solver.", rich_help_panel="Benchmark Options")] = 0,
+    history: typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--history", "-H", help="The path to a JSON history file to append the run to.", rich_help_panel="Output Options")] = None,
+    save_baseline: typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--save-baseline", help="The path to save the run to as a baseline.", rich_help_panel="Output Options")] = None,
+    baseline: typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--baseline", "-B", help="The path to a baseline or history file to compare against.", rich_help_panel="Regression Options")] = None,
+    time_threshold: typing.Annotated[float, typer.Option("--time-threshold", help="The relative slowdown that counts as a regression.", rich_help_panel="Regression Options")] = 0.25,
+    memory_threshold: typing.Annotated[float, typer.Option("--memory-threshold", help="The relative growth in peak RSS that counts as a regression.", rich_help_panel="Regression Options")] = 0.25,
+    min_delta: typing.Annotated[float, typer.Option("--min-delta", help="The smallest slowdown in seconds that counts as a regression, to ignore noise in fast cases.", rich_help_panel="Regression Options")] = 0.1
+) -> None:
+    """Benchmark designers and converters on a fixed corpus of problems.
+
+    Each case runs in a fresh process without the solution cache, recording the time to the first solution, the time to prove optimality, the final status, the time to write a .schematic file and the peak RSS.
+    """
+    if isinstance(corpus_file, pathlib.Path):
+        with corpus_file.open("r") as file:
+            corpus = pydantic.TypeAdapter(list[BenchCase]).validate_json(file.read())
+    else:
+        corpus = CORPUS
+    try:
+        selected = select_cases(corpus, cases)
+    except ValueError as e:
+        rich.print(f"[red][bold]ERROR:[/bold] {rich.markup.escape(str(e))}[/red]")
+        raise typer.Exit(code=1)
+    if len(selected) == 0:
+        rich.print("[red][bold]ERROR:[/bold] No cases match.[/red]")
+        raise typer.Exit(code=1)
+    previous = None
+    if isinstance(baseline, pathlib.Path):
+        try:
+            previous = load_run(baseline)
+        except (OSError, ValueError) as e:
+            rich.print(f"[red][bold]ERROR:[/bold] {rich.markup.escape(str(e))}[/red]")
+            raise typer.Exit(code=1)
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for case in selected:
+            rich.print(f"[blue]Running {case.name}...[/blue]")
+            with concurrent.futures.ProcessPoolExecutor(max_workers=1, max_tasks_per_child=1) as executor:
+                results.append(executor.submit(run_case, case, pathlib.Path(directory), timeout, search_workers, seed).result())
+    try:
+        version = importlib.metadata.version("reiuji-nuclearcraft")
+    except importlib.metadata.PackageNotFoundError:
+        version = None
+    run = {
+        "time": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "reiuji": version,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "timeout": timeout,
+        "search_workers": search_workers,
+        "seed": seed,
+        "results": results
+    }
+    baseline_results = {} if isinstance(previous, type(None)) else {result["name"]: result for result in previous["results"]}
+    table = rich.table.Table(title="Corpus Benchmark")
+    table.add_column("Case")
+    table.add_column("Status")
+    for header, _ in METRICS.values():
+        table.add_column(header)
+    for result in results:
+        color = {"OPTIMAL": "green", "FEASIBLE": "yellow"}.get(result["status"], "red")
+        old = baseline_results.get(result["name"], {})
+        cells = []
+        for metric in METRICS:
+            value = result[metric]
+            if metric == "peak_rss":
+                cell = "-" if isinstance(value, type(None)) else f"{value / 1024 / 1024:.0f} MiB"
+            else:
+                cell = _format_time(value)
+            if not isinstance(value, type(None)) and not isinstance(old.get(metric), type(None)) and old[metric] > 0:
+                cell += f" ({(value / old[metric] - 1) * 100:+.0f}%)"
+            cells.append(cell)
+        table.add_row(result["name"], f"[{color}]{result["status"]}[/{color}]", *cells)
+    rich.print(table)
+    for result in results:
+        if not isinstance(result["error"], type(None)):
+            rich.print(f"[yellow][bold]WARNING:[/bold] {result["name"]}: {rich.markup.escape(result["error"])}[/yellow]")
+    if isinstance(history, pathlib.Path):
+        runs = []
+        if history.is_file():
+            with history.open("r") as file:
+                runs = json.load(file)
+        runs.append(run)
+        with history.open("w") as file:
+            json.dump(runs, file, indent=4)
+    if isinstance(save_baseline, pathlib.Path):
+        with save_baseline.open("w") as file:
+            json.dump(run, file, indent=4)
+    if not isinstance(previous, type(None)):
+        regressions = compare(results, previous, time_threshold, memory_threshold, min_delta)
+        for regression in regressions:
+            rich.print(f"[red][bold]REGRESSION:[/bold] {rich.markup.escape(regression)}[/red]")
+        if len(regressions) > 0:
+            raise typer.Exit(code=1)
+        rich.print("[green]No regressions against the baseline.[/green]")
+
+
+DEFAULT_SCHEMATIC_CASES = ["synchrotron:64", "synchrotron:256", "turbine:24", "turbine:64"]
+SCHEMATIC_WRITERS = ("reiuji", "stream")
+
+
+def generate_schematic_writer(kind: str, size: int, seed: int) -> typing.Any:
+    """Builds one of Reiuji's schematic writers for a design of the given size filled with random default components."""
+    import math
+    import random
+
+    import reiuji
+
+    rng = random.Random(seed)
+    defaults = reiuji.components.defaults
+
+    def generate(components: list[typing.Any], shape: tuple[int, ...]) -> typing.Any:
+        return reiuji.core.multi_sequence.MultiSequence(rng.choices(components, k=math.prod(shape)), shape)
+
+    if kind == "synchrotron":
+        return reiuji.io.schematics.accelerator.AcceleratorSchematicWriter(generate(defaults.accelerator.QMD_ACCELERATOR_COMPONENTS, (size + 4, size + 4, 5)), transparent=True)
+    if kind == "linear":
+        return reiuji.io.schematics.accelerator.AcceleratorSchematicWriter(generate(defaults.accelerator.QMD_LINEAR_ACCELERATOR_COMPONENTS, (size + 2, 5, 5)), transparent=True)
+    if kind == "turbine":
+        return reiuji.io.schematics.turbine.TurbineSchematicWriter(
+            generate(defaults.turbine.OVERHAULED_TURBINE_DYNAMO_COMPONENTS, (size, size)),
+            generate(defaults.turbine.OVERHAULED_TURBINE_ROTOR_COMPONENTS, (size,)),
+            max(size // 3, 1),
+            facing="z"
+        )
+    raise ValueError(f"Unknown schematic case: {kind}")
+
+
+def measure_schematic(kind: str, size: int, writer_name: str, repeat: int, seed: int) -> dict[str, typing.Any]:
+    """Writes a generated design with one writer, meant to be called in a fresh process so that the peak RSS belongs to the write alone.
+
+    The write time is the fastest of `repeat` writes, and the peak memory is measured by an extra write under `tracemalloc`.
+    """
+    import tracemalloc
+
+    from . import schematic
+
+    writer = generate_schematic_writer(kind, size, seed)
+    with tempfile.TemporaryDirectory() as directory:
+        path = pathlib.Path(directory) / "bench.schematic"
+
+        def write() -> None:
+            if writer_name == "stream":
+                schematic.write(writer, path)
+            else:
+                writer.write(path)
+
+        before = profiler.peak_rss()
+        times = []
+        for _ in range(max(repeat, 1)):
+            start = time.perf_counter()
+            write()
+            times.append(time.perf_counter() - start)
+        after = profiler.peak_rss()
+        tracemalloc.start()
+        write()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {
+            "case": f"{kind}:{size}",
+            "writer": writer_name,
+            "cells": sum(1 for _ in writer.to_structure().seq),
+            "write_time": min(times),
+            "peak_memory": peak,
+            "peak_rss_growth": None if isinstance(before, type(None)) else after - before,
+            "file_size": path.stat().st_size
+        }
+
+
+@bench_app.command("schematic")
+def bench_schematic(
+    cases: typing.Annotated[typing.Optional[list[str]], typer.Argument(help="The designs to write, as kind:size with kind one of synchrotron, linear or turbine, e.g. \"synchrotron:128\". Defaults to a few large synchrotrons and turbines.")] = None,
+    repeat: typing.Annotated[int, typer.Option("--repeat", "-r", help="The number of writes per case and writer. The fastest write is reported.", rich_help_panel="Benchmark Options")] = 3,
+    seed: typing.Annotated[int, typer.Option("--seed", help="The random seed used to generate the designs.", rich_help_panel="Benchmark Options")] = 0,
+    output: typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--output", "-O", help="The path to write the results to as JSON.", rich_help_panel="Output Options")] = None
+) -> None:
+    """Compare Reiuji's schematic writers with the streaming writer used by the CLI.
+
+    Each case writes a generated design of the given size with both writers, each in a fresh process, recording the write time, the peak Python memory during the write, the growth in peak RSS and the file size.
+    """
+    points = []
+    for case in cases or DEFAULT_SCHEMATIC_CASES:
+        kind, _, size = case.partition(":")
+        if kind not in ("synchrotron", "linear", "turbine") or not size.isdigit() or int(size) < 1:
+            rich.print(f"[red][bold]ERROR:[/bold] Expected a case such as synchrotron:128, got: {rich.markup.escape(case)}[/red]")
+            raise typer.Exit(code=1)
+        points.append((kind, int(size)))
+    results = []
+    for kind, size in points:
+        for writer_name in SCHEMATIC_WRITERS:
+            rich.print(f"[blue]Writing {kind}:{size} with the {writer_name} writer...[/blue]")
+            with concurrent.futures.ProcessPoolExecutor(max_workers=1, max_tasks_per_child=1) as executor:
+                results.append(executor.submit(measure_schematic, kind, size, writer_name, repeat, seed).result())
+    table = rich.table.Table(title="Schematic Writers")
+    table.add_column("Case")
+    table.add_column("Cells")
+    table.add_column("Writer")
+    table.add_column("Write Time")
+    table.add_column("Peak Memory")
+    table.add_column("Peak RSS Growth")
+    table.add_column("File Size")
+    reference = {}
+    for result in results:
+        cells = [_format_time(result["write_time"]), f"{result["peak_memory"] / 1024 / 1024:.1f} MiB"]
+        old = reference.setdefault(result["case"], result)
+        if old is not result:
+            cells[0] += f" ({(result["write_time"] / old["write_time"] - 1) * 100:+.0f}%)"
+            cells[1] += f" ({(result["peak_memory"] / old["peak_memory"] - 1) * 100:+.0f}%)"
+        growth = result["peak_rss_growth"]
+        table.add_row(
+            result["case"],
+            str(result["cells"]),
+            result["writer"],
+            *cells,
+            "-" if isinstance(growth, type(None)) else f"{growth / 1024 / 1024:.1f} MiB",
+            f"{result["file_size"] / 1024:.0f} KiB"
+        )
+    rich.print(table)
+    if isinstance(output, pathlib.Path):
+        with output.open("w") as file:
+            json.dump(results, file, indent=4)
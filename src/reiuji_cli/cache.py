@@ -0,0 +1,171 @@
+"""A persistent on-disk cache of designer results."""
+
+from . import registry
+
+import hashlib
+import importlib.metadata
+import json
+import os
+import pathlib
+import typing
+
+import reiuji
+import typer
+import rich
+import rich.table
+from ortools.sat.python import cp_model
+from ortools.sat import cp_model_pb2
+
+
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+
+def cache_dir() -> pathlib.Path:
+    """Returns the directory used to store cached results."""
+    if "REIUJI_CACHE_DIR" in os.environ:
+        return pathlib.Path(os.environ["REIUJI_CACHE_DIR"])
+    return pathlib.Path(os.environ.get("XDG_CACHE_HOME", pathlib.Path.home() / ".cache")) / "reiuji"
+
+
+def max_size() -> int:
+    """Returns the maximum total size of the cache in bytes."""
+    return int(os.environ.get("REIUJI_CACHE_SIZE", DEFAULT_MAX_SIZE))
+
+
+def hash_components(components: list[reiuji.components.types.Component] | None) -> str:
+    if isinstance(components, type(None)):
+        return "default"
+    return registry.digest(components)
+
+
+def make_key(designer_cls: type, params: dict[str, typing.Any], solver_params: typing.Sequence[str] = ()) -> str:
+    """Builds a content-addressed key from a designer class, its constructor arguments and the CP-SAT parameters set with `--solver-param`.
+
+    Solver parameters such as `relative_gap_limit` change what a reported status means, so they are part of the key.
+    The worker count and seed only change how the solver gets there, so they are not.
+    """
+    args = {}
+    for name, value in params.items():
+        if name == "components":
+            args[name] = hash_components(value)
+        elif name == "component_limits":
+            args[name] = {comp: list(limit) for comp, limit in value.items()}
+        else:
+            args[name] = value
+    try:
+        version = importlib.metadata.version("reiuji-nuclearcraft")
+    except importlib.metadata.PackageNotFoundError:
+        version = None
+    payload = json.dumps({
+        "designer": f"{designer_cls.__module__}.{designer_cls.__qualname__}",
+        "reiuji": version,
+        "args": args,
+        "solver_params": sorted("=".join(part.strip() for part in param.partition("=")[::2]) for param in solver_params)
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get(key: str, timeout: float | None) -> tuple[cp_model_pb2.CpSolverStatus, reiuji.core.multi_sequence.MultiSequence[reiuji.components.types.Component] | None, float | None] | None:
+    """Looks up a cached result that is at least as good as a solve with the given time limit would be.
+
+    Time limits are those the solver actually ran under, with None meaning unlimited.
+    Returns the status, the design and its objective value.
+    """
+    path = cache_dir() / f"{key}.json"
+    try:
+        with path.open("r") as file:
+            entry = json.load(file)
+    except (OSError, ValueError):
+        return None
+    status = cp_model_pb2.CpSolverStatus.Value(entry["status"])
+    if status not in (cp_model.OPTIMAL, cp_model.INFEASIBLE):
+        if isinstance(entry["timeout"], type(None)):
+            pass
+        elif isinstance(timeout, type(None)) or timeout > entry["timeout"]:
+            return None
+    os.utime(path)
+    objective = entry.get("objective")
+    if isinstance(entry["design"], type(None)):
+        return status, None, objective
+    return status, reiuji.io.serialization.SerializableMultiSequence.model_validate(entry["design"]).to_multi_sequence(), objective
+
+
+def put(
+        key: str,
+        timeout: float | None,
+        status: cp_model_pb2.CpSolverStatus,
+        design: reiuji.core.multi_sequence.MultiSequence[reiuji.components.types.Component] | None,
+        objective: float | None = None
+    ) -> None:
+    """Stores a result in the cache and evicts the least recently used entries if it grows too large."""
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE, cp_model.INFEASIBLE):
+        return
+    directory = cache_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    entry = {
+        "status": cp_model_pb2.CpSolverStatus.Name(status),
+        "timeout": timeout,
+        "objective": objective,
+        "design": None if isinstance(design, type(None)) else reiuji.io.serialization.SerializableMultiSequence.from_multi_sequence(design).model_dump(mode="json")
+    }
+    tmp_path = directory / f"{key}.json.tmp"
+    with tmp_path.open("w") as file:
+        json.dump(entry, file)
+    os.replace(tmp_path, directory / f"{key}.json")
+    evict(max_size())
+
+
+def entries() -> list[pathlib.Path]:
+    directory = cache_dir()
+    if not directory.is_dir():
+        return []
+    return list(directory.glob("*.json"))
+
+
+def evict(limit: int) -> int:
+    """Removes the least recently used entries until the cache is no larger than the limit."""
+    files = sorted(((path.stat(), path) for path in entries()), key=lambda item: item[0].st_mtime)
+    total = sum(stat.st_size for stat, _ in files)
+    removed = 0
+    for stat, path in files:
+        if total <= limit:
+            break
+        path.unlink(missing_ok=True)
+        total -= stat.st_size
+        removed += 1
+    return removed
+
+
+cache_app = typer.Typer(help="Commands for managing the solution cache.\n\nResults are stored in `$REIUJI_CACHE_DIR` (default `~/.cache/reiuji`) and the least recently used entries are evicted once the cache exceeds `$REIUJI_CACHE_SIZE` bytes (default 256 MiB).")
+
+
+@cache_app.command("stats")
+def cache_stats() -> None:
+    """Show statistics about the solution cache."""
+    counts: dict[str, int] = {}
+    total = 0
+    for path in entries():
+        total += path.stat().st_size
+        try:
+            with path.open("r") as file:
+                status = json.load(file)["status"]
+        except (OSError, ValueError, KeyError):
+            status = "CORRUPT"
+        counts[status] = counts.get(status, 0) + 1
+    table = rich.table.Table(title="Solution Cache")
+    table.add_column("Property")
+    table.add_column("Value")
+    table.add_row("Directory", str(cache_dir()))
+    table.add_row("Entries", str(sum(counts.values())))
+    for status, count in sorted(counts.items()):
+        table.add_row(f"  {status}", str(count))
+    table.add_row("Size", f"{total / 1024 / 1024:.2f} MiB")
+    table.add_row("Size Limit", f"{max_size() / 1024 / 1024:.2f} MiB")
+    rich.print(table)
+
+
+@cache_app.command("clear")
+def cache_clear() -> None:
+    """Remove all entries from the solution cache."""
+    removed = evict(0)
+    rich.print(f"[green]Removed {removed} cached result(s).[/green]")
@@ -1,40 +1,72 @@
 """CLI for converting JSON blueprints to .schematic files."""
 
 from . import utils
+from . import profiler
 
+import concurrent.futures
+import glob
+import hashlib
+import itertools
+import json
+import re
+import time
+import traceback
 import typing
 import pathlib
 
+import pydantic
 import reiuji
 import typer
 import rich
+import rich.markup
 import rich.table
 
 
 converter_app = typer.Typer(help="Commands for converting JSON blueprints to .schematic files.")
 
+
+@converter_app.command("format")
+def convert_format(
+    blueprint_file: typing.Annotated[pathlib.Path, typer.Argument(help="Path to the JSON or .rjb blueprint file.")],
+    output: typing.Annotated[pathlib.Path, typer.Option("--output", "-O", help="Path to the output JSON or .rjb file.", rich_help_panel="Output Options")],
+    compress: typing.Annotated[bool, typer.Option("--compress/--no-compress", help="Whether to compress .rjb output.", rich_help_panel="Output Options")] = True,
+    profile_file: typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--profile", help="The path to write a JSON profile of phase timings, model sizes, solver statistics and peak memory to.", rich_help_panel="Profiling Options")] = None,
+    profile_trace: typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--profile-trace", help="The path to write a Chrome trace of the phases to.", rich_help_panel="Profiling Options")] = None
+) -> None:
+    """Convert a blueprint between the JSON and compact binary (.rjb) formats."""
+    with profiler.profile(profile_file, profile_trace, "convert format"):
+        design = utils.load_design(blueprint_file)
+        if output.suffix == ".rjb":
+            utils.write_design(design, output, compress=compress)
+        elif output.suffix == ".json":
+            utils.write_design(design, output)
+        else:
+            rich.print(f"[red][bold]ERROR:[/bold] Unsupported file format: {output.suffix}[/red]")
+
+
 nco_converter = typer.Typer(help="Commands for converting NuclearCraft: Overhauled blueprints.")
 converter_app.add_typer(nco_converter, name="overhauled")
 
 
 @nco_converter.command("turbine")
 def convert_nco_turbine_blueprint(
-    rotor_file: typing.Annotated[pathlib.Path, typer.Argument(help="Path to the rotor JSON blueprint file.")],
-    dynamo_file: typing.Annotated[pathlib.Path, typer.Argument(help="Path to the dynamo JSON blueprint file.")],
+    rotor_file: typing.Annotated[pathlib.Path, typer.Argument(help="Path to the rotor JSON or .rjb blueprint file.")],
+    dynamo_file: typing.Annotated[pathlib.Path, typer.Argument(help="Path to the dynamo JSON or .rjb blueprint file.")],
     shaft_width: typing.Annotated[int, typer.Option("--shaft-width", "-w", help="The width of the rotor shaft in blocks.", rich_help_panel="Structure Options")],
     output: typing.Annotated[pathlib.Path, typer.Option("--output", "-O", help="Path to the output .schematic file.", rich_help_panel="Output Options")],
     transparent: typing.Annotated[bool, typer.Option("--transparent", "-t", help="Whether the turbine should have transparent casing.", rich_help_panel="Output Options")] = False,
-    facing: typing.Annotated[utils.Facing, typer.Option("--facing", "-f", help="The facing of the rotor.", rich_help_panel="Output Options")] = utils.Facing.X
+    facing: typing.Annotated[utils.Facing, typer.Option("--facing", "-f", help="The facing of the rotor.", rich_help_panel="Output Options")] = utils.Facing.X,
+    profile_file: typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--profile", help="The path to write a JSON profile of phase timings, model sizes, solver statistics and peak memory to.", rich_help_panel="Profiling Options")] = None,
+    profile_trace: typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--profile-trace", help="The path to write a Chrome trace of the phases to.", rich_help_panel="Profiling Options")] = None
 ) -> None:
     """Convert a NuclearCraft: Overhauled turbine blueprint to a .schematic file."""
-    with rotor_file.open("r") as file:
-        rotor_bp = reiuji.io.serialization.SerializableMultiSequence.model_validate_json(file.read()).to_multi_sequence()
-    with dynamo_file.open("r") as file:
-        dynamo_bp = reiuji.io.serialization.SerializableMultiSequence.model_validate_json(file.read()).to_multi_sequence()
-    if output.suffix == ".schematic":
-        reiuji.io.schematics.turbine.TurbineSchematicWriter(dynamo_bp, rotor_bp, shaft_width, transparent=transparent, facing=facing.value).write(output)
-    else:
-        rich.print(f"[red][bold]ERROR:[/bold] Unsupported file format: {output.suffix}[/red]")
+    with profiler.profile(profile_file, profile_trace, "convert overhauled turbine"):
+        rotor_bp = utils.load_design(rotor_file)
+        dynamo_bp = utils.load_design(dynamo_file)
+        if output.suffix == ".schematic":
+            utils.write_turbine(rotor_bp, dynamo_bp, output, shaft_width=shaft_width, transparent=transparent, facing=facing.value)
+        else:
+            rich.print(f"[red][bold]ERROR:[/bold] Unsupported file format: {output.suffix}[/red]")
 
 
 qmd_converter = typer.Typer(help="Commands for converting QMD blueprints.")
@@ -43,30 +75,222 @@ converter_app.add_typer(qmd_converter, name="qmd")
 
 @qmd_converter.command("accelerator")
 def convert_qmd_accelerator_blueprint(
-    blueprint_file: typing.Annotated[pathlib.Path, typer.Argument(help="Path to the accelerator JSON blueprint file.")],
+    blueprint_file: typing.Annotated[pathlib.Path, typer.Argument(help="Path to the accelerator JSON or .rjb blueprint file.")],
     output: typing.Annotated[pathlib.Path, typer.Option("--output", "-O", help="Path to the output .schematic file.", rich_help_panel="Output Options")],
-    transparent: typing.Annotated[bool, typer.Option("--transparent", "-t", help="Whether the accelerator should have transparent casing.", rich_help_panel="Output Options")] = False
+    transparent: typing.Annotated[bool, typer.Option("--transparent", "-t", help="Whether the accelerator should have transparent casing.", rich_help_panel="Output Options")] = False,
+    profile_file: typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--profile", help="The path to write a JSON profile of phase timings, model sizes, solver statistics and peak memory to.", rich_help_panel="Profiling Options")] = None,
+    profile_trace: typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--profile-trace", help="The path to write a Chrome trace of the phases to.", rich_help_panel="Profiling Options")] = None
 ) -> None:
     """Convert a QMD accelerator blueprint to a .schematic file."""
-    with blueprint_file.open("r") as file:
-        blueprint = reiuji.io.serialization.SerializableMultiSequence.model_validate_json(file.read()).to_multi_sequence()
-    if output.suffix == ".schematic":
-        reiuji.io.schematics.accelerator.AcceleratorSchematicWriter(blueprint, transparent=transparent).write(output)
-    else:
-        rich.print(f"[red][bold]ERROR:[/bold] Unsupported file format: {output.suffix}[/red]")
+    with profiler.profile(profile_file, profile_trace, "convert qmd accelerator"):
+        blueprint = utils.load_design(blueprint_file)
+        if output.suffix == ".schematic":
+            utils.write_design(blueprint, output, schematic_type="accelerator", transparent=transparent)
+        else:
+            rich.print(f"[red][bold]ERROR:[/bold] Unsupported file format: {output.suffix}[/red]")
 
 
 @qmd_converter.command("nucleosynthesis")
 def convert_qmd_nucleosynthesis_blueprint(
-    blueprint_file: typing.Annotated[pathlib.Path, typer.Argument(help="Path to the nucleosynthesis JSON blueprint file.")],
+    blueprint_file: typing.Annotated[pathlib.Path, typer.Argument(help="Path to the nucleosynthesis JSON or .rjb blueprint file.")],
     output: typing.Annotated[pathlib.Path, typer.Option("--output", "-O", help="Path to the output .schematic file.", rich_help_panel="Output Options")],
     transparent: typing.Annotated[bool, typer.Option("--transparent", "-t", help="Whether the nucleosynthesis chamber should have transparent casing.", rich_help_panel="Output Options")] = False,
-    facing: typing.Annotated[utils.Facing, typer.Option("--facing", "-f", help="The facing of the nucleosynthesis chamber.", rich_help_panel="Output Options")] = utils.Facing.X
+    facing: typing.Annotated[utils.Facing, typer.Option("--facing", "-f", help="The facing of the nucleosynthesis chamber.", rich_help_panel="Output Options")] = utils.Facing.X,
+    profile_file: typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--profile", help="The path to write a JSON profile of phase timings, model sizes, solver statistics and peak memory to.", rich_help_panel="Profiling Options")] = None,
+    profile_trace: typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--profile-trace", help="The path to write a Chrome trace of the phases to.", rich_help_panel="Profiling Options")] = None
 ) -> None:
     """Convert a QMD nucleosynthesis reactor blueprint to a .schematic file."""
-    with blueprint_file.open("r") as file:
-        blueprint = reiuji.io.serialization.SerializableMultiSequence.model_validate_json(file.read()).to_multi_sequence()
-    if output.suffix == ".schematic":
-        reiuji.io.schematics.nucleosynthesis.NucleosynthesisSchematicWriter(blueprint, transparent=transparent, facing=facing.value).write(output)
-    else:
-        rich.print(f"[red][bold]ERROR:[/bold] Unsupported file format: {output.suffix}[/red]")
+    with profiler.profile(profile_file, profile_trace, "convert qmd nucleosynthesis"):
+        blueprint = utils.load_design(blueprint_file)
+        if output.suffix == ".schematic":
+            utils.write_design(blueprint, output, schematic_type="nucleosynthesis", transparent=transparent, facing=facing.value)
+        else:
+            rich.print(f"[red][bold]ERROR:[/bold] Unsupported file format: {output.suffix}[/red]")
+
+
+class BulkTask(pydantic.BaseModel):
+    """A single blueprint to convert in bulk.
+
+    Without a kind, it is inferred from the blueprint's components when the blueprint is converted.
+    """
+    blueprint: pathlib.Path
+    output: pathlib.Path
+    kind: typing.Optional[str] = None
+    transparent: bool = False
+    facing: utils.Facing = utils.Facing.X
+    dynamo: typing.Optional[pathlib.Path] = None
+    shaft_width: typing.Optional[int] = None
+
+    def options_fingerprint(self) -> str:
+        """Hashes the options that determine the output, including those read from the sidecar."""
+        return hashlib.sha256(self.model_dump_json(exclude={"blueprint", "output"}).encode("utf-8")).hexdigest()
+
+    def fingerprint(self) -> str:
+        """Hashes the inputs and options that determine the output."""
+        digest = hashlib.sha256(self.options_fingerprint().encode("utf-8"))
+        for path in (self.blueprint, self.dynamo):
+            if isinstance(path, pathlib.Path):
+                with path.open("rb") as file:
+                    digest.update(hashlib.file_digest(file, "sha256").digest())
+        return digest.hexdigest()
+
+
+def infer_kind(blueprint: reiuji.core.multi_sequence.MultiSequence[reiuji.components.types.Component]) -> str | None:
+    """Infers the multiblock kind of a blueprint from the default component sets its components belong to."""
+    names = {comp.full_name for comp in blueprint}
+    candidates = {
+        "accelerator": reiuji.components.defaults.QMD_ACCELERATOR_COMPONENTS + reiuji.components.defaults.QMD_LINEAR_ACCELERATOR_COMPONENTS,
+        "nucleosynthesis": reiuji.components.defaults.QMD_NUCLEOSYNTHESIS_COMPONENTS
+    }
+    matches = [kind for kind, components in candidates.items() if names <= {comp.full_name for comp in components}]
+    return matches[0] if len(matches) == 1 else None
+
+
+def find_blueprints(inputs: list[str], exclude: typing.Sequence[pathlib.Path] = ()) -> list[tuple[pathlib.Path, pathlib.Path]]:
+    """Expands files, directories and glob patterns into `(blueprint, root)` pairs.
+
+    Files in or below any of the `exclude` paths are left out.
+    """
+    found = []
+    for spec in inputs:
+        path = pathlib.Path(spec)
+        if path.is_dir():
+            found.extend((file, path) for file in sorted(itertools.chain(path.rglob("*.json"), path.rglob("*.rjb"))))
+        elif path.is_file():
+            found.append((path, path.parent))
+        else:
+            prefix = re.split(r"[*?\[]", spec, maxsplit=1)[0]
+            root = pathlib.Path(prefix) if prefix.endswith("/") else pathlib.Path(prefix).parent
+            found.extend((pathlib.Path(file), root) for file in sorted(glob.glob(spec, recursive=True)) if pathlib.Path(file).is_file())
+    exclude = [path.resolve() for path in exclude]
+    return [
+        (file, root) for file, root in found
+        if not file.name.endswith(".meta.json") and not any(file.resolve().is_relative_to(path) for path in exclude)
+    ]
+
+
+def plan_task(blueprint: pathlib.Path, root: pathlib.Path, output_dir: pathlib.Path | None, transparent: bool, facing: utils.Facing) -> BulkTask:
+    """Builds a conversion task from a blueprint and its `<stem>.meta.json` sidecar if present."""
+    output = blueprint.with_suffix(".schematic") if isinstance(output_dir, type(None)) else output_dir / blueprint.relative_to(root).with_suffix(".schematic")
+    options = {"transparent": transparent, "facing": facing}
+    sidecar = blueprint.with_name(f"{blueprint.stem}.meta.json")
+    if sidecar.is_file():
+        with sidecar.open("r") as file:
+            options.update(json.load(file))
+        if "dynamo" in options:
+            options["dynamo"] = blueprint.parent / options["dynamo"]
+    return BulkTask(blueprint=blueprint, output=output, **options)
+
+
+def convert_task(task: BulkTask) -> tuple[BulkTask, str | None, str | None]:
+    """Converts a single blueprint, returning its fingerprint on success or an error message on failure."""
+    try:
+        fingerprint = task.fingerprint()
+        task.output.parent.mkdir(parents=True, exist_ok=True)
+        blueprint = utils.load_design(task.blueprint)
+        kind = task.kind
+        if isinstance(kind, type(None)):
+            kind = infer_kind(blueprint)
+            if isinstance(kind, type(None)):
+                raise ValueError("Cannot infer the multiblock kind; add a .meta.json sidecar.")
+        if kind == "turbine":
+            if isinstance(task.dynamo, type(None)) or isinstance(task.shaft_width, type(None)):
+                raise ValueError("Turbine blueprints need 'dynamo' and 'shaft_width' in their .meta.json sidecar.")
+            dynamo = utils.load_design(task.dynamo)
+            utils.write_turbine(blueprint, dynamo, task.output, shaft_width=task.shaft_width, transparent=task.transparent, facing=task.facing.value)
+        elif kind == "accelerator":
+            utils.write_design(blueprint, task.output, schematic_type="accelerator", transparent=task.transparent)
+        elif kind == "nucleosynthesis":
+            utils.write_design(blueprint, task.output, schematic_type="nucleosynthesis", transparent=task.transparent, facing=task.facing.value)
+        else:
+            raise ValueError(f"Unknown multiblock kind: {kind}")
+        return task, fingerprint, None
+    except Exception as e:
+        return task, None, "".join(traceback.format_exception_only(e)).strip()
+
+
+@converter_app.command("bulk")
+def convert_bulk(
+    inputs: typing.Annotated[list[str], typer.Argument(help="Blueprint files, directories or glob patterns to convert.")],
+    output_dir: typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--output-dir", "-O", help="The directory to write the .schematic files to. Defaults to next to each blueprint.", rich_help_panel="Output Options")] = None,
+    transparent: typing.Annotated[bool, typer.Option("--transparent", "-t", help="Whether to use transparent casing unless a sidecar says otherwise.", rich_help_panel="Output Options")] = False,
+    facing: typing.Annotated[utils.Facing, typer.Option("--facing", "-f", help="The facing to use unless a sidecar says otherwise.", rich_help_panel="Output Options")] = utils.Facing.X,
+    workers: typing.Annotated[typing.Optional[int], typer.Option("--workers", "-j", help="The number of worker processes. Defaults to the number of CPUs.", rich_help_panel="Batch Options")] = None,
+    force: typing.Annotated[bool, typer.Option("--force", help="Whether to convert blueprints even if they are unchanged.", rich_help_panel="Batch Options")] = False,
+    profile_file: typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--profile", help="The path to write a JSON profile of phase timings, model sizes, solver statistics and peak memory to.", rich_help_panel="Profiling Options")] = None,
+    profile_trace: typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--profile-trace", help="The path to write a Chrome trace of the phases to.", rich_help_panel="Profiling Options")] = None
+) -> None:
+    """Convert many blueprints to .schematic files in parallel.
+
+    The multiblock kind is read from a `<stem>.meta.json` sidecar if present (which may also set `transparent`, `facing`, and `dynamo` and `shaft_width` for turbines) or inferred from the blueprint's components. Blueprints whose contents and options have not changed since the last run are skipped.
+    """
+    with profiler.profile(profile_file, profile_trace, "convert bulk"):
+        start = time.perf_counter()
+        tasks = []
+        failed = 0
+        state_path = (output_dir or pathlib.Path(".")) / ".reiuji-bulk.json"
+        exclude = [state_path]
+        if not isinstance(output_dir, type(None)) and not any(pathlib.Path(spec).resolve().is_relative_to(output_dir.resolve()) for spec in inputs):
+            # Earlier outputs are not blueprints, unless the inputs themselves live in the output directory.
+            exclude.append(output_dir)
+        for blueprint, root in find_blueprints(inputs, exclude):
+            try:
+                tasks.append(plan_task(blueprint, root, output_dir, transparent, facing))
+            except Exception as e:
+                rich.print(f"[red][bold]{rich.markup.escape(str(blueprint))}:[/bold] {rich.markup.escape(str(e))}[/red]")
+                failed += 1
+        # A dynamo named by a turbine's sidecar is converted as part of that turbine, not on its own.
+        dynamos = {task.dynamo.resolve() for task in tasks if not isinstance(task.dynamo, type(None))}
+        tasks = [task for task in tasks if task.blueprint.resolve() not in dynamos]
+        state = {}
+        if state_path.is_file() and not force:
+            with state_path.open("r") as file:
+                state = json.load(file)
+        pending = []
+        for task in tasks:
+            stat = task.blueprint.stat()
+            entry = state.get(str(task.output))
+            if not isinstance(entry, type(None)) and task.output.is_file() and entry.get("options") == task.options_fingerprint():
+                # An unchanged mtime and size stand in for the blueprint's contents, but not for a turbine's dynamo.
+                if entry["mtime"] == stat.st_mtime_ns and entry["size"] == stat.st_size and isinstance(task.dynamo, type(None)):
+                    continue
+                if entry["fingerprint"] == task.fingerprint():
+                    entry.update(mtime=stat.st_mtime_ns, size=stat.st_size)
+                    continue
+            pending.append(task)
+        skipped = len(tasks) - len(pending)
+        converted = 0
+        total_bytes = 0
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor, profiler.span("convert", files=len(pending)):
+            for task, fingerprint, error in executor.map(convert_task, pending):
+                if isinstance(error, type(None)):
+                    stat = task.blueprint.stat()
+                    state[str(task.output)] = {"mtime": stat.st_mtime_ns, "size": stat.st_size, "options": task.options_fingerprint(), "fingerprint": fingerprint}
+                    converted += 1
+                    total_bytes += stat.st_size
+                else:
+                    rich.print(f"[red][bold]{rich.markup.escape(str(task.blueprint))}:[/bold] {rich.markup.escape(error)}[/red]")
+                    failed += 1
+        state_path.parent.mkdir(parents=True, exist_ok=True)
+        with state_path.open("w") as file:
+            json.dump(state, file, indent=4)
+        elapsed = time.perf_counter() - start
+        table = rich.table.Table(title="Bulk Conversion")
+        table.add_column("Property")
+        table.add_column("Value")
+        table.add_row("Converted", str(converted))
+        table.add_row("Skipped (unchanged)", str(skipped))
+        table.add_row("Failed", str(failed))
+        table.add_row("Wall Time", f"{elapsed:.2f}s")
+        table.add_row("Throughput", f"{converted / elapsed:.1f} files/s, {total_bytes / 1024 / 1024 / elapsed:.2f} MiB/s")
+        rich.print(table)
+        if failed > 0:
+            raise typer.Exit(code=1)
+
+
+CONVERT_COMMANDS = {
+    "format": convert_format,
+    "overhauled turbine": convert_nco_turbine_blueprint,
+    "qmd accelerator": convert_qmd_accelerator_blueprint,
+    "qmd nucleosynthesis": convert_qmd_nucleosynthesis_blueprint
+}
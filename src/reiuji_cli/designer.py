@@ -1,17 +1,281 @@
 """CLI for designer commands."""
 
 from . import utils
+from . import jobs
+from . import cache
+from . import solver
+from . import profiler
+from . import feasibility
+from . import store
 
+import concurrent.futures
+import dataclasses
+import itertools
+import os
+import sqlite3
+import threading
+import time
 import typing
 import pathlib
 
 import reiuji
 import typer
 import rich
+import rich.markup
+import rich.table
+from ortools.sat.python import cp_model
+from ortools.sat import cp_model_pb2
 
 
 designer_app = typer.Typer(help="Commands for invoking Reiuji's Designer.")
 
+
+# Options shared by the design commands.
+ComponentsFileOption = typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--components", "-C", help="The path to the file containing a list of components.", rich_help_panel="Component Options")]
+LimitsFileOption = typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--limits", "-L", help="The path to the file containing a list of component limits.", rich_help_panel="Component Options")]
+TimeoutOption = typing.Annotated[typing.Optional[float], typer.Option("--timeout", "-T", help="The maximum time to spend designing the structure in seconds.", rich_help_panel="Designer Options")]
+UseCacheOption = typing.Annotated[bool, typer.Option("--cache/--no-cache", help="Whether to reuse and store results in the solution cache.", rich_help_panel="Designer Options")]
+PublishOption = typing.Annotated[bool, typer.Option("--store/--no-store", help="Whether to publish the result to the design store.", rich_help_panel="Designer Options")]
+PrecheckOption = typing.Annotated[bool, typer.Option("--precheck/--no-precheck", help="Whether to reject jobs that cannot have a solution before invoking the solver.", rich_help_panel="Designer Options")]
+ProbeOption = typing.Annotated[typing.Optional[float], typer.Option("--probe", help="The time to spend looking for any solution before the full run in seconds. Jobs proven infeasible stop there, and a solution found is used as a hint.", rich_help_panel="Designer Options")]
+SolutionsOption = typing.Annotated[int, typer.Option("--solutions", help="The number of distinct designs to find. Designs after the first come from solving the same model again and are written to indexed output paths, e.g. design-2.json.", rich_help_panel="Designer Options")]
+MinDistanceOption = typing.Annotated[int, typer.Option("--min-distance", help="With --solutions, the minimum number of cells in which each design must differ from every earlier one.", rich_help_panel="Designer Options")]
+SearchWorkersOption = typing.Annotated[typing.Optional[int], typer.Option("--search-workers", help="The number of parallel search workers used by the solver.", rich_help_panel="Solver Options")]
+SeedOption = typing.Annotated[typing.Optional[int], typer.Option("--seed", help="The random seed used by the solver.", rich_help_panel="Solver Options")]
+SolverParamsOption = typing.Annotated[list[str], typer.Option("--solver-param", help="A CP-SAT parameter to set, in the form key=value.", rich_help_panel="Solver Options")]
+ProgressOption = typing.Annotated[bool, typer.Option("--progress", help="Whether to print every solution found while the solver is running.", rich_help_panel="Solver Options")]
+HintFileOption = typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--hint", help="The path to a JSON blueprint to use as a starting solution.", rich_help_panel="Solver Options")]
+PreviewOption = typing.Annotated[utils.PreviewMode, typer.Option("--preview", "-p", help="How to print the design to the terminal.", rich_help_panel="Output Options")]
+NoPreviewOption = typing.Annotated[bool, typer.Option("--no-preview", help="Whether to skip printing the design. Same as --preview none.", rich_help_panel="Output Options")]
+OutputOption = typing.Annotated[list[pathlib.Path], typer.Option("--output", "-O", help="The path(s) to output the designs to.", rich_help_panel="Output Options")]
+WriteEveryImprovementOption = typing.Annotated[bool, typer.Option("--write-every-improvement", help="Whether to rewrite the output files every time a better design is found.", rich_help_panel="Output Options")]
+ProfileFileOption = typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--profile", help="The path to write a JSON profile of phase timings, model sizes, solver statistics and peak memory to.", rich_help_panel="Profiling Options")]
+ProfileTraceOption = typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--profile-trace", help="The path to write a Chrome trace of the phases to.", rich_help_panel="Profiling Options")]
+SymmetryOption = typing.Annotated[utils.SymmetryMode, typer.Option("--symmetry", help="Whether to use the symmetry flags as given or race every combination of them and keep the first design found.", rich_help_panel="Symmetry Options")]
+KeepSearchingOption = typing.Annotated[bool, typer.Option("--keep-searching", help="With --symmetry auto, whether to let every combination use the full timeout and keep the best design.", rich_help_panel="Symmetry Options")]
+
+
+def run_designer(
+        designer_cls: type,
+        params: dict[str, typing.Any],
+        *,
+        timeout: float | None = None,
+        use_cache: bool = True,
+        solver_options: solver.SolverOptions | None = None,
+        progress: bool = False,
+        on_improvement: typing.Callable[[reiuji.core.multi_sequence.MultiSequence[reiuji.components.types.Component]], None] | None = None,
+        hint: reiuji.core.multi_sequence.MultiSequence[reiuji.components.types.Component] | None = None,
+        symmetry: dict[str, str] | None = None,
+        keep_searching: bool = False,
+        precheck: bool = True,
+        probe: float | None = None,
+        publish: bool = False,
+        solutions: int = 1,
+        min_distance: int = 1,
+        on_alternative: typing.Callable[[int, reiuji.core.multi_sequence.MultiSequence[reiuji.components.types.Component]], None] | None = None
+    ) -> tuple[cp_model_pb2.CpSolverStatus, reiuji.core.multi_sequence.MultiSequence[reiuji.components.types.Component] | None]:
+    """Constructs a designer and runs it, reusing a cached result where possible.
+
+    If `symmetry` maps symmetry parameters to their flags, the designer is raced over every combination of them instead.
+    With `publish`, the result is added to the design store.
+    With `solutions` above one, the solved model is solved again for more distinct designs, which are passed to `on_alternative` with their 1-based index.
+    """
+    solver_options = solver_options or solver.SolverOptions()
+    try:
+        solver_options.validate()
+    except ValueError as e:
+        rich.print(f"[red][bold]ERROR:[/bold] {rich.markup.escape(str(e))}[/red]")
+        raise typer.Exit(code=1)
+    if solutions < 1 or min_distance < 1:
+        rich.print("[red][bold]ERROR:[/bold] The number of solutions and the minimum distance must be at least 1.[/red]")
+        raise typer.Exit(code=1)
+    if solutions > 1 and not isinstance(symmetry, type(None)):
+        rich.print("[red][bold]ERROR:[/bold] Multiple solutions cannot be combined with --symmetry auto.[/red]")
+        raise typer.Exit(code=1)
+    if not isinstance(symmetry, type(None)):
+        return race_designer(
+            designer_cls,
+            params,
+            symmetry,
+            keep_searching=keep_searching,
+            timeout=timeout,
+            use_cache=use_cache,
+            solver_options=solver_options,
+            progress=progress,
+            on_improvement=on_improvement,
+            hint=hint,
+            precheck=precheck,
+            probe=probe,
+            publish=publish
+        )
+    if use_cache:
+        with profiler.span("cache lookup"):
+            key = cache.make_key(designer_cls, params, solver_options.params)
+            time_limit = solver_options.time_limit(timeout)
+            # The cache only holds the first design, so runs that want more must solve again.
+            cached = cache.get(key, time_limit) if solutions == 1 else None
+        if not isinstance(cached, type(None)):
+            rich.print("[blue][bold]CACHE:[/bold] Reusing cached result[/blue]")
+            status, design, objective = cached
+            if not isinstance(solver.current(), type(None)):
+                solver.current().restore(status, objective)
+            if publish:
+                publish_result(designer_cls, params, status, design, objective)
+            return status, design
+    with profiler.span("build designer"):
+        designer = designer_cls(**params)
+    if precheck:
+        with profiler.span("precheck"):
+            errors = feasibility.check(params, designer)
+        if len(errors) > 0:
+            for error in errors:
+                rich.print(f"[red][bold]PRECHECK:[/bold] {rich.markup.escape(error)}[/red]")
+            return cp_model.INFEASIBLE, None
+    if not isinstance(probe, type(None)):
+        with profiler.span("probe"):
+            probe_designer = designer_cls(**params)
+            probe_options = dataclasses.replace(solver_options, params=[*solver_options.params, "stop_after_first_solution=true"])
+            with solver.session(solver.Session(probe_options, decoder=solver.Decoder.from_designer(probe_designer), hint=hint)):
+                probe_status, probe_design = probe_designer.design(timeout=probe)
+        if probe_status in (cp_model.INFEASIBLE, cp_model.MODEL_INVALID):
+            rich.print("[red][bold]PROBE:[/bold] The solver proved that no solution exists[/red]")
+            if use_cache:
+                cache.put(key, time_limit, probe_status, None)
+            if publish:
+                publish_result(designer_cls, params, probe_status, None)
+            return probe_status, None
+        if isinstance(probe_design, type(None)):
+            rich.print(f"[blue][bold]PROBE:[/bold] No solution found in {probe:g}s, continuing with the full run[/blue]")
+        elif isinstance(hint, type(None)):
+            rich.print("[blue][bold]PROBE:[/bold] Found a solution, using it as a hint[/blue]")
+            hint = probe_design
+    listeners = []
+    if progress:
+        listeners.append(utils.print_progress)
+    if not isinstance(on_improvement, type(None)):
+        def write_improvement(solution: solver.Solution) -> None:
+            design = solution.design()
+            if not isinstance(design, type(None)):
+                on_improvement(design)
+        listeners.append(write_improvement)
+    start = time.perf_counter()
+    with solver.session(solver.Session(solver_options, decoder=solver.Decoder.from_designer(designer), listeners=listeners, hint=hint, solutions=solutions, min_distance=min_distance)) as active, profiler.span("design"):
+        status, design = designer.design(timeout=timeout)
+    profile = profiler.active()
+    if not isinstance(profile, type(None)):
+        # Reiuji builds the whole model before solving it, so the time not spent solving is the model build.
+        profile.add_span("build model", start, start + max(time.perf_counter() - start - active.record.wall_time, 0.0))
+    if use_cache and not any(session.stopped for session in active.lineage()):
+        with profiler.span("cache store"):
+            cache.put(key, time_limit, status, design, active.record.objective)
+    if publish:
+        publish_result(designer_cls, params, status, design, active.record.objective)
+    if solutions > 1 and not isinstance(design, type(None)):
+        rich.print(f"[blue][bold]SOLUTIONS:[/bold] Found {len(active.alternatives) + 1} of {solutions} distinct design(s)[/blue]")
+        for alternative in active.alternatives:
+            if not isinstance(on_alternative, type(None)):
+                on_alternative(alternative.index, alternative.design())
+            if publish:
+                publish_result(designer_cls, params, cp_model.FEASIBLE, alternative.design(), alternative.objective)
+    return status, design
+
+
+def publish_result(
+        designer_cls: type,
+        params: dict[str, typing.Any],
+        status: cp_model_pb2.CpSolverStatus,
+        design: reiuji.core.multi_sequence.MultiSequence[reiuji.components.types.Component] | None,
+        objective: float | None = None
+    ) -> None:
+    """Adds a result to the design store, warning instead of failing the run if the store cannot be written."""
+    try:
+        with profiler.span("store"):
+            key = store.publish(designer_cls, params, status, design, objective)
+    except (OSError, sqlite3.Error) as e:
+        rich.print(f"[yellow][bold]WARNING:[/bold] Could not publish to the design store: {rich.markup.escape(str(e))}[/yellow]")
+        return
+    if not isinstance(key, type(None)):
+        rich.print(f"[blue][bold]STORE:[/bold] Published design {key[:12]}[/blue]")
+
+
+def race_designer(
+        designer_cls: type,
+        params: dict[str, typing.Any],
+        symmetry: dict[str, str],
+        *,
+        keep_searching: bool = False,
+        solver_options: solver.SolverOptions | None = None,
+        on_improvement: typing.Callable[[reiuji.core.multi_sequence.MultiSequence[reiuji.components.types.Component]], None] | None = None,
+        **kwargs: typing.Any
+    ) -> tuple[cp_model_pb2.CpSolverStatus, reiuji.core.multi_sequence.MultiSequence[reiuji.components.types.Component] | None]:
+    """Runs a designer for every combination of the given symmetry parameters at once, splitting the search workers between them.
+
+    The first combination to finish with a design wins and the others are stopped.
+    With `keep_searching`, every combination runs to the end and the best design is kept, unless the unconstrained one proves optimality first.
+    Only the unconstrained combination can report an optimal design; optimal designs of the others are reported as feasible.
+    """
+    solver_options = solver_options or solver.SolverOptions()
+    variants = []
+    for values in itertools.product((True, False), repeat=len(symmetry)):
+        label = " ".join(flag for flag, value in zip(symmetry.values(), values) if value) or "no symmetry"
+        variants.append((label, params | dict(zip(symmetry, values))))
+    unconstrained = variants[-1][0]
+    workers = max((solver_options.workers or os.cpu_count() or 1) // len(variants), 1)
+    options = dataclasses.replace(solver_options, workers=workers)
+    rich.print(f"[blue][bold]SYMMETRY:[/bold] Racing {len(variants)} combinations with {workers} search worker(s) each[/blue]")
+
+    lock = threading.Lock()
+    written: dict[str, typing.Any] = {}
+
+    def write_improvement(solution: solver.Solution) -> None:
+        design = solution.design()
+        if isinstance(design, type(None)):
+            return
+        with lock:
+            if len(written) > 0 and not solver.improves(solution.objective, written["objective"], solution.maximize):
+                return
+            written["objective"] = solution.objective
+            on_improvement(design)
+
+    outer = solver.current()
+    sessions = []
+    for _ in variants:
+        session = solver.Session(listeners=[write_improvement] if not isinstance(on_improvement, type(None)) else None)
+        session.parent = outer
+        sessions.append(session)
+
+    def run(session: solver.Session, variant: dict[str, typing.Any]) -> tuple[cp_model_pb2.CpSolverStatus, reiuji.core.multi_sequence.MultiSequence[reiuji.components.types.Component] | None]:
+        with solver.session(session):
+            return run_designer(designer_cls, variant, solver_options=options, **kwargs)
+
+    statuses = {}
+    winner = None
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(variants)) as executor:
+        futures = {executor.submit(run, session, variant): (label, session) for (label, variant), session in zip(variants, sessions)}
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                label, session = futures[future]
+                status, design = future.result()
+                statuses[label] = status
+                if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE) or isinstance(design, type(None)):
+                    continue
+                if isinstance(winner, type(None)) or solver.improves(session.record.objective, winner[3], session.record.maximize):
+                    winner = (label, status, design, session.record.objective)
+                if not keep_searching or (label == unconstrained and status == cp_model.OPTIMAL):
+                    break
+        finally:
+            for session in sessions:
+                session.stop()
+    if isinstance(winner, type(None)):
+        return statuses.get(unconstrained, cp_model.UNKNOWN), None
+    label, status, design, _ = winner
+    rich.print(f"[blue][bold]SYMMETRY:[/bold] Using {label}[/blue]")
+    if label != unconstrained and status == cp_model.OPTIMAL:
+        # The design is only optimal among the designs with that symmetry.
+        status = cp_model.FEASIBLE
+    return status, design
+
+
 nco_designer = typer.Typer(help="Commands for designing NuclearCraft: Overhauled multiblocks.")
 designer_app.add_typer(nco_designer, name="overhauled")
 
@@ -20,32 +284,60 @@ designer_app.add_typer(nco_designer, name="overhauled")
 def design_nco_turbine_rotor(
     length: typing.Annotated[int, typer.Argument(help="The length of the rotor shaft in blocks.")],
     expansion: typing.Annotated[float, typer.Option("--expansion", "-e", help="The optimal expansion of the input fluid.", rich_help_panel="Fluid Options")],
-    components_file: typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--components", "-C", help="The path to the file containing a list of components.", rich_help_panel="Component Options")] = None,
-    limits_file: typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--limits", "-L", help="The path to the file containing a list of component limits.", rich_help_panel="Component Options")] = None,
+    components_file: ComponentsFileOption = None,
+    limits_file: LimitsFileOption = None,
     is_qmd: typing.Annotated[bool, typer.Option("--qmd", help="Whether to include QMD-only components. Only has effect if -C is not specified.", rich_help_panel="Component Options")] = False,
-    timeout: typing.Annotated[typing.Optional[float], typer.Option("--timeout", "-T", help="The maximum time to spend designing the structure in seconds.", rich_help_panel="Designer Options")] = None,
-    output: typing.Annotated[list[pathlib.Path], typer.Option("--output", "-O", help="The path(s) to output the designs to.", rich_help_panel="Output Options")] = []
-) -> None:
+    timeout: TimeoutOption = None,
+    use_cache: UseCacheOption = True,
+    publish: PublishOption = False,
+    precheck: PrecheckOption = True,
+    probe: ProbeOption = None,
+    solutions: SolutionsOption = 1,
+    min_distance: MinDistanceOption = 1,
+    search_workers: SearchWorkersOption = None,
+    seed: SeedOption = None,
+    solver_params: SolverParamsOption = [],
+    progress: ProgressOption = False,
+    hint_file: HintFileOption = None,
+    preview: PreviewOption = utils.PreviewMode.FULL,
+    no_preview: NoPreviewOption = False,
+    output: OutputOption = [],
+    write_every_improvement: WriteEveryImprovementOption = False,
+    profile_file: ProfileFileOption = None,
+    profile_trace: ProfileTraceOption = None
+) -> cp_model_pb2.CpSolverStatus:
     """Designs a NuclearCraft: Overhauled turbine rotor sequence."""
-    limits = utils.load_limits(limits_file)
-    components = utils.load_component_list(components_file)
-    if is_qmd and isinstance(components, type(None)):
-        components = reiuji.components.defaults.OVERHAULED_TURBINE_ROTOR_COMPONENTS_QMD
-    designer = reiuji.designer.overhauled.turbine_rotor.TurbineRotorDesigner(
-        length=length,
-        optimal_expansion=expansion,
-        components=components,
-        component_limits=limits
-    )
-    status, design = designer.design(timeout=timeout)
-    utils.print_status(status)
-    if not isinstance(design, type(None)):
-        for comp in design:
-            rich_short_name = utils.format_text_rich(comp.display.short_name, bold=comp.display.bold, italic=comp.display.italic, color=comp.display.color, bg_color=comp.display.bg_color)
-            rich.print(rich_short_name, end=" ")
-        print()
-        for path in output:
-            utils.write_design(design, path)
+    with profiler.profile(profile_file, profile_trace, "overhauled turbine-rotor"):
+        limits = utils.load_limits(limits_file)
+        components = utils.load_component_list(components_file)
+        if is_qmd and isinstance(components, type(None)):
+            components = reiuji.components.defaults.OVERHAULED_TURBINE_ROTOR_COMPONENTS_QMD
+        status, design = run_designer(
+            reiuji.designer.overhauled.turbine_rotor.TurbineRotorDesigner,
+            dict(
+                length=length,
+                optimal_expansion=expansion,
+                components=components,
+                component_limits=limits
+            ),
+            timeout=timeout,
+            use_cache=use_cache,
+            precheck=precheck,
+            probe=probe,
+            publish=publish,
+            solutions=solutions,
+            min_distance=min_distance,
+            on_alternative=lambda i, design: utils.write_designs(design, utils.solution_paths(output, i, solutions)),
+            solver_options=solver.SolverOptions(workers=search_workers, seed=seed, params=solver_params),
+            progress=progress,
+            hint=utils.load_design(hint_file) if isinstance(hint_file, pathlib.Path) else None,
+            on_improvement=(lambda design: utils.write_designs(design, utils.solution_paths(output, 1, solutions))) if write_every_improvement else None
+        )
+        utils.print_status(status)
+        if not isinstance(design, type(None)):
+            utils.print_design(design, (0,), utils.PreviewMode.NONE if no_preview else preview)
+            utils.write_designs(design, utils.solution_paths(output, 1, solutions))
+        return status
 
 
 @nco_designer.command("turbine-dynamo")
@@ -54,32 +346,222 @@ def design_nco_turbine_dynamo(
     shaft_width: typing.Annotated[int, typer.Argument(help="The width of the rotor shaft in blocks.")] = 1,
     x_symmetry: typing.Annotated[bool, typer.Option("-X", help="Whether to enforce symmetry along the horizontal axis.", rich_help_panel="Symmetry Options")] = False,
     y_symmetry: typing.Annotated[bool, typer.Option("-Y", help="Whether to enforce symmetry along the vertical axis.", rich_help_panel="Symmetry Options")] = False,
-    components_file: typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--components", "-C", help="The path to the file containing a list of components.", rich_help_panel="Component Options")] = None,
-    limits_file: typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--limits", "-L", help="The path to the file containing a list of component limits.", rich_help_panel="Component Options")] = None,
-    timeout: typing.Annotated[typing.Optional[float], typer.Option("--timeout", "-T", help="The maximum time to spend designing the structure in seconds.", rich_help_panel="Designer Options")] = None,
-    output: typing.Annotated[list[pathlib.Path], typer.Option("--output", "-O", help="The path(s) to output the designs to.", rich_help_panel="Output Options")] = []
-) -> None:
+    symmetry: SymmetryOption = utils.SymmetryMode.MANUAL,
+    keep_searching: KeepSearchingOption = False,
+    components_file: ComponentsFileOption = None,
+    limits_file: LimitsFileOption = None,
+    timeout: TimeoutOption = None,
+    use_cache: UseCacheOption = True,
+    publish: PublishOption = False,
+    precheck: PrecheckOption = True,
+    probe: ProbeOption = None,
+    solutions: SolutionsOption = 1,
+    min_distance: MinDistanceOption = 1,
+    search_workers: SearchWorkersOption = None,
+    seed: SeedOption = None,
+    solver_params: SolverParamsOption = [],
+    progress: ProgressOption = False,
+    hint_file: HintFileOption = None,
+    preview: PreviewOption = utils.PreviewMode.FULL,
+    no_preview: NoPreviewOption = False,
+    output: OutputOption = [],
+    write_every_improvement: WriteEveryImprovementOption = False,
+    profile_file: ProfileFileOption = None,
+    profile_trace: ProfileTraceOption = None
+) -> cp_model_pb2.CpSolverStatus:
     """Designs a NuclearCraft: Overhauled turbine dynamo configuration."""
-    limits = utils.load_limits(limits_file)
-    components = utils.load_component_list(components_file)
-    designer = reiuji.designer.overhauled.turbine_dynamo.TurbineDynamoDesigner(
-        side_length=side_length,
-        shaft_width=shaft_width,
-        x_symmetry=x_symmetry,
-        y_symmetry=y_symmetry,
-        components=components,
-        component_limits=limits
-    )
-    status, design = designer.design(timeout=timeout)
-    utils.print_status(status)
-    if not isinstance(design, type(None)):
-        for y in range(design.shape[0]):
-            for x in range(design.shape[1]):
-                rich_short_name = utils.format_text_rich(design[y, x].display.short_name, bold=design[y, x].display.bold, italic=design[y, x].display.italic, color=design[y, x].display.color, bg_color=design[y, x].display.bg_color)
-                rich.print(rich_short_name, end=" ")
-            print()
-        for path in output:
-            utils.write_design(design, path)
+    with profiler.profile(profile_file, profile_trace, "overhauled turbine-dynamo"):
+        limits = utils.load_limits(limits_file)
+        components = utils.load_component_list(components_file)
+        status, design = run_designer(
+            reiuji.designer.overhauled.turbine_dynamo.TurbineDynamoDesigner,
+            dict(
+                side_length=side_length,
+                shaft_width=shaft_width,
+                x_symmetry=x_symmetry,
+                y_symmetry=y_symmetry,
+                components=components,
+                component_limits=limits
+            ),
+            timeout=timeout,
+            use_cache=use_cache,
+            precheck=precheck,
+            probe=probe,
+            publish=publish,
+            solutions=solutions,
+            min_distance=min_distance,
+            on_alternative=lambda i, design: utils.write_designs(design, utils.solution_paths(output, i, solutions)),
+            solver_options=solver.SolverOptions(workers=search_workers, seed=seed, params=solver_params),
+            progress=progress,
+            hint=utils.load_design(hint_file) if isinstance(hint_file, pathlib.Path) else None,
+            on_improvement=(lambda design: utils.write_designs(design, utils.solution_paths(output, 1, solutions))) if write_every_improvement else None,
+            symmetry={"x_symmetry": "-X", "y_symmetry": "-Y"} if symmetry == utils.SymmetryMode.AUTO else None,
+            keep_searching=keep_searching
+        )
+        utils.print_status(status)
+        if not isinstance(design, type(None)):
+            utils.print_design(design, (0, 1), utils.PreviewMode.NONE if no_preview else preview)
+            utils.write_designs(design, utils.solution_paths(output, 1, solutions))
+        return status
+
+
+STATUS_RANKS = {cp_model.OPTIMAL: 3, cp_model.FEASIBLE: 2, cp_model.UNKNOWN: 1}
+
+
+@nco_designer.command("turbine")
+def design_nco_turbine(
+    length: typing.Annotated[int, typer.Argument(help="The length of the rotor shaft in blocks.")],
+    side_length: typing.Annotated[int, typer.Argument(help="The side length of the dynamo configuration in blocks.")],
+    shaft_width: typing.Annotated[int, typer.Argument(help="The width of the rotor shaft in blocks.")] = 1,
+    expansion: typing.Annotated[float, typer.Option("--expansion", "-e", help="The optimal expansion of the input fluid.", rich_help_panel="Fluid Options")] = ...,
+    x_symmetry: typing.Annotated[bool, typer.Option("-X", help="Whether to enforce symmetry along the horizontal axis of the dynamo.", rich_help_panel="Symmetry Options")] = False,
+    y_symmetry: typing.Annotated[bool, typer.Option("-Y", help="Whether to enforce symmetry along the vertical axis of the dynamo.", rich_help_panel="Symmetry Options")] = False,
+    symmetry: typing.Annotated[utils.SymmetryMode, typer.Option("--symmetry", help="Whether to use the dynamo symmetry flags as given or race every combination of them and keep the first design found.", rich_help_panel="Symmetry Options")] = utils.SymmetryMode.MANUAL,
+    keep_searching: KeepSearchingOption = False,
+    rotor_components_file: typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--rotor-components", help="The path to the file containing a list of rotor components.", rich_help_panel="Component Options")] = None,
+    rotor_limits_file: typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--rotor-limits", help="The path to the file containing a list of rotor component limits.", rich_help_panel="Component Options")] = None,
+    dynamo_components_file: typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--dynamo-components", help="The path to the file containing a list of dynamo components.", rich_help_panel="Component Options")] = None,
+    dynamo_limits_file: typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--dynamo-limits", help="The path to the file containing a list of dynamo component limits.", rich_help_panel="Component Options")] = None,
+    is_qmd: typing.Annotated[bool, typer.Option("--qmd", help="Whether to include QMD-only rotor components. Only has effect if --rotor-components is not specified.", rich_help_panel="Component Options")] = False,
+    timeout: TimeoutOption = None,
+    use_cache: UseCacheOption = True,
+    publish: PublishOption = False,
+    precheck: PrecheckOption = True,
+    probe: ProbeOption = None,
+    solutions: typing.Annotated[int, typer.Option("--solutions", help="The number of distinct designs to find for each half. Designs after the first are written to indexed output paths, e.g. rotor-2.json, and the turbine built from the n-th rotor and dynamo to e.g. turbine-2.schematic.", rich_help_panel="Designer Options")] = 1,
+    min_distance: MinDistanceOption = 1,
+    search_workers: typing.Annotated[typing.Optional[int], typer.Option("--search-workers", help="The number of parallel search workers used by the solver, split between the rotor and the dynamo.", rich_help_panel="Solver Options")] = None,
+    seed: SeedOption = None,
+    solver_params: SolverParamsOption = [],
+    progress: ProgressOption = False,
+    rotor_hint_file: typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--rotor-hint", help="The path to a JSON blueprint to use as a starting rotor.", rich_help_panel="Solver Options")] = None,
+    dynamo_hint_file: typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--dynamo-hint", help="The path to a JSON blueprint to use as a starting dynamo.", rich_help_panel="Solver Options")] = None,
+    preview: typing.Annotated[utils.PreviewMode, typer.Option("--preview", "-p", help="How to print the designs to the terminal.", rich_help_panel="Output Options")] = utils.PreviewMode.FULL,
+    no_preview: typing.Annotated[bool, typer.Option("--no-preview", help="Whether to skip printing the designs. Same as --preview none.", rich_help_panel="Output Options")] = False,
+    output: typing.Annotated[list[pathlib.Path], typer.Option("--output", "-O", help="The path(s) to output the turbine .schematic files to.", rich_help_panel="Output Options")] = [],
+    rotor_output: typing.Annotated[list[pathlib.Path], typer.Option("--rotor-output", help="The path(s) to output the rotor design to.", rich_help_panel="Output Options")] = [],
+    dynamo_output: typing.Annotated[list[pathlib.Path], typer.Option("--dynamo-output", help="The path(s) to output the dynamo design to.", rich_help_panel="Output Options")] = [],
+    transparent: typing.Annotated[bool, typer.Option("--transparent", "-t", help="Whether the turbine should have transparent casing.", rich_help_panel="Output Options")] = False,
+    facing: typing.Annotated[utils.Facing, typer.Option("--facing", "-f", help="The facing of the rotor.", rich_help_panel="Output Options")] = utils.Facing.X,
+    write_every_improvement: typing.Annotated[bool, typer.Option("--write-every-improvement", help="Whether to rewrite the output files every time a better rotor or dynamo is found. The turbine is rewritten once both halves have a design.", rich_help_panel="Output Options")] = False,
+    profile_file: ProfileFileOption = None,
+    profile_trace: ProfileTraceOption = None
+) -> cp_model_pb2.CpSolverStatus:
+    """Designs a NuclearCraft: Overhauled turbine rotor and dynamo at once and writes the whole turbine.
+
+    Both halves are solved concurrently and cached separately, so changing the parameters of one half reuses the cached other half.
+    """
+    with profiler.profile(profile_file, profile_trace, "overhauled turbine"):
+        rotor_components = utils.load_component_list(rotor_components_file)
+        if is_qmd and isinstance(rotor_components, type(None)):
+            rotor_components = reiuji.components.defaults.OVERHAULED_TURBINE_ROTOR_COMPONENTS_QMD
+        halves = {
+            "rotor": (
+                reiuji.designer.overhauled.turbine_rotor.TurbineRotorDesigner,
+                dict(
+                    length=length,
+                    optimal_expansion=expansion,
+                    components=rotor_components,
+                    component_limits=utils.load_limits(rotor_limits_file)
+                ),
+                None
+            ),
+            "dynamo": (
+                reiuji.designer.overhauled.turbine_dynamo.TurbineDynamoDesigner,
+                dict(
+                    side_length=side_length,
+                    shaft_width=shaft_width,
+                    x_symmetry=x_symmetry,
+                    y_symmetry=y_symmetry,
+                    components=utils.load_component_list(dynamo_components_file),
+                    component_limits=utils.load_limits(dynamo_limits_file)
+                ),
+                {"x_symmetry": "-X", "y_symmetry": "-Y"} if symmetry == utils.SymmetryMode.AUTO else None
+            )
+        }
+        hints = {
+            "rotor": utils.load_design(rotor_hint_file) if isinstance(rotor_hint_file, pathlib.Path) else None,
+            "dynamo": utils.load_design(dynamo_hint_file) if isinstance(dynamo_hint_file, pathlib.Path) else None
+        }
+        paths = {"rotor": rotor_output, "dynamo": dynamo_output}
+        solver_options = solver.SolverOptions(workers=max((search_workers or os.cpu_count() or 1) // len(halves), 1), seed=seed, params=solver_params)
+        outer = solver.current()
+        sessions = {}
+        for name in halves:
+            sessions[name] = solver.Session()
+            sessions[name].parent = outer
+        alternatives: dict[str, dict[int, reiuji.core.multi_sequence.MultiSequence[reiuji.components.types.Component]]] = {name: {} for name in halves}
+        improvements: dict[str, reiuji.core.multi_sequence.MultiSequence[reiuji.components.types.Component]] = {}
+        lock = threading.Lock()
+
+        def write_turbine(index: int, rotor: reiuji.core.multi_sequence.MultiSequence[reiuji.components.types.Component], dynamo: reiuji.core.multi_sequence.MultiSequence[reiuji.components.types.Component]) -> None:
+            for path in utils.solution_paths(output, index, solutions):
+                utils.write_turbine(rotor, dynamo, path, shaft_width=shaft_width, transparent=transparent, facing=facing.value)
+
+        def write_alternative(name: str, index: int, design: reiuji.core.multi_sequence.MultiSequence[reiuji.components.types.Component]) -> None:
+            utils.write_designs(design, utils.solution_paths(paths[name], index, solutions))
+            with lock:
+                alternatives[name][index] = design
+
+        def write_improvement(name: str, design: reiuji.core.multi_sequence.MultiSequence[reiuji.components.types.Component]) -> None:
+            with lock:
+                improvements[name] = design
+                utils.write_designs(design, utils.solution_paths(paths[name], 1, solutions))
+                if len(improvements) == len(halves):
+                    write_turbine(1, improvements["rotor"], improvements["dynamo"])
+
+        def run(name: str) -> tuple[cp_model_pb2.CpSolverStatus, reiuji.core.multi_sequence.MultiSequence[reiuji.components.types.Component] | None]:
+            designer_cls, params, flags = halves[name]
+            with solver.session(sessions[name]):
+                return run_designer(
+                    designer_cls,
+                    params,
+                    timeout=timeout,
+                    use_cache=use_cache,
+                    precheck=precheck,
+                    probe=probe,
+                    publish=publish,
+                    solver_options=solver_options,
+                    progress=progress,
+                    hint=hints[name],
+                    symmetry=flags,
+                    keep_searching=keep_searching,
+                    solutions=solutions,
+                    min_distance=min_distance,
+                    on_alternative=lambda i, design: write_alternative(name, i, design),
+                    on_improvement=(lambda design: write_improvement(name, design)) if write_every_improvement else None
+                )
+
+        results = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(halves)) as executor:
+            futures = {executor.submit(run, name): name for name in halves}
+            try:
+                for future in concurrent.futures.as_completed(futures):
+                    results[futures[future]] = future.result()
+                    if isinstance(results[futures[future]][1], type(None)):
+                        # The turbine cannot be built without this half, so there is no point in finishing the other.
+                        break
+            finally:
+                for name in halves:
+                    if name not in results:
+                        sessions[name].stop()
+        for name in halves:
+            if name not in results:
+                results[name] = (cp_model.UNKNOWN, None)
+        rotor_status, rotor = results["rotor"]
+        dynamo_status, dynamo = results["dynamo"]
+        for name, axes in (("rotor", (0,)), ("dynamo", (0, 1))):
+            status, design = results[name]
+            rich.print(f"[bold]{name.capitalize()}[/bold]")
+            utils.print_status(status)
+            if not isinstance(design, type(None)):
+                utils.print_design(design, axes, utils.PreviewMode.NONE if no_preview else preview)
+                utils.write_designs(design, utils.solution_paths(paths[name], 1, solutions))
+        if not isinstance(rotor, type(None)) and not isinstance(dynamo, type(None)):
+            write_turbine(1, rotor, dynamo)
+            for index in sorted(alternatives["rotor"].keys() & alternatives["dynamo"].keys()):
+                write_turbine(index, alternatives["rotor"][index], alternatives["dynamo"][index])
+        return min((rotor_status, dynamo_status), key=lambda status: STATUS_RANKS.get(status, 0))
 
 
 qmd_designer = typer.Typer(help="Commands for designing QMD multiblocks.")
@@ -101,44 +583,73 @@ def design_qmd_linear(
     heat_neutral: typing.Annotated[bool, typer.Option("--heat-neutral", "-H", help="Whether the accelerator should be heat neutral.", rich_help_panel="Heating Options")] = False,
     x_symmetry: typing.Annotated[bool, typer.Option("-X", help="Whether to enforce symmetry along the horizontal axis.", rich_help_panel="Symmetry Options")] = False,
     y_symmetry: typing.Annotated[bool, typer.Option("-Y", help="Whether to enforce symmetry along the vertical axis.", rich_help_panel="Symmetry Options")] = False,
-    components_file: typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--components", "-C", help="The path to the file containing a list of components.", rich_help_panel="Component Options")] = None,
-    limits_file: typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--limits", "-L", help="The path to the file containing a list of component limits.", rich_help_panel="Component Options")] = None,
-    timeout: typing.Annotated[typing.Optional[float], typer.Option("--timeout", "-T", help="The maximum time to spend designing the structure in seconds.", rich_help_panel="Designer Options")] = None,
-    output: typing.Annotated[list[pathlib.Path], typer.Option("--output", "-O", help="The path(s) to output the designs to.", rich_help_panel="Output Options")] = [],
+    symmetry: SymmetryOption = utils.SymmetryMode.MANUAL,
+    keep_searching: KeepSearchingOption = False,
+    components_file: ComponentsFileOption = None,
+    limits_file: LimitsFileOption = None,
+    timeout: TimeoutOption = None,
+    use_cache: UseCacheOption = True,
+    publish: PublishOption = False,
+    precheck: PrecheckOption = True,
+    probe: ProbeOption = None,
+    solutions: SolutionsOption = 1,
+    min_distance: MinDistanceOption = 1,
+    search_workers: SearchWorkersOption = None,
+    seed: SeedOption = None,
+    solver_params: SolverParamsOption = [],
+    progress: ProgressOption = False,
+    hint_file: HintFileOption = None,
+    preview: PreviewOption = utils.PreviewMode.FULL,
+    no_preview: NoPreviewOption = False,
+    output: OutputOption = [],
+    write_every_improvement: WriteEveryImprovementOption = False,
     transparent: typing.Annotated[bool, typer.Option("--transparent", "-t", help="Whether to use transparent blocks in the schematic.", rich_help_panel="Output Options")] = False,
-) -> None:
+    profile_file: ProfileFileOption = None,
+    profile_trace: ProfileTraceOption = None
+) -> cp_model_pb2.CpSolverStatus:
     """Designs a QMD linear accelerator."""
-    limits = utils.load_limits(limits_file)
-    components = utils.load_component_list(components_file)
-    designer = reiuji.designer.qmd.linear.LinearAcceleratorDesigner(
-        length=length,
-        minimum_energy=minimum_energy,
-        maximum_energy=maximum_energy,
-        target_focus=target_focus,
-        charge=charge,
-        beam_strength=beam_strength,
-        initial_focus=initial_focus,
-        scaling_factor=scaling_factor,
-        env_temperature=env_temperature,
-        kappa=kappa,
-        heat_neutral=heat_neutral,
-        z_symmetry=x_symmetry,
-        y_symmetry=y_symmetry,
-        components=components,
-        component_limits=limits
-    )
-    status, design = designer.design(timeout=timeout)
-    utils.print_status(status)
-    if not isinstance(design, type(None)):
-        for x in range(design.shape[0]):
-            for y in range(design.shape[2]):
-                for z in range(design.shape[1]):
-                    rich_short_name = utils.format_text_rich(design[x, z, y].display.short_name, bold=design[x, z, y].display.bold, italic=design[x, z, y].display.italic, color=design[x, z, y].display.color, bg_color=design[x, z, y].display.bg_color)
-                    rich.print(rich_short_name, end=" ")
-                print()
-            print()
-        for path in output:
-            utils.write_design(design, path, schematic_type="accelerator", transparent=transparent)
+    with profiler.profile(profile_file, profile_trace, "qmd linear"):
+        limits = utils.load_limits(limits_file)
+        components = utils.load_component_list(components_file)
+        status, design = run_designer(
+            reiuji.designer.qmd.linear.LinearAcceleratorDesigner,
+            dict(
+                length=length,
+                minimum_energy=minimum_energy,
+                maximum_energy=maximum_energy,
+                target_focus=target_focus,
+                charge=charge,
+                beam_strength=beam_strength,
+                initial_focus=initial_focus,
+                scaling_factor=scaling_factor,
+                env_temperature=env_temperature,
+                kappa=kappa,
+                heat_neutral=heat_neutral,
+                z_symmetry=x_symmetry,
+                y_symmetry=y_symmetry,
+                components=components,
+                component_limits=limits
+            ),
+            timeout=timeout,
+            use_cache=use_cache,
+            precheck=precheck,
+            probe=probe,
+            publish=publish,
+            solutions=solutions,
+            min_distance=min_distance,
+            on_alternative=lambda i, design: utils.write_designs(design, utils.solution_paths(output, i, solutions), schematic_type="accelerator", transparent=transparent),
+            solver_options=solver.SolverOptions(workers=search_workers, seed=seed, params=solver_params),
+            progress=progress,
+            hint=utils.load_design(hint_file) if isinstance(hint_file, pathlib.Path) else None,
+            on_improvement=(lambda design: utils.write_designs(design, utils.solution_paths(output, 1, solutions), schematic_type="accelerator", transparent=transparent)) if write_every_improvement else None,
+            symmetry={"z_symmetry": "-X", "y_symmetry": "-Y"} if symmetry == utils.SymmetryMode.AUTO else None,
+            keep_searching=keep_searching
+        )
+        utils.print_status(status)
+        if not isinstance(design, type(None)):
+            utils.print_design(design, (0, 2, 1), utils.PreviewMode.NONE if no_preview else preview)
+            utils.write_designs(design, utils.solution_paths(output, 1, solutions), schematic_type="accelerator", transparent=transparent)
+        return status
 
 
 @qmd_designer.command("synchrotron")
@@ -156,44 +667,73 @@ def design_qmd_synchrotron(
     kappa: typing.Annotated[float, typer.Option("--kappa", help="The thermal conductivity for the accelerator.", rich_help_panel="Heating Options")] = 0.0025,
     heat_neutral: typing.Annotated[bool, typer.Option("--heat-neutral", "-H", help="Whether the accelerator should be heat neutral.", rich_help_panel="Heating Options")] = False,
     internal_symmetry: typing.Annotated[bool, typer.Option("-S", help="Whether to enforce symmetry along the internal ring.", rich_help_panel="Symmetry Options")] = False,
-    components_file: typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--components", "-C", help="The path to the file containing a list of components.", rich_help_panel="Component Options")] = None,
-    limits_file: typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--limits", "-L", help="The path to the file containing a list of component limits.", rich_help_panel="Component Options")] = None,
-    timeout: typing.Annotated[typing.Optional[float], typer.Option("--timeout", "-T", help="The maximum time to spend designing the structure in seconds.", rich_help_panel="Designer Options")] = None,
-    output: typing.Annotated[list[pathlib.Path], typer.Option("--output", "-O", help="The path(s) to output the designs to.", rich_help_panel="Output Options")] = [],
+    symmetry: SymmetryOption = utils.SymmetryMode.MANUAL,
+    keep_searching: KeepSearchingOption = False,
+    components_file: ComponentsFileOption = None,
+    limits_file: LimitsFileOption = None,
+    timeout: TimeoutOption = None,
+    use_cache: UseCacheOption = True,
+    publish: PublishOption = False,
+    precheck: PrecheckOption = True,
+    probe: ProbeOption = None,
+    solutions: SolutionsOption = 1,
+    min_distance: MinDistanceOption = 1,
+    search_workers: SearchWorkersOption = None,
+    seed: SeedOption = None,
+    solver_params: SolverParamsOption = [],
+    progress: ProgressOption = False,
+    hint_file: HintFileOption = None,
+    preview: PreviewOption = utils.PreviewMode.FULL,
+    no_preview: NoPreviewOption = False,
+    output: OutputOption = [],
+    write_every_improvement: WriteEveryImprovementOption = False,
     transparent: typing.Annotated[bool, typer.Option("--transparent", "-t", help="Whether to use transparent blocks in the schematic.", rich_help_panel="Output Options")] = False,
-) -> None:
+    profile_file: ProfileFileOption = None,
+    profile_trace: ProfileTraceOption = None
+) -> cp_model_pb2.CpSolverStatus:
     """Designs a QMD synchrotron."""
-    limits = utils.load_limits(limits_file)
-    components = utils.load_component_list(components_file)
-    designer = reiuji.designer.qmd.synchrotron.SynchrotronDesigner(
-        side_length=side_length,
-        minimum_energy=minimum_energy,
-        maximum_energy=maximum_energy,
-        target_focus=target_focus,
-        charge=charge,
-        mass=mass,
-        beam_strength=beam_strength,
-        initial_focus=initial_focus,
-        scaling_factor=scaling_factor,
-        env_temperature=env_temperature,
-        kappa=kappa,
-        heat_neutral=heat_neutral,
-        internal_symmetry=internal_symmetry,
-        components=components,
-        component_limits=limits
-    )
-    status, design = designer.design(timeout=timeout)
-    utils.print_status(status)
-    if not isinstance(design, type(None)):
-        for y in range(design.shape[2]):
-            for x in range(design.shape[0]):
-                for z in range(design.shape[1]):
-                    rich_short_name = utils.format_text_rich(design[x, z, y].display.short_name, bold=design[x, z, y].display.bold, italic=design[x, z, y].display.italic, color=design[x, z, y].display.color, bg_color=design[x, z, y].display.bg_color)
-                    rich.print(rich_short_name, end=" ")
-                print()
-            print()
-        for path in output:
-            utils.write_design(design, path, schematic_type="accelerator", transparent=transparent)
+    with profiler.profile(profile_file, profile_trace, "qmd synchrotron"):
+        limits = utils.load_limits(limits_file)
+        components = utils.load_component_list(components_file)
+        status, design = run_designer(
+            reiuji.designer.qmd.synchrotron.SynchrotronDesigner,
+            dict(
+                side_length=side_length,
+                minimum_energy=minimum_energy,
+                maximum_energy=maximum_energy,
+                target_focus=target_focus,
+                charge=charge,
+                mass=mass,
+                beam_strength=beam_strength,
+                initial_focus=initial_focus,
+                scaling_factor=scaling_factor,
+                env_temperature=env_temperature,
+                kappa=kappa,
+                heat_neutral=heat_neutral,
+                internal_symmetry=internal_symmetry,
+                components=components,
+                component_limits=limits
+            ),
+            timeout=timeout,
+            use_cache=use_cache,
+            precheck=precheck,
+            probe=probe,
+            publish=publish,
+            solutions=solutions,
+            min_distance=min_distance,
+            on_alternative=lambda i, design: utils.write_designs(design, utils.solution_paths(output, i, solutions), schematic_type="accelerator", transparent=transparent),
+            solver_options=solver.SolverOptions(workers=search_workers, seed=seed, params=solver_params),
+            progress=progress,
+            hint=utils.load_design(hint_file) if isinstance(hint_file, pathlib.Path) else None,
+            on_improvement=(lambda design: utils.write_designs(design, utils.solution_paths(output, 1, solutions), schematic_type="accelerator", transparent=transparent)) if write_every_improvement else None,
+            symmetry={"internal_symmetry": "-S"} if symmetry == utils.SymmetryMode.AUTO else None,
+            keep_searching=keep_searching
+        )
+        utils.print_status(status)
+        if not isinstance(design, type(None)):
+            utils.print_design(design, (2, 0, 1), utils.PreviewMode.NONE if no_preview else preview)
+            utils.write_designs(design, utils.solution_paths(output, 1, solutions), schematic_type="accelerator", transparent=transparent)
+        return status
 
 
 @qmd_designer.command("decelerator")
@@ -211,44 +751,73 @@ def design_qmd_decelerator(
     kappa: typing.Annotated[float, typer.Option("--kappa", help="The thermal conductivity for the decelerator.", rich_help_panel="Heating Options")] = 0.0025,
     heat_neutral: typing.Annotated[bool, typer.Option("--heat-neutral", "-H", help="Whether the decelerator should be heat neutral.", rich_help_panel="Heating Options")] = False,
     internal_symmetry: typing.Annotated[bool, typer.Option("-S", help="Whether to enforce symmetry along the internal ring.", rich_help_panel="Symmetry Options")] = False,
-    components_file: typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--components", "-C", help="The path to the file containing a list of components.", rich_help_panel="Component Options")] = None,
-    limits_file: typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--limits", "-L", help="The path to the file containing a list of component limits.", rich_help_panel="Component Options")] = None,
-    timeout: typing.Annotated[typing.Optional[float], typer.Option("--timeout", "-T", help="The maximum time to spend designing the structure in seconds.", rich_help_panel="Designer Options")] = None,
-    output: typing.Annotated[list[pathlib.Path], typer.Option("--output", "-O", help="The path(s) to output the designs to.", rich_help_panel="Output Options")] = [],
+    symmetry: SymmetryOption = utils.SymmetryMode.MANUAL,
+    keep_searching: KeepSearchingOption = False,
+    components_file: ComponentsFileOption = None,
+    limits_file: LimitsFileOption = None,
+    timeout: TimeoutOption = None,
+    use_cache: UseCacheOption = True,
+    publish: PublishOption = False,
+    precheck: PrecheckOption = True,
+    probe: ProbeOption = None,
+    solutions: SolutionsOption = 1,
+    min_distance: MinDistanceOption = 1,
+    search_workers: SearchWorkersOption = None,
+    seed: SeedOption = None,
+    solver_params: SolverParamsOption = [],
+    progress: ProgressOption = False,
+    hint_file: HintFileOption = None,
+    preview: PreviewOption = utils.PreviewMode.FULL,
+    no_preview: NoPreviewOption = False,
+    output: OutputOption = [],
+    write_every_improvement: WriteEveryImprovementOption = False,
     transparent: typing.Annotated[bool, typer.Option("--transparent", "-t", help="Whether to use transparent blocks in the schematic.", rich_help_panel="Output Options")] = False,
-) -> None:
+    profile_file: ProfileFileOption = None,
+    profile_trace: ProfileTraceOption = None
+) -> cp_model_pb2.CpSolverStatus:
     """Designs a QMD decelerator."""
-    limits = utils.load_limits(limits_file)
-    components = utils.load_component_list(components_file)
-    designer = reiuji.designer.qmd.decelerator.DeceleratorDesigner(
-        side_length=side_length,
-        minimum_energy=minimum_energy,
-        maximum_energy=maximum_energy,
-        target_focus=target_focus,
-        charge=charge,
-        mass=mass,
-        beam_strength=beam_strength,
-        initial_focus=initial_focus,
-        scaling_factor=scaling_factor,
-        env_temperature=env_temperature,
-        kappa=kappa,
-        heat_neutral=heat_neutral,
-        internal_symmetry=internal_symmetry,
-        components=components,
-        component_limits=limits
-    )
-    status, design = designer.design(timeout=timeout)
-    utils.print_status(status)
-    if not isinstance(design, type(None)):
-        for y in range(design.shape[2]):
-            for x in range(design.shape[0]):
-                for z in range(design.shape[1]):
-                    rich_short_name = utils.format_text_rich(design[x, z, y].display.short_name, bold=design[x, z, y].display.bold, italic=design[x, z, y].display.italic, color=design[x, z, y].display.color, bg_color=design[x, z, y].display.bg_color)
-                    rich.print(rich_short_name, end=" ")
-                print()
-            print()
-        for path in output:
-            utils.write_design(design, path, schematic_type="accelerator", transparent=transparent)
+    with profiler.profile(profile_file, profile_trace, "qmd decelerator"):
+        limits = utils.load_limits(limits_file)
+        components = utils.load_component_list(components_file)
+        status, design = run_designer(
+            reiuji.designer.qmd.decelerator.DeceleratorDesigner,
+            dict(
+                side_length=side_length,
+                minimum_energy=minimum_energy,
+                maximum_energy=maximum_energy,
+                target_focus=target_focus,
+                charge=charge,
+                mass=mass,
+                beam_strength=beam_strength,
+                initial_focus=initial_focus,
+                scaling_factor=scaling_factor,
+                env_temperature=env_temperature,
+                kappa=kappa,
+                heat_neutral=heat_neutral,
+                internal_symmetry=internal_symmetry,
+                components=components,
+                component_limits=limits
+            ),
+            timeout=timeout,
+            use_cache=use_cache,
+            precheck=precheck,
+            probe=probe,
+            publish=publish,
+            solutions=solutions,
+            min_distance=min_distance,
+            on_alternative=lambda i, design: utils.write_designs(design, utils.solution_paths(output, i, solutions), schematic_type="accelerator", transparent=transparent),
+            solver_options=solver.SolverOptions(workers=search_workers, seed=seed, params=solver_params),
+            progress=progress,
+            hint=utils.load_design(hint_file) if isinstance(hint_file, pathlib.Path) else None,
+            on_improvement=(lambda design: utils.write_designs(design, utils.solution_paths(output, 1, solutions), schematic_type="accelerator", transparent=transparent)) if write_every_improvement else None,
+            symmetry={"internal_symmetry": "-S"} if symmetry == utils.SymmetryMode.AUTO else None,
+            keep_searching=keep_searching
+        )
+        utils.print_status(status)
+        if not isinstance(design, type(None)):
+            utils.print_design(design, (2, 0, 1), utils.PreviewMode.NONE if no_preview else preview)
+            utils.write_designs(design, utils.solution_paths(output, 1, solutions), schematic_type="accelerator", transparent=transparent)
+        return status
 
 
 @qmd_designer.command("nucleosynthesis")
@@ -256,32 +825,157 @@ def design_qmd_nucleosynthesis(
     recipe_heat: typing.Annotated[int, typer.Option("--recipe-heat", "-h", help="The heat of the recipe in H/t.", rich_help_panel="Recipe Options")],
     x_symmetry: typing.Annotated[bool, typer.Option("-X", help="Whether to enforce symmetry along the X axis.", rich_help_panel="Symmetry Options")] = False,
     z_symmetry: typing.Annotated[bool, typer.Option("-Z", help="Whether to enforce symmetry along the Z axis.", rich_help_panel="Symmetry Options")] = False,
-    components_file: typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--components", "-C", help="The path to the file containing a list of components.", rich_help_panel="Component Options")] = None,
-    limits_file: typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--limits", "-L", help="The path to the file containing a list of component limits.", rich_help_panel="Component Options")] = None,
-    timeout: typing.Annotated[typing.Optional[float], typer.Option("--timeout", "-T", help="The maximum time to spend designing the structure in seconds.", rich_help_panel="Designer Options")] = None,
-    output: typing.Annotated[list[pathlib.Path], typer.Option("--output", "-O", help="The path(s) to output the designs to.", rich_help_panel="Output Options")] = [],
+    symmetry: SymmetryOption = utils.SymmetryMode.MANUAL,
+    keep_searching: KeepSearchingOption = False,
+    components_file: ComponentsFileOption = None,
+    limits_file: LimitsFileOption = None,
+    timeout: TimeoutOption = None,
+    use_cache: UseCacheOption = True,
+    publish: PublishOption = False,
+    precheck: PrecheckOption = True,
+    probe: ProbeOption = None,
+    solutions: SolutionsOption = 1,
+    min_distance: MinDistanceOption = 1,
+    search_workers: SearchWorkersOption = None,
+    seed: SeedOption = None,
+    solver_params: SolverParamsOption = [],
+    progress: ProgressOption = False,
+    hint_file: HintFileOption = None,
+    preview: PreviewOption = utils.PreviewMode.FULL,
+    no_preview: NoPreviewOption = False,
+    output: OutputOption = [],
+    write_every_improvement: WriteEveryImprovementOption = False,
     transparent: typing.Annotated[bool, typer.Option("--transparent", "-t", help="Whether to use transparent blocks in the schematic.", rich_help_panel="Output Options")] = False,
-    facing: typing.Annotated[utils.Facing, typer.Option("--facing", "-f", help="The direction the structure should face.", rich_help_panel="Output Options")] = utils.Facing.X
-) -> None:
+    facing: typing.Annotated[utils.Facing, typer.Option("--facing", "-f", help="The direction the structure should face.", rich_help_panel="Output Options")] = utils.Facing.X,
+    profile_file: ProfileFileOption = None,
+    profile_trace: ProfileTraceOption = None
+) -> cp_model_pb2.CpSolverStatus:
     """Designs a QMD nucleosynthesis chamber."""
-    limits = utils.load_limits(limits_file)
-    components = utils.load_component_list(components_file)
-    designer = reiuji.designer.qmd.nucleosynthesis.NucleosynthesisDesigner(
-        recipe_heat=recipe_heat,
-        x_symmetry=x_symmetry,
-        z_symmetry=z_symmetry,
-        components=components,
-        component_limits=limits
-    )
-    status, design = designer.design(timeout=timeout)
-    utils.print_status(status)
-    if not isinstance(design, type(None)):
-        for y in range(design.shape[2]):
-            for x in range(design.shape[0]):
-                for z in range(design.shape[1]):
-                    rich_short_name = utils.format_text_rich(design[x, z, y].display.short_name, bold=design[x, z, y].display.bold, italic=design[x, z, y].display.italic, color=design[x, z, y].display.color, bg_color=design[x, z, y].display.bg_color)
-                    rich.print(rich_short_name, end=" ")
-                print()
-            print()
-        for path in output:
-            utils.write_design(design, path, schematic_type="nucleosynthesis", transparent=transparent, facing=facing.value)
+    with profiler.profile(profile_file, profile_trace, "qmd nucleosynthesis"):
+        limits = utils.load_limits(limits_file)
+        components = utils.load_component_list(components_file)
+        status, design = run_designer(
+            reiuji.designer.qmd.nucleosynthesis.NucleosynthesisDesigner,
+            dict(
+                recipe_heat=recipe_heat,
+                x_symmetry=x_symmetry,
+                z_symmetry=z_symmetry,
+                components=components,
+                component_limits=limits
+            ),
+            timeout=timeout,
+            use_cache=use_cache,
+            precheck=precheck,
+            probe=probe,
+            publish=publish,
+            solutions=solutions,
+            min_distance=min_distance,
+            on_alternative=lambda i, design: utils.write_designs(design, utils.solution_paths(output, i, solutions), schematic_type="nucleosynthesis", transparent=transparent, facing=facing.value),
+            solver_options=solver.SolverOptions(workers=search_workers, seed=seed, params=solver_params),
+            progress=progress,
+            hint=utils.load_design(hint_file) if isinstance(hint_file, pathlib.Path) else None,
+            on_improvement=(lambda design: utils.write_designs(design, utils.solution_paths(output, 1, solutions), schematic_type="nucleosynthesis", transparent=transparent, facing=facing.value)) if write_every_improvement else None,
+            symmetry={"x_symmetry": "-X", "z_symmetry": "-Z"} if symmetry == utils.SymmetryMode.AUTO else None,
+            keep_searching=keep_searching
+        )
+        utils.print_status(status)
+        if not isinstance(design, type(None)):
+            utils.print_design(design, (2, 0, 1), utils.PreviewMode.NONE if no_preview else preview)
+            utils.write_designs(design, utils.solution_paths(output, 1, solutions), schematic_type="nucleosynthesis", transparent=transparent, facing=facing.value)
+        return status
+
+
+DESIGN_COMMANDS = {
+    "overhauled turbine-rotor": design_nco_turbine_rotor,
+    "overhauled turbine-dynamo": design_nco_turbine_dynamo,
+    "overhauled turbine": design_nco_turbine,
+    "qmd linear": design_qmd_linear,
+    "qmd synchrotron": design_qmd_synchrotron,
+    "qmd decelerator": design_qmd_decelerator,
+    "qmd nucleosynthesis": design_qmd_nucleosynthesis
+}
+
+
+@designer_app.command("batch")
+def design_batch(
+    manifest_file: typing.Annotated[pathlib.Path, typer.Argument(help="The path to a JSON or JSONL manifest of designer jobs.")],
+    workers: typing.Annotated[typing.Optional[int], typer.Option("--workers", "-j", help="The number of worker processes. Defaults to the number of CPUs.", rich_help_panel="Batch Options")] = None,
+    timeout: typing.Annotated[typing.Optional[float], typer.Option("--timeout", "-T", help="The default maximum time to spend on each job in seconds.", rich_help_panel="Designer Options")] = None,
+    results_file: typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--results", "-R", help="The path to a JSONL file to append results to as they finish.", rich_help_panel="Output Options")] = None
+) -> None:
+    """Runs many designer jobs from a manifest in parallel.
+
+    Each manifest entry has a `kind` (e.g. `qmd synchrotron` or `convert qmd accelerator`), an `args` object using the command's parameter names, and an optional `name`. The command exits with code 1 if any job fails with an error.
+    """
+    manifest = jobs.load_manifest(manifest_file)
+    available = jobs.commands()
+    for job in manifest:
+        if job.kind not in available:
+            rich.print(f"[red][bold]ERROR:[/bold] Unknown command in job {rich.markup.escape(str(job.name))}: {rich.markup.escape(job.kind)}[/red]")
+            raise typer.Exit(code=1)
+    failed = 0
+    errors = 0
+    for result in jobs.run_jobs(manifest, workers=workers, timeout=timeout):
+        if result.status in ("OPTIMAL", "FEASIBLE", "DONE"):
+            color = "green"
+        else:
+            color = "red"
+            failed += 1
+            errors += result.status == "ERROR"
+        rich.print(f"[{color}][bold]{rich.markup.escape(result.name)}:[/bold] {result.status} ({rich.markup.escape(result.kind)}, {result.wall_time:.2f}s)[/{color}]", rich.markup.escape(" ".join(result.outputs)))
+        if not isinstance(result.error, type(None)):
+            rich.print(f"[red]{rich.markup.escape(result.error)}[/red]")
+        if isinstance(results_file, pathlib.Path):
+            with results_file.open("a") as file:
+                file.write(result.model_dump_json() + "\n")
+    rich.print(f"[bold]{len(manifest) - failed}/{len(manifest)}[/bold] jobs produced a design.")
+    if errors > 0:
+        raise typer.Exit(code=1)
+
+
+@designer_app.command("sweep", context_settings={"allow_extra_args": True, "ignore_unknown_options": True})
+def design_sweep(
+    ctx: typer.Context,
+    workers: typing.Annotated[typing.Optional[int], typer.Option("--workers", "-j", help="The number of worker processes. Defaults to the number of CPUs.", rich_help_panel="Batch Options")] = None,
+    summary_file: typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--summary", help="The path to write a JSON or CSV summary of every point to.", rich_help_panel="Output Options")] = None
+) -> None:
+    """Solves a designer over the Cartesian product of parameter ranges.
+
+    The designer is named first (e.g. `qmd synchrotron`), followed by its usual arguments and options. Numeric values accept `a..b`, `a:b:step` and `a,b,c`; output paths may use placeholders such as `{side_length}`.
+    """
+    tokens = list(ctx.args)
+    kind = next((kind for kind in DESIGN_COMMANDS if tokens[:len(kind.split())] == kind.split()), None)
+    if isinstance(kind, type(None)):
+        rich.print(f"[red][bold]ERROR:[/bold] Expected one of: {", ".join(DESIGN_COMMANDS)}[/red]")
+        raise typer.Exit(code=1)
+    try:
+        points = jobs.sweep_jobs(kind, DESIGN_COMMANDS[kind], tokens[len(kind.split()):])
+    except ValueError as e:
+        rich.print(f"[red][bold]ERROR:[/bold] {rich.markup.escape(str(e))}[/red]")
+        raise typer.Exit(code=1)
+    rich.print(f"Sweeping [bold]{len(points)}[/bold] point(s) of {kind}.")
+    results = []
+    for result in jobs.run_jobs(points, workers=workers):
+        results.append(result)
+        color = "green" if result.status in ("OPTIMAL", "FEASIBLE") else "red"
+        objective = "-" if isinstance(result.objective, type(None)) else f"{result.objective:g}"
+        rich.print(f"[{color}][bold]{rich.markup.escape(result.name)}:[/bold] {result.status} (objective {objective}, {result.wall_time:.2f}s)[/{color}]")
+        if not isinstance(result.error, type(None)):
+            rich.print(f"[red]{rich.markup.escape(result.error)}[/red]")
+    order = {job.name: i for i, job in enumerate(points)}
+    results.sort(key=lambda result: order[result.name])
+    table = rich.table.Table(title="Sweep Summary")
+    table.add_column("Point")
+    table.add_column("Status")
+    table.add_column("Objective")
+    table.add_column("Solve Time")
+    for result in results:
+        table.add_row(
+            rich.markup.escape(result.name),
+            result.status,
+            "-" if isinstance(result.objective, type(None)) else f"{result.objective:g}",
+            "-" if isinstance(result.solve_time, type(None)) else f"{result.solve_time:.2f}s"
+        )
+    rich.print(table)
+    if isinstance(summary_file, pathlib.Path):
+        jobs.write_summary(results, summary_file)
@@ -0,0 +1,169 @@
+"""Cheap checks that reject hopeless designer jobs before the solver runs."""
+
+import math
+import typing
+
+import reiuji
+from ortools.sat.python import cp_model
+
+
+SIZE_PARAMS = ("length", "side_length")
+# The constraints of each designer that fix which component types may go in each cell, independently of the other cells.
+_constraints = reiuji.designer.base.constraints
+_synchrotron = reiuji.designer.qmd.synchrotron.constraints
+STRUCTURE: dict[str, typing.Callable[[typing.Any], list[typing.Any]]] = {
+    "TurbineDynamoDesigner": lambda designer: [
+        _constraints.CasingConstraint(),
+        reiuji.designer.overhauled.turbine_dynamo.constraints.CenteredBearingConstraint(designer.shaft_width)
+    ],
+    "LinearAcceleratorDesigner": lambda designer: [_constraints.CasingConstraint(), reiuji.designer.qmd.linear.constraints.BeamConstraint()],
+    "SynchrotronDesigner": lambda designer: [_synchrotron.CasingConstraint(), _synchrotron.BeamConstraint(), _synchrotron.AirConstraint()],
+    "DeceleratorDesigner": lambda designer: [_synchrotron.CasingConstraint(), _synchrotron.BeamConstraint(), _synchrotron.AirConstraint()],
+    "NucleosynthesisDesigner": lambda designer: [_constraints.CasingConstraint(), reiuji.designer.qmd.nucleosynthesis.constraints.StructureConstraint()]
+}
+
+
+def check_sizes(params: dict[str, typing.Any]) -> list[str]:
+    errors = []
+    for name in SIZE_PARAMS:
+        if name in params and params[name] < 1:
+            errors.append(f"The {name.replace('_', ' ')} must be at least 1, not {params[name]}.")
+    if "shaft_width" in params and "side_length" in params:
+        shaft_width, side_length = params["shaft_width"], params["side_length"]
+        if shaft_width < 1 or shaft_width >= side_length:
+            errors.append(f"The shaft width must be between 1 and {side_length - 1}, not {shaft_width}.")
+        elif (side_length - shaft_width) % 2 != 0:
+            errors.append(f"A shaft of width {shaft_width} cannot be centered in a dynamo of side length {side_length}; both must be odd or both even.")
+    return errors
+
+
+def check_energies(params: dict[str, typing.Any]) -> list[str]:
+    errors = []
+    minimum, maximum = params.get("minimum_energy"), params.get("maximum_energy")
+    if not isinstance(minimum, type(None)) and minimum < 0:
+        errors.append(f"The minimum energy must not be negative, not {minimum}.")
+    if not isinstance(minimum, type(None)) and not isinstance(maximum, type(None)) and minimum > maximum:
+        errors.append(f"The minimum energy ({minimum}) is above the maximum energy ({maximum}).")
+    return errors
+
+
+def check_limits(limits: dict[str, typing.Sequence[typing.Optional[int]]], components: typing.Optional[list[typing.Any]], cells: typing.Optional[int]) -> list[str]:
+    """Checks component limits against the component list and the number of cells.
+
+    Limits are `(minimum, maximum)` pairs keyed by a component's full name, as Reiuji resolves them.
+    As in Reiuji, a null minimum means 0 and a null maximum means unlimited.
+    Every cell holds exactly one component, so the minimums must fit in the cells and the maximums must be able to fill them.
+    """
+    errors = []
+    bounds = {}
+    for name, (minimum, maximum) in limits.items():
+        minimum = 0 if isinstance(minimum, type(None)) else minimum
+        if minimum < 0:
+            errors.append(f"The minimum count of {name} must not be negative, not {minimum}.")
+        if not isinstance(maximum, type(None)) and maximum < 0:
+            errors.append(f"The maximum count of {name} must not be negative, not {maximum}.")
+        elif not isinstance(maximum, type(None)) and minimum > maximum:
+            errors.append(f"The minimum count of {name} ({minimum}) is above its maximum ({maximum}).")
+        bounds[name] = (max(minimum, 0), maximum)
+    if isinstance(components, type(None)):
+        return errors
+    names = {comp.full_name for comp in components}
+    for name in bounds:
+        if name not in names:
+            errors.append(f"The limits mention {name}, which is not the full name of any component in the component list.")
+    if isinstance(cells, type(None)):
+        return errors
+    required = sum(minimum for minimum, _ in bounds.values())
+    if required > cells:
+        errors.append(f"The limits require at least {required} components, but there are only {cells} cells.")
+    capacity = 0
+    for comp in components:
+        maximum = bounds.get(comp.full_name, (0, None))[1]
+        capacity += math.inf if isinstance(maximum, type(None)) else max(maximum, 0)
+    if capacity < cells:
+        errors.append(f"The limits allow at most {capacity} components, but all {cells} cells must be filled.")
+    return errors
+
+
+def _table_var(constraint: typing.Any) -> typing.Optional[int]:
+    """Returns the variable of a single-variable table constraint, or None for any other constraint."""
+    if constraint.WhichOneof("constraint") != "table" or len(constraint.enforcement_literal) > 0:
+        return None
+    table = constraint.table
+    if len(table.vars) == 1:
+        return table.vars[0]
+    exprs = getattr(table, "exprs", [])
+    if len(exprs) == 1 and len(exprs[0].vars) == 1 and exprs[0].coeffs[0] == 1 and exprs[0].offset == 0:
+        return exprs[0].vars[0]
+    return None
+
+
+def required_types(designer: typing.Any) -> typing.Optional[dict[typing.Optional[str], int]]:
+    """Counts the cells that the designer's structure forces to hold a component of a single type, keyed by that type.
+
+    Cells that no component can fill are counted under None.
+    Only the structural constraints are added to a scratch model, so this stays cheap even for designs whose full model is slow to build.
+    """
+    factory = STRUCTURE.get(type(designer).__name__)
+    components = getattr(designer, "components", None)
+    shape = getattr(designer, "seq_shape", None)
+    if isinstance(factory, type(None)) or isinstance(components, type(None)) or isinstance(shape, type(None)):
+        return None
+    model = cp_model.CpModel()
+    cells = [model.NewIntVar(0, len(components) - 1, "") for _ in range(math.prod(shape))]
+    seq = reiuji.core.multi_sequence.MultiSequence(cells, shape)
+    for constraint in factory(designer):
+        constraint.to_model(model, seq, components)
+    domains = [set(range(len(components))) for _ in cells]
+    for constraint in model.Proto().constraints:
+        var = _table_var(constraint)
+        if isinstance(var, type(None)) or var >= len(cells):
+            continue
+        values = set(constraint.table.values)
+        domains[var] = domains[var] - values if constraint.table.negated else domains[var] & values
+    counts: dict[typing.Optional[str], int] = {}
+    for domain in domains:
+        types = {components[i].type for i in domain}
+        if len(types) <= 1:
+            kind = next(iter(types), None)
+            counts[kind] = counts.get(kind, 0) + 1
+    return counts
+
+
+def check_types(limits: dict[str, typing.Sequence[typing.Optional[int]]], components: list[typing.Any], required: dict[typing.Optional[str], int]) -> list[str]:
+    """Checks that the limits leave enough components of each type for the cells the structure reserves for that type."""
+    errors = []
+    if required.get(None, 0) > 0:
+        errors.append(f"No component in the component list can fill {required[None]} of the cells the structure requires.")
+    for kind, count in required.items():
+        if isinstance(kind, type(None)):
+            continue
+        capacity = 0
+        for comp in components:
+            if comp.type != kind:
+                continue
+            maximum = limits.get(comp.full_name, (None, None))[1]
+            capacity += math.inf if isinstance(maximum, type(None)) else max(maximum, 0)
+        if capacity < count:
+            errors.append(f"The structure needs {count} {kind} cells, but the limits allow at most {capacity} {kind} components.")
+    return errors
+
+
+def check(params: dict[str, typing.Any], designer: typing.Any) -> list[str]:
+    """Finds the reasons a designer job cannot have a solution from its parameters, component list and limits alone.
+
+    Any of the returned errors makes the job infeasible.
+    """
+    shape = getattr(designer, "seq_shape", None) or getattr(designer, "shape", None)
+    limits = params.get("component_limits") or {}
+    errors = check_sizes(params) + check_energies(params) + check_limits(
+        limits,
+        getattr(designer, "components", None),
+        None if isinstance(shape, type(None)) else math.prod(shape)
+    )
+    if len(errors) > 0:
+        return errors
+    required = required_types(designer)
+    if not isinstance(required, type(None)):
+        errors += check_types(limits, designer.components, required)
+    return errors
@@ -0,0 +1,334 @@
+"""Helpers for running designer jobs on a process pool."""
+
+import concurrent.futures
+import contextlib
+import csv
+import io
+import itertools
+import json
+import os
+import pathlib
+import re
+import string
+import threading
+import time
+import traceback
+import typing
+
+import pydantic
+import typer
+
+
+class Job(pydantic.BaseModel):
+    """A single designer invocation described by a manifest entry."""
+    kind: str
+    args: dict[str, typing.Any] = {}
+    name: typing.Optional[str] = None
+
+
+class JobResult(pydantic.BaseModel):
+    """The outcome of a single designer job."""
+    name: str
+    kind: str
+    status: str
+    wall_time: float
+    objective: typing.Optional[float] = None
+    solve_time: typing.Optional[float] = None
+    outputs: list[str] = []
+    error: typing.Optional[str] = None
+
+
+def load_manifest(path: pathlib.Path) -> list[Job]:
+    """Loads a list of jobs from a JSON or JSONL manifest."""
+    with path.open("r") as file:
+        text = file.read()
+    if path.suffix == ".jsonl":
+        entries = [json.loads(line) for line in text.splitlines() if line.strip()]
+    else:
+        entries = json.loads(text)
+        if isinstance(entries, dict):
+            entries = entries.get("jobs", [])
+    jobs = [Job.model_validate(entry) for entry in entries]
+    for i, job in enumerate(jobs):
+        if isinstance(job.name, type(None)):
+            job.name = f"{i}"
+    return jobs
+
+
+def coerce_args(func: typing.Callable, args: dict[str, typing.Any]) -> dict[str, typing.Any]:
+    """Validates manifest arguments against the parameter types of a command function."""
+    hints = typing.get_type_hints(func)
+    coerced = {}
+    for key, value in args.items():
+        key = key.replace("-", "_")
+        if key not in hints:
+            raise ValueError(f"Unknown argument for {func.__name__}: {key}")
+        coerced[key] = pydantic.TypeAdapter(hints[key]).validate_python(value)
+    return coerced
+
+
+def cli_names(func: typing.Callable) -> dict[str, tuple[str, typing.Any]]:
+    """Maps the command line names of a command's parameters to the parameter name and, for flags, the implied value."""
+    names = {}
+    for param, hint in typing.get_type_hints(func, include_extras=True).items():
+        if param == "return":
+            continue
+        names[f"--{param.replace('_', '-')}"] = (param, None)
+        for info in getattr(hint, "__metadata__", ()):
+            if not isinstance(info, typer.models.OptionInfo):
+                continue
+            decls = list(info.param_decls)
+            if isinstance(info.default, str) and info.default.startswith("-"):
+                decls.insert(0, info.default)
+            for decl in decls:
+                if "/" in decl:
+                    on, off = decl.split("/")
+                    names[on.strip()] = (param, True)
+                    names[off.strip()] = (param, False)
+                elif typing.get_type_hints(func)[param] is bool:
+                    names[decl] = (param, True)
+                else:
+                    names[decl] = (param, None)
+    return names
+
+
+def parse_values(text: str, hint: typing.Any) -> list[typing.Any]:
+    """Expands a sweep specification into a list of values.
+
+    Numbers accept `a..b` (inclusive integer range), `a:b:step` (inclusive stepped range) and `a,b,c` (explicit list).
+    Other types accept explicit lists only, and paths are never expanded.
+    """
+    if hint in (int, float, typing.Optional[int], typing.Optional[float]):
+        values = []
+        for part in text.split(","):
+            if ".." in part:
+                lo, hi = part.split("..")
+                values.extend(range(int(lo), int(hi) + 1))
+            elif ":" in part:
+                lo, hi, *rest = part.split(":")
+                number = float if any("." in item or "e" in item.lower() for item in (lo, hi, *rest)) else int
+                lo, hi, step = number(lo), number(hi), number(rest[0]) if len(rest) > 0 else number(1)
+                if step <= 0:
+                    raise ValueError(f"Step must be positive: {part}")
+                count = int((hi - lo) / step + 1e-9) + 1
+                values.extend(round(lo + i * step, 10) for i in range(count))
+            else:
+                values.append(part)
+        return values
+    if hint in (pathlib.Path, typing.Optional[pathlib.Path], list[pathlib.Path]):
+        return [text]
+    return text.split(",")
+
+
+def check_placeholders(template: str, params: typing.Iterable[str]) -> None:
+    """Raises `ValueError` if a template uses a placeholder other than the given parameters or is malformed."""
+    try:
+        fields = [field for _, field, _, _ in string.Formatter().parse(template) if not isinstance(field, type(None))]
+    except ValueError as e:
+        raise ValueError(f"Malformed placeholders in {template}: {e}") from None
+    for field in fields:
+        name = re.split(r"[.\[]", field, maxsplit=1)[0]
+        if name not in params:
+            raise ValueError(f"Unknown placeholder {{{field}}} in {template}; expected one of: {", ".join(f"{{{param}}}" for param in params) or "no placeholders, since no parameters are set"}")
+
+
+def sweep_jobs(kind: str, func: typing.Callable, tokens: list[str]) -> list[Job]:
+    """Builds one job per point of the Cartesian product of the swept parameters."""
+    names = cli_names(func)
+    hints = typing.get_type_hints(func)
+    positional = [param for param, hint in typing.get_type_hints(func, include_extras=True).items() if any(isinstance(info, typer.models.ArgumentInfo) for info in getattr(hint, "__metadata__", ()))]
+    specs: dict[str, typing.Any] = {}
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        i += 1
+        if token.startswith("-") and not token[1:2].isdigit():
+            name, _, value = token.partition("=")
+            if name not in names:
+                raise ValueError(f"Unknown option for {kind}: {name}")
+            param, implied = names[name]
+            if value == "":
+                if not isinstance(implied, type(None)):
+                    value = str(implied).lower()
+                elif i < len(tokens):
+                    value = tokens[i]
+                    i += 1
+                else:
+                    raise ValueError(f"Missing value for {name}")
+        else:
+            if len(positional) == 0:
+                raise ValueError(f"Unexpected argument: {token}")
+            param, value = positional.pop(0), token
+        if typing.get_origin(hints[param]) is list:
+            specs.setdefault(param, []).append(value)
+        else:
+            specs[param] = parse_values(value, hints[param])
+    swept = {param: values for param, values in specs.items() if typing.get_origin(hints[param]) is not list}
+    for param, values in specs.items():
+        if typing.get_origin(hints[param]) is list:
+            for value in values:
+                check_placeholders(value, swept)
+    points = [dict(zip(swept, combo)) for combo in itertools.product(*swept.values())]
+    multi = [param for param, values in swept.items() if len(values) > 1]
+    jobs = []
+    outputs = set()
+    for point in points:
+        args = dict(point)
+        for param, values in specs.items():
+            if typing.get_origin(hints[param]) is list:
+                args[param] = [value.format(**point) for value in values]
+        for path in args.get("output", []):
+            if path in outputs:
+                raise ValueError(f"Several points write to {path}; use placeholders such as {{side_length}} in output paths.")
+            outputs.add(path)
+        jobs.append(Job(kind=kind, args=args, name=",".join(f"{param}={point[param]}" for param in multi) or kind))
+    return jobs
+
+
+def write_summary(results: list[JobResult], path: pathlib.Path) -> None:
+    """Writes a table of job results as JSON or CSV."""
+    if path.suffix == ".csv":
+        with path.open("w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=list(JobResult.model_fields))
+            writer.writeheader()
+            for result in results:
+                row = result.model_dump()
+                row["outputs"] = ";".join(row["outputs"])
+                writer.writerow(row)
+    else:
+        with path.open("w") as file:
+            file.write(pydantic.TypeAdapter(list[JobResult]).dump_json(results, indent=4).decode("utf-8"))
+
+
+def commands() -> dict[str, typing.Callable]:
+    """Returns every command that can run as a job, keyed by kind."""
+    from . import designer
+    from . import converter
+
+    return designer.DESIGN_COMMANDS | {f"convert {kind}": command for kind, command in converter.CONVERT_COMMANDS.items()}
+
+
+def warm_up() -> None:
+    """Imports the command modules so that a worker process is ready before its first job."""
+    commands()
+
+
+def file_signature(path: pathlib.Path) -> typing.Optional[tuple[int, int, int]]:
+    """Returns what changes when a file is written, or None if it does not exist."""
+    try:
+        info = path.stat()
+    except OSError:
+        return None
+    return info.st_ino, info.st_mtime_ns, info.st_size
+
+
+def run_job(
+        job: Job,
+        timeout: typing.Optional[float] = None,
+        search_workers: typing.Optional[int] = None,
+        quiet: bool = True,
+        session: typing.Any = None
+    ) -> JobResult:
+    """Runs a single job and reports its outcome.
+
+    Solves are recorded in `session` if one is given, which lets another thread stop them.
+    """
+    from . import solver
+    from . import utils
+    from ortools.sat import cp_model_pb2
+
+    start = time.perf_counter()
+    try:
+        available = commands()
+        if job.kind not in available:
+            raise ValueError(f"Unknown command: {job.kind}")
+        command = available[job.kind]
+        params = typing.get_type_hints(command)
+        args = coerce_args(command, job.args)
+        if "timeout" in params and "timeout" not in args and not isinstance(timeout, type(None)):
+            args["timeout"] = timeout
+        if "search_workers" in params and "search_workers" not in args and not isinstance(search_workers, type(None)):
+            args["search_workers"] = search_workers
+        if "preview" in params and "preview" not in args and quiet:
+            args["preview"] = utils.PreviewMode.NONE
+        solutions = args.get("solutions", 1)
+        if solutions > 1:
+            paths = [path for i in range(1, solutions + 1) for path in utils.solution_paths(args.get("output", []), i, solutions)]
+        else:
+            paths = list(args.get("output", []))
+        before = {path: file_signature(path) for path in paths}
+        with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext(), solver.session(session) as session:
+            status = command(**args)
+        # Nothing is written for jobs without a design, and files left over from earlier runs are not this job's outputs.
+        after = {path: file_signature(path) for path in paths}
+        outputs = [str(path) for path in paths if not isinstance(after[path], type(None)) and after[path] != before[path]]
+        return JobResult(
+            name=job.name,
+            kind=job.kind,
+            status="DONE" if isinstance(status, type(None)) else cp_model_pb2.CpSolverStatus.Name(status),
+            wall_time=time.perf_counter() - start,
+            objective=session.record.objective,
+            solve_time=session.record.wall_time if session.record.solves > 0 else None,
+            outputs=outputs
+        )
+    except Exception as e:
+        return JobResult(
+            name=job.name,
+            kind=job.kind,
+            status="ERROR",
+            wall_time=time.perf_counter() - start,
+            outputs=[],
+            error="".join(traceback.format_exception_only(e)).strip()
+        )
+
+
+def run_cancellable(
+        job: Job,
+        key: str,
+        started: typing.MutableMapping[str, float],
+        cancelled: typing.Mapping[str, bool],
+        timeout: typing.Optional[float] = None,
+        search_workers: typing.Optional[int] = None
+    ) -> JobResult:
+    """Runs a job in a worker process, recording its start time in `started` and stopping it once `key` appears in `cancelled`."""
+    from . import solver
+
+    started[key] = time.time()
+    if key in cancelled:
+        return JobResult(name=job.name, kind=job.kind, status="CANCELLED", wall_time=0.0)
+    session = solver.Session()
+    done = threading.Event()
+
+    def watch() -> None:
+        while not done.wait(0.2):
+            if key in cancelled:
+                session.stop()
+                return
+
+    watcher = threading.Thread(target=watch, daemon=True)
+    watcher.start()
+    try:
+        result = run_job(job, timeout, search_workers, session=session)
+    finally:
+        done.set()
+    if session.stopped:
+        result.status = "CANCELLED"
+    return result
+
+
+def run_jobs(jobs: list[Job], workers: typing.Optional[int] = None, timeout: typing.Optional[float] = None) -> typing.Iterator[JobResult]:
+    """Runs jobs on a process pool, yielding each result as soon as it finishes.
+
+    Unless a job sets its own `search_workers`, the CPUs are split evenly between the processes so that parallel solves do not oversubscribe the machine.
+    """
+    cpus = os.cpu_count() or 1
+    workers = min(workers or cpus, max(len(jobs), 1))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_job, job, timeout, max(cpus // workers, 1)) for job in jobs]
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                yield future.result()
+        except KeyboardInterrupt:
+            for future in futures:
+                future.cancel()
+            raise
@@ -0,0 +1,53 @@
+"""A command group that only imports its subcommands when they are used."""
+
+import importlib
+import typing
+
+import typer
+import typer.core
+
+
+class LazyGroup(typer.core.TyperGroup):
+    """A group whose subcommands live in modules that are imported on demand.
+
+    Listing the subcommands in the help text uses the stored help strings, so `reiuji --help` does not import any of them.
+    """
+    lazy_commands: dict[str, tuple[str, str, str]] = {}
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.formatting = False
+        self.loaded: dict[str, typer.core.TyperCommand | typer.core.TyperGroup] = {}
+
+    def list_commands(self, ctx: typer.Context) -> list[str]:
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
+
+    def get_command(self, ctx: typer.Context, cmd_name: str) -> typing.Optional[typer.core.TyperCommand | typer.core.TyperGroup]:
+        if cmd_name not in self.lazy_commands:
+            return super().get_command(ctx, cmd_name)
+        module_name, attr, help = self.lazy_commands[cmd_name]
+        if self.formatting:
+            return typer.core.TyperCommand(cmd_name, help=help)
+        if cmd_name not in self.loaded:
+            obj = getattr(importlib.import_module(module_name), attr)
+            if isinstance(obj, typer.Typer):
+                command = typer.main.get_group(obj)
+            else:
+                wrapper = typer.Typer(add_completion=False)
+                wrapper.command(cmd_name)(obj)
+                command = typer.main.get_command(wrapper)
+            command.name = cmd_name
+            self.loaded[cmd_name] = command
+        return self.loaded[cmd_name]
+
+    def format_help(self, ctx: typer.Context, formatter: typing.Any) -> None:
+        self.formatting = True
+        try:
+            super().format_help(ctx, formatter)
+        finally:
+            self.formatting = False
+
+
+def lazy_group(commands: dict[str, tuple[str, str, str]]) -> type[LazyGroup]:
+    """Creates a group class for the given `name -> (module, attribute, help)` mapping."""
+    return type("LazyGroup", (LazyGroup,), {"lazy_commands": commands})
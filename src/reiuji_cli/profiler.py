@@ -0,0 +1,208 @@
+"""Records where a command spends its time: phase timings, CP-SAT model and search statistics, and peak memory."""
+
+import contextlib
+import datetime
+import functools
+import json
+import os
+import pathlib
+import re
+import sys
+import threading
+import time
+import typing
+
+
+CONSTRAINT_KINDS = (
+    "bool_or", "bool_and", "at_most_one", "exactly_one", "bool_xor", "int_div", "int_mod", "int_prod", "lin_max",
+    "linear", "all_diff", "element", "circuit", "routes", "table", "automaton", "inverse", "reservoir", "interval",
+    "no_overlap", "no_overlap_2d", "cumulative", "dummy_constraint"
+)
+RESPONSE_STATS = (
+    "wall_time", "user_time", "deterministic_time", "gap_integral", "num_booleans", "num_integers", "num_fixed_booleans",
+    "num_conflicts", "num_branches", "num_restarts", "num_lp_iterations", "num_binary_propagations", "num_integer_propagations"
+)
+# CP-SAT logs "Starting sequential search" instead of "Starting search" when it runs a single worker in some versions.
+SEARCH_START = r"Starting (?:sequential )?search at ([\d.]+)s"
+FIRST_SOLUTION = r"#1\s+([\d.]+)s"
+
+
+def peak_rss(children: bool = False) -> typing.Optional[int]:
+    """Returns the peak resident set size of the current process, or of its largest child, in bytes if the platform reports it."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Profile:
+    """The spans and solver statistics recorded while a command runs."""
+
+    def __init__(self, command: str) -> None:
+        self.command = command
+        self.started = datetime.datetime.now(datetime.timezone.utc)
+        self.origin = time.perf_counter()
+        self.spans: list[dict[str, typing.Any]] = []
+        self.solves: list[dict[str, typing.Any]] = []
+        self.lock = threading.Lock()
+
+    def add_span(self, name: str, start: float, end: float, **args: typing.Any) -> None:
+        with self.lock:
+            self.spans.append({"name": name, "start": start - self.origin, "duration": end - start, "thread": threading.get_ident(), "args": args})
+
+    def add_solve(self, stats: dict[str, typing.Any]) -> None:
+        with self.lock:
+            self.solves.append(stats)
+
+    def to_dict(self) -> dict[str, typing.Any]:
+        phases: dict[str, float] = {}
+        for entry in self.spans:
+            phases[entry["name"]] = phases.get(entry["name"], 0.0) + entry["duration"]
+        return {
+            "command": self.command,
+            "argv": sys.argv,
+            "started": self.started.isoformat(),
+            "wall_time": time.perf_counter() - self.origin,
+            "peak_rss": peak_rss(),
+            "peak_rss_children": peak_rss(children=True),
+            "phases": phases,
+            "solves": self.solves,
+            "spans": self.spans
+        }
+
+    def to_trace(self) -> dict[str, typing.Any]:
+        """Converts the spans to the Chrome trace event format, viewable in `chrome://tracing` or Perfetto."""
+        threads = {}
+        events = []
+        for entry in self.spans:
+            tid = threads.setdefault(entry["thread"], len(threads))
+            events.append({
+                "name": entry["name"],
+                "cat": "reiuji",
+                "ph": "X",
+                "ts": entry["start"] * 1e6,
+                "dur": entry["duration"] * 1e6,
+                "pid": os.getpid(),
+                "tid": tid,
+                "args": entry["args"]
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"command": self.command}}
+
+
+_active: typing.Optional[Profile] = None
+
+
+def active() -> typing.Optional[Profile]:
+    """Returns the profile being recorded, if any."""
+    return _active
+
+
+@contextlib.contextmanager
+def span(name: str, **args: typing.Any) -> typing.Iterator[dict[str, typing.Any]]:
+    """Records the time spent in a block as a span of the active profile.
+
+    The yielded dict can be filled in to attach more arguments to the span.
+    """
+    profile = _active
+    start = time.perf_counter()
+    try:
+        yield args
+    finally:
+        if not isinstance(profile, type(None)):
+            profile.add_span(name, start, time.perf_counter(), **args)
+
+
+def traced(name: str) -> typing.Callable:
+    """Records every call of the decorated function as a span of the active profile."""
+    def decorator(func: typing.Callable) -> typing.Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextlib.contextmanager
+def profile(path: typing.Optional[pathlib.Path], trace_path: typing.Optional[pathlib.Path] = None, command: str = "") -> typing.Iterator[typing.Optional[Profile]]:
+    """Records a profile of the enclosed block if a JSON or Chrome trace path is given, writing them on exit."""
+    global _active
+    if isinstance(path, type(None)) and isinstance(trace_path, type(None)):
+        yield None
+        return
+    previous = _active
+    _active = Profile(command)
+    recorded = _active
+    try:
+        with span(command or "run"):
+            yield recorded
+    finally:
+        _active = previous
+        if not isinstance(path, type(None)):
+            with path.open("w") as file:
+                json.dump(recorded.to_dict(), file, indent=4)
+        if not isinstance(trace_path, type(None)):
+            with trace_path.open("w") as file:
+                json.dump(recorded.to_trace(), file)
+
+
+def constraint_kind(constraint: typing.Any) -> str:
+    if hasattr(constraint, "WhichOneof"):
+        return constraint.WhichOneof("constraint") or "empty"
+    return next((kind for kind in CONSTRAINT_KINDS if getattr(constraint, f"has_{kind}")()), "empty")
+
+
+class SolveCapture:
+    """Collects the model size and search statistics of a single CP-SAT solve.
+
+    The solver's search log is captured to split the solve into presolve and search and to find the time of the first solution.
+    """
+
+    def __init__(self, solver: typing.Any, model: typing.Any) -> None:
+        proto = model.proto if hasattr(model, "proto") else model.Proto()
+        self.constraints: dict[str, int] = {}
+        for constraint in proto.constraints:
+            kind = constraint_kind(constraint)
+            self.constraints[kind] = self.constraints.get(kind, 0) + 1
+        self.variables = len(proto.variables)
+        self.log: list[str] = []
+        if not solver.parameters.log_search_progress:
+            solver.parameters.log_search_progress = True
+            solver.parameters.log_to_stdout = False
+        solver.log_callback = self.log.append
+        self.start = time.perf_counter()
+
+    def _log_time(self, pattern: str) -> typing.Optional[float]:
+        for line in self.log:
+            match = re.match(pattern, line)
+            if match:
+                return float(match.group(1))
+        return None
+
+    def finish(self, solver: typing.Any, status: str) -> None:
+        end = time.perf_counter()
+        response = solver.response_proto
+        stats = {
+            "status": status,
+            "variables": self.variables,
+            "constraints": sum(self.constraints.values()),
+            "constraint_kinds": self.constraints,
+            "workers": solver.parameters.num_workers or solver.parameters.num_search_workers,
+            "presolve_time": self._log_time(SEARCH_START),
+            "first_solution_time": self._log_time(FIRST_SOLUTION),
+            "objective": getattr(response, "objective_value", None),
+            "bound": getattr(response, "best_objective_bound", None),
+            "solution_info": getattr(response, "solution_info", None)
+        }
+        for name in RESPONSE_STATS:
+            stats[name] = getattr(response, name, None)
+        stats["search_time"] = None if isinstance(stats["presolve_time"], type(None)) else max(stats["wall_time"] - stats["presolve_time"], 0.0)
+        profile = _active
+        if isinstance(profile, type(None)):
+            return
+        profile.add_solve(stats)
+        if not isinstance(stats["presolve_time"], type(None)):
+            profile.add_span("presolve", self.start, self.start + stats["presolve_time"])
+            profile.add_span("search", self.start + stats["presolve_time"], end)
@@ -0,0 +1,84 @@
+"""A process-wide registry of parsed component lists."""
+
+import collections
+import functools
+import hashlib
+import os
+import pathlib
+import threading
+import typing
+
+import pydantic
+import reiuji
+
+
+MAX_ENTRIES = 32
+
+
+@functools.cache
+def component_adapter() -> pydantic.TypeAdapter:
+    """Returns the shared `TypeAdapter` for component lists."""
+    return pydantic.TypeAdapter(list[reiuji.components.types.Component])
+
+
+def _immutable(*args, **kwargs) -> typing.NoReturn:
+    raise TypeError("Component lists from the registry are shared and cannot be modified.")
+
+
+class ComponentList(list):
+    """A component list that is shared between callers and therefore cannot be modified."""
+    append = extend = insert = remove = pop = clear = sort = reverse = _immutable
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _immutable
+
+    def __reduce__(self) -> tuple:
+        return ComponentList, (list(self),)
+
+    @functools.cached_property
+    def digest(self) -> str:
+        """The SHA-256 hash of the list's canonical JSON form."""
+        return hashlib.sha256(component_adapter().dump_json(self)).hexdigest()
+
+
+_lock = threading.Lock()
+_by_path: collections.OrderedDict[pathlib.Path, tuple[tuple[int, int], ComponentList]] = collections.OrderedDict()
+_by_content: collections.OrderedDict[str, ComponentList] = collections.OrderedDict()
+
+
+def load(path: pathlib.Path, parse: typing.Callable[[bytes], list[reiuji.components.types.Component]]) -> ComponentList:
+    """Loads a component list, reusing the parsed list if the file, or a file with the same contents, was loaded before."""
+    path = path.resolve()
+    stat = path.stat()
+    key = (stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        if path in _by_path and _by_path[path][0] == key:
+            _by_path.move_to_end(path)
+            return _by_path[path][1]
+    with path.open("rb") as file:
+        data = file.read()
+    content = hashlib.sha256(data).hexdigest()
+    with _lock:
+        components = _by_content.get(content)
+    if isinstance(components, type(None)):
+        components = ComponentList(parse(data))
+    with _lock:
+        _by_content[content] = components
+        _by_content.move_to_end(content)
+        _by_path[path] = (key, components)
+        _by_path.move_to_end(path)
+        for entries in (_by_path, _by_content):
+            while len(entries) > MAX_ENTRIES:
+                entries.popitem(last=False)
+    return components
+
+
+def digest(components: list[reiuji.components.types.Component]) -> str:
+    """Hashes a component list, reusing the memoized hash of registry lists."""
+    if isinstance(components, ComponentList):
+        return components.digest
+    return hashlib.sha256(component_adapter().dump_json(components)).hexdigest()
+
+
+def clear() -> None:
+    with _lock:
+        _by_path.clear()
+        _by_content.clear()
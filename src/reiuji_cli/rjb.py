@@ -0,0 +1,98 @@
+"""Reading and writing the compact binary blueprint format (`.rjb`).
+
+A `.rjb` file starts with the magic bytes `RJB1` and a flags byte. The rest of the file, zlib-compressed if the lowest flag bit is set, holds:
+
+* the length of the header as a little-endian `uint32`,
+* the header, a JSON object with the `shape` of the design, the index `width` in bytes and the `palette` of unique components,
+* one palette index per cell in row-major order, as little-endian unsigned integers of `width` bytes.
+"""
+
+from . import registry
+
+import array
+import itertools
+import json
+import math
+import pathlib
+import struct
+import sys
+import zlib
+
+import reiuji
+
+
+MAGIC = b"RJB1"
+FLAG_COMPRESSED = 0x01
+
+
+def _pack(shape: tuple[int, ...], palette: list[reiuji.components.types.Component], cells: list[int], compress: bool) -> bytes:
+    width = 1 if len(palette) <= 0xFF else 2 if len(palette) <= 0xFFFF else 4
+    indices = array.array({1: "B", 2: "H", 4: "I"}[width], cells)
+    if sys.byteorder != "little":
+        indices.byteswap()
+    header = json.dumps({
+        "shape": list(shape),
+        "width": width,
+        "palette": json.loads(registry.component_adapter().dump_json(palette))
+    }, separators=(",", ":")).encode("utf-8")
+    payload = struct.pack("<I", len(header)) + header + indices.tobytes()
+    if compress:
+        return MAGIC + bytes([FLAG_COMPRESSED]) + zlib.compress(payload)
+    return MAGIC + bytes([0]) + payload
+
+
+def _unpack(data: bytes) -> tuple[tuple[int, ...], list[reiuji.components.types.Component], array.array]:
+    if data[:4] != MAGIC:
+        raise ValueError("Not a Reiuji binary blueprint.")
+    payload = zlib.decompress(data[5:]) if data[4] & FLAG_COMPRESSED else data[5:]
+    (length,) = struct.unpack_from("<I", payload)
+    header = json.loads(payload[4:4 + length])
+    palette = registry.component_adapter().validate_python(header["palette"])
+    indices = array.array({1: "B", 2: "H", 4: "I"}[header["width"]], payload[4 + length:])
+    if sys.byteorder != "little":
+        indices.byteswap()
+    shape = tuple(header["shape"])
+    if len(indices) != math.prod(shape):
+        raise ValueError("Blueprint cell count does not match its shape.")
+    return shape, palette, indices
+
+
+def dumps(design: reiuji.core.multi_sequence.MultiSequence[reiuji.components.types.Component], compress: bool = True) -> bytes:
+    """Encodes a design as a binary blueprint."""
+    palette: list[reiuji.components.types.Component] = []
+    lookup: dict[str, int] = {}
+    cells = []
+    for idx in itertools.product(*(range(length) for length in design.shape)):
+        comp = design[idx if len(idx) > 1 else idx[0]]
+        if comp.full_name not in lookup:
+            lookup[comp.full_name] = len(palette)
+            palette.append(comp)
+        cells.append(lookup[comp.full_name])
+    return _pack(design.shape, palette, cells, compress)
+
+
+def loads(data: bytes) -> reiuji.core.multi_sequence.MultiSequence[reiuji.components.types.Component]:
+    """Decodes a binary blueprint into a design. Each distinct component is only validated once."""
+    shape, palette, indices = _unpack(data)
+    return reiuji.core.multi_sequence.MultiSequence([palette[i] for i in indices], shape)
+
+
+def dumps_components(components: list[reiuji.components.types.Component], compress: bool = True) -> bytes:
+    """Encodes a component list as a one-dimensional binary blueprint."""
+    return _pack((len(components),), components, list(range(len(components))), compress)
+
+
+def loads_components(data: bytes) -> list[reiuji.components.types.Component]:
+    """Decodes a component list, or the cells of any binary blueprint, in order."""
+    _, palette, indices = _unpack(data)
+    return [palette[i] for i in indices]
+
+
+def read(path: pathlib.Path) -> reiuji.core.multi_sequence.MultiSequence[reiuji.components.types.Component]:
+    with path.open("rb") as file:
+        return loads(file.read())
+
+
+def write(design: reiuji.core.multi_sequence.MultiSequence[reiuji.components.types.Component], path: pathlib.Path, compress: bool = True) -> None:
+    with path.open("wb") as file:
+        file.write(dumps(design, compress))
@@ -0,0 +1,142 @@
+"""A streaming `.schematic` writer.
+
+Reiuji's schematic writers build an NBT tree holding a Python list and a tag object per cell before writing anything.
+This module asks the same writers for their block structure and streams the NBT document to a gzip file one layer at a time instead,
+reusing a single preallocated buffer for every layer of the block, add-block and data arrays.
+"""
+
+from . import profiler
+
+import gzip
+import pathlib
+import struct
+import typing
+
+import reiuji
+
+
+TAG_END = 0
+TAG_SHORT = 2
+TAG_INT = 3
+TAG_BYTE_ARRAY = 7
+TAG_STRING = 8
+TAG_LIST = 9
+TAG_COMPOUND = 10
+
+_SHORT = struct.Struct(">h")
+_INT = struct.Struct(">i")
+
+
+def _string(value: str) -> bytes:
+    data = value.encode("utf-8")
+    return _SHORT.pack(len(data)) + data
+
+
+def _header(tag: int, name: str) -> bytes:
+    return bytes((tag,)) + _string(name)
+
+
+def _short(name: str, value: int) -> bytes:
+    return _header(TAG_SHORT, name) + _SHORT.pack(value)
+
+
+def _named_string(name: str, value: str) -> bytes:
+    return _header(TAG_STRING, name) + _string(value)
+
+
+def _byte_array(file: typing.BinaryIO, name: str, length: int, chunks: typing.Iterator[memoryview]) -> None:
+    file.write(_header(TAG_BYTE_ARRAY, name) + _INT.pack(length))
+    for chunk in chunks:
+        file.write(chunk)
+
+
+def write_structure(structure: reiuji.core.multi_sequence.MultiSequence[reiuji.components.base.MCBlock], path: pathlib.Path, compresslevel: int = 9) -> None:
+    """Writes a block structure of shape (height, length, width) as a `.schematic` file.
+
+    Blocks are numbered in order of first use, so the palette may be numbered differently from Reiuji's writers, but every cell maps to the same block.
+    """
+    height, length, width = structure.shape
+    layer = length * width
+    cells = structure.seq
+    total = len(cells)
+    # Writers reuse a handful of block objects for every cell, so look blocks up by identity and only inspect each distinct one once.
+    palette: dict[str, int] = {}
+    ids: dict[int, int] = {}
+    data: dict[int, int] = {}
+    tiles: dict[int, bool] = {}
+    tile_entities = 0
+    for block in cells:
+        key = id(block)
+        if key not in ids:
+            ids[key] = palette.setdefault(block.name, len(palette))
+            data[key] = block.data
+            tiles[key] = block.is_tile_entity
+        tile_entities += tiles[key]
+    low_bytes = {key: value % 256 for key, value in ids.items()}
+    buffer = bytearray(layer)
+    view = memoryview(buffer)
+
+    def layers(lookup: dict[int, int]) -> typing.Iterator[memoryview]:
+        for start in range(0, total, layer):
+            buffer[:] = bytes(map(lookup.__getitem__, map(id, cells[start:start + layer])))
+            yield view
+
+    def add_blocks() -> typing.Iterator[memoryview]:
+        # Each byte holds the high bits of two consecutive block IDs, so a pair may span two layers.
+        size = (total + 1) // 2
+        if len(palette) <= 0x100:
+            view[:] = bytes(layer)
+            for start in range(0, size, layer):
+                yield view[:min(layer, size - start)]
+            return
+        filled = 0
+        for i in range(0, total, 2):
+            low = (ids[id(cells[i])] >> 8) & 0xF
+            high = (ids[id(cells[i + 1])] >> 8) & 0xF if i + 1 < total else 0
+            buffer[filled] = low + high * 16
+            filled += 1
+            if filled == layer:
+                yield view
+                filled = 0
+        if filled > 0:
+            yield view[:filled]
+
+    def tile_entities_layers() -> typing.Iterator[bytearray]:
+        # Every tile entity of a block only differs in its position, so its name and properties are encoded once.
+        x_tag, y_tag, z_tag = _header(TAG_INT, "x"), _header(TAG_INT, "y"), _header(TAG_INT, "z")
+        encoded = {}
+        for key, block in {id(block): block for block in cells if tiles[id(block)]}.items():
+            encoded[key] = (_named_string("id", block.name), b"".join(_named_string(name, value) for name, value in block.properties.items()) + bytes((TAG_END,)))
+        chunk = bytearray()
+        for y in range(height):
+            chunk.clear()
+            start = y * layer
+            for i, block in enumerate(cells[start:start + layer]):
+                parts = encoded.get(id(block))
+                if isinstance(parts, type(None)):
+                    continue
+                z, x = divmod(i, width)
+                chunk += parts[0]
+                chunk += x_tag + _INT.pack(x) + y_tag + _INT.pack(y) + z_tag + _INT.pack(z)
+                chunk += parts[1]
+            yield chunk
+
+    with profiler.span("stream schematic"), gzip.open(path, "wb", compresslevel=compresslevel) as file:
+        file.write(_header(TAG_COMPOUND, "Schematic"))
+        file.write(_short("Width", width) + _short("Height", height) + _short("Length", length) + _named_string("Materials", "Alpha"))
+        _byte_array(file, "Blocks", total, layers(low_bytes))
+        _byte_array(file, "AddBlocks", (total + 1) // 2, add_blocks())
+        _byte_array(file, "Data", total, layers(data))
+        file.write(_header(TAG_COMPOUND, "SchematicaMapping") + b"".join(_short(name, i) for name, i in palette.items()) + bytes((TAG_END,)))
+        file.write(_header(TAG_LIST, "Entities") + bytes((TAG_COMPOUND,)) + _INT.pack(0))
+        file.write(_header(TAG_LIST, "TileEntities") + bytes((TAG_COMPOUND,)) + _INT.pack(tile_entities))
+        for chunk in tile_entities_layers():
+            file.write(chunk)
+        file.write(bytes((TAG_END,)))
+
+
+def write(writer: typing.Any, path: pathlib.Path, compresslevel: int = 9) -> None:
+    """Streams the structure of one of Reiuji's schematic writers to `path`, in place of `writer.write(path)`."""
+    with profiler.span("build structure"):
+        structure = writer.to_structure()
+    write_structure(structure, path, compresslevel)
@@ -0,0 +1,339 @@
+"""A long-running server that queues designer and converter jobs."""
+
+from . import jobs
+
+import bisect
+import concurrent.futures
+import http.server
+import json
+import multiprocessing
+import os
+import pathlib
+import socketserver
+import stat
+import threading
+import time
+import typing
+import urllib.parse
+import uuid
+
+import pydantic
+import typer
+import rich
+import rich.markup
+
+
+TERMINAL_STATES = ("done", "error", "cancelled")
+
+
+class QueuedJob(pydantic.BaseModel):
+    """A job submitted to the server and its current state."""
+    id: str
+    job: jobs.Job
+    state: str = "queued"
+    submitted: float
+    started: typing.Optional[float] = None
+    finished: typing.Optional[float] = None
+    result: typing.Optional[jobs.JobResult] = None
+
+
+class JobQueue:
+    """Runs submitted jobs on a bounded process pool and tracks their state.
+
+    Cancelling a queued job removes it from the queue; cancelling a running job stops its solves, after which the best design found so far is written as usual.
+    Only the `keep_finished` most recently finished jobs are kept, along with their events; older ones are forgotten.
+    """
+
+    def __init__(self, workers: int, max_queued: int, timeout: typing.Optional[float] = None, keep_finished: int = 1000) -> None:
+        self.workers = workers
+        self.max_queued = max_queued
+        self.timeout = timeout
+        self.keep_finished = keep_finished
+        self.search_workers = max((os.cpu_count() or 1) // workers, 1)
+        self.manager = multiprocessing.Manager()
+        self.started = self.manager.dict()
+        self.cancelled = self.manager.dict()
+        self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=jobs.warm_up)
+        self.jobs: dict[str, QueuedJob] = {}
+        self.futures: dict[str, concurrent.futures.Future] = {}
+        self.events: list[dict[str, typing.Any]] = []
+        self.seq = 0
+        self.condition = threading.Condition()
+        self.closed = False
+        self.monitor = threading.Thread(target=self._monitor, daemon=True)
+        self.monitor.start()
+
+    def _emit(self, entry: QueuedJob) -> None:
+        self.events.append({"seq": self.seq, "time": time.time(), **entry.model_dump(mode="json")})
+        self.seq += 1
+        self.condition.notify_all()
+
+    def _prune(self) -> None:
+        finished = sorted((entry for entry in self.jobs.values() if entry.state in TERMINAL_STATES), key=lambda entry: entry.finished or 0.0)
+        forgotten = finished[:max(len(finished) - self.keep_finished, 0)]
+        if len(forgotten) == 0:
+            return
+        for entry in forgotten:
+            del self.jobs[entry.id]
+            self.futures.pop(entry.id, None)
+            self.started.pop(entry.id, None)
+            self.cancelled.pop(entry.id, None)
+        self.events = [event for event in self.events if event["id"] in self.jobs]
+
+    def _monitor(self) -> None:
+        while True:
+            with self.condition:
+                if self.closed:
+                    return
+                for key, entry in self.jobs.items():
+                    if entry.state == "queued" and key in self.started:
+                        entry.state = "running"
+                        entry.started = self.started[key]
+                        self._emit(entry)
+                self.condition.wait(0.25)
+
+    def _finish(self, key: str, future: concurrent.futures.Future) -> None:
+        with self.condition:
+            entry = self.jobs[key]
+            if future.cancelled():
+                entry.state = "cancelled"
+            else:
+                try:
+                    entry.result = future.result()
+                except Exception as e:
+                    entry.result = jobs.JobResult(name=entry.job.name, kind=entry.job.kind, status="ERROR", wall_time=0.0, error=f"{type(e).__name__}: {e}")
+                if entry.result.status == "CANCELLED":
+                    entry.state = "cancelled"
+                elif entry.result.status == "ERROR":
+                    entry.state = "error"
+                else:
+                    entry.state = "done"
+            entry.started = entry.started or self.started.get(key)
+            entry.finished = time.time()
+            self._emit(entry)
+            self._prune()
+
+    def submit(self, job: jobs.Job) -> QueuedJob:
+        """Validates a job and adds it to the queue, raising `ValueError` if it is invalid or the queue is full."""
+        available = jobs.commands()
+        if job.kind not in available:
+            raise ValueError(f"Unknown command: {job.kind}")
+        try:
+            jobs.coerce_args(available[job.kind], job.args)
+        except pydantic.ValidationError as e:
+            raise ValueError(str(e)) from None
+        with self.condition:
+            if self.closed:
+                raise ValueError("The server is shutting down.")
+            if sum(entry.state == "queued" for entry in self.jobs.values()) >= self.max_queued:
+                raise ValueError("The queue is full.")
+            key = uuid.uuid4().hex[:12]
+            if isinstance(job.name, type(None)):
+                job.name = key
+            entry = QueuedJob(id=key, job=job, submitted=time.time())
+            self.jobs[key] = entry
+            self._emit(entry)
+            future = self.executor.submit(jobs.run_cancellable, job, key, self.started, self.cancelled, self.timeout, self.search_workers)
+            self.futures[key] = future
+        future.add_done_callback(lambda future: self._finish(key, future))
+        return entry
+
+    def cancel(self, key: str) -> QueuedJob:
+        """Cancels a job, raising `KeyError` if it does not exist."""
+        with self.condition:
+            entry = self.jobs[key]
+            if entry.state in TERMINAL_STATES:
+                return entry
+            self.cancelled[key] = True
+            future = self.futures[key]
+        future.cancel()
+        return entry
+
+    def wait(self, key: str, timeout: float) -> QueuedJob:
+        """Waits up to `timeout` seconds for a job to finish, raising `KeyError` if it does not exist."""
+        with self.condition:
+            entry = self.jobs[key]
+            self.condition.wait_for(lambda: entry.state in TERMINAL_STATES or self.closed, timeout=timeout)
+            return entry
+
+    def stream(self, since: int, key: typing.Optional[str] = None, heartbeat: float = 15.0) -> typing.Iterator[typing.Optional[dict[str, typing.Any]]]:
+        """Yields events from `since` onwards as they happen, or `None` as a heartbeat.
+
+        If `key` is given, only that job's events are yielded and the stream ends once it finishes.
+        Events of forgotten jobs are skipped.
+        """
+        position = since
+        while True:
+            with self.condition:
+                ready = self.condition.wait_for(lambda: self.seq > position or self.closed, timeout=heartbeat)
+                if self.closed and self.seq <= position:
+                    return
+                events = self.events[bisect.bisect_left(self.events, position, key=lambda event: event["seq"]):]
+                position = self.seq
+            if not ready:
+                yield None
+                continue
+            for event in events:
+                if isinstance(key, type(None)) or event["id"] == key:
+                    yield event
+                    if not isinstance(key, type(None)) and event["state"] in TERMINAL_STATES:
+                        return
+
+    def close(self) -> None:
+        """Cancels every unfinished job and shuts the worker processes down."""
+        with self.condition:
+            for key, entry in self.jobs.items():
+                if entry.state not in TERMINAL_STATES:
+                    self.cancelled[key] = True
+            self.closed = True
+            self.condition.notify_all()
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.manager.shutdown()
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    """Serves the job queue as a small JSON API."""
+    server: typing.Any
+
+    def address_string(self) -> str:
+        if isinstance(self.client_address, tuple):
+            return str(self.client_address[0])
+        return "unix"
+
+    def log_message(self, format: str, *args: typing.Any) -> None:
+        rich.print(f"[dim]{rich.markup.escape(self.address_string())} - {rich.markup.escape(format % args)}[/dim]")
+
+    def send_json(self, code: int, payload: typing.Any) -> None:
+        body = json.dumps(payload, indent=4).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, code: int, message: str) -> None:
+        self.send_json(code, {"error": message})
+
+    def route(self) -> tuple[list[str], dict[str, str]]:
+        url = urllib.parse.urlsplit(self.path)
+        parts = [part for part in url.path.split("/") if part != ""]
+        query = {key: values[-1] for key, values in urllib.parse.parse_qs(url.query).items()}
+        return parts, query
+
+    def do_GET(self) -> None:
+        queue: JobQueue = self.server.queue
+        parts, query = self.route()
+        try:
+            if parts == ["jobs"]:
+                with queue.condition:
+                    self.send_json(200, [entry.model_dump(mode="json") for entry in queue.jobs.values()])
+            elif len(parts) == 2 and parts[0] == "jobs":
+                entry = queue.wait(parts[1], float(query.get("wait", 0)))
+                with queue.condition:
+                    self.send_json(200, entry.model_dump(mode="json"))
+            elif parts == ["events"]:
+                since = int(query.get("since", queue.seq))
+                if since < 0:
+                    raise ValueError(f"The event index must not be negative, not {since}.")
+                self.stream_events(queue, since, query.get("job"))
+            else:
+                self.send_error_json(404, f"Not found: {self.path}")
+        except KeyError as e:
+            self.send_error_json(404, f"Unknown job: {e.args[0]}")
+        except ValueError as e:
+            self.send_error_json(400, str(e))
+
+    def do_POST(self) -> None:
+        queue: JobQueue = self.server.queue
+        parts, _ = self.route()
+        if parts != ["jobs"]:
+            self.send_error_json(404, f"Not found: {self.path}")
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            job = jobs.Job.model_validate_json(self.rfile.read(length))
+            entry = queue.submit(job)
+        except (ValueError, pydantic.ValidationError) as e:
+            self.send_error_json(400, str(e))
+            return
+        with queue.condition:
+            self.send_json(202, entry.model_dump(mode="json"))
+
+    def do_DELETE(self) -> None:
+        queue: JobQueue = self.server.queue
+        parts, _ = self.route()
+        if len(parts) != 2 or parts[0] != "jobs":
+            self.send_error_json(404, f"Not found: {self.path}")
+            return
+        try:
+            entry = queue.cancel(parts[1])
+        except KeyError:
+            self.send_error_json(404, f"Unknown job: {parts[1]}")
+            return
+        with queue.condition:
+            self.send_json(202, entry.model_dump(mode="json"))
+
+    def stream_events(self, queue: JobQueue, since: int, key: typing.Optional[str]) -> None:
+        if not isinstance(key, type(None)) and key not in queue.jobs:
+            raise KeyError(key)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        try:
+            for event in queue.stream(since, key):
+                self.wfile.write(b"\n" if isinstance(event, type(None)) else json.dumps(event).encode("utf-8") + b"\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class HTTPServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(
+    host: typing.Annotated[str, typer.Option("--host", help="The address to listen on.", rich_help_panel="Server Options")] = "127.0.0.1",
+    port: typing.Annotated[int, typer.Option("--port", help="The port to listen on.", rich_help_panel="Server Options")] = 8765,
+    socket_path: typing.Annotated[typing.Optional[pathlib.Path], typer.Option("--socket", help="The path of a Unix socket to listen on instead of a TCP port.", rich_help_panel="Server Options")] = None,
+    workers: typing.Annotated[int, typer.Option("--workers", "-j", help="The number of jobs to run at once.", rich_help_panel="Queue Options")] = 1,
+    max_queued: typing.Annotated[int, typer.Option("--max-queued", help="The number of jobs that may wait in the queue before submissions are rejected.", rich_help_panel="Queue Options")] = 100,
+    keep_finished: typing.Annotated[int, typer.Option("--keep-finished", help="The number of finished jobs to remember, along with their events. Older ones are forgotten.", rich_help_panel="Queue Options")] = 1000,
+    timeout: typing.Annotated[typing.Optional[float], typer.Option("--timeout", "-T", help="The timeout for jobs that do not set their own in seconds.", rich_help_panel="Queue Options")] = None
+) -> None:
+    """Run a server that queues designer and converter jobs.
+
+    Jobs use the same format as `reiuji design batch` manifest entries and are submitted with `POST /jobs`.
+    `GET /jobs` lists every job, `GET /jobs/<id>?wait=<seconds>` polls one, `DELETE /jobs/<id>` cancels one, and `GET /events?job=<id>` streams state changes as JSON lines.
+    """
+    if workers < 1:
+        rich.print("[red][bold]ERROR:[/bold] At least one worker is required.[/red]")
+        raise typer.Exit(code=1)
+    if keep_finished < 0:
+        rich.print("[red][bold]ERROR:[/bold] The number of finished jobs to remember must not be negative.[/red]")
+        raise typer.Exit(code=1)
+    if not isinstance(socket_path, type(None)) and os.path.lexists(socket_path) and not stat.S_ISSOCK(os.lstat(socket_path).st_mode):
+        rich.print(f"[red][bold]ERROR:[/bold] {rich.markup.escape(str(socket_path))} exists and is not a socket.[/red]")
+        raise typer.Exit(code=1)
+    queue = JobQueue(workers, max_queued, timeout, keep_finished)
+    if isinstance(socket_path, type(None)):
+        server = HTTPServer((host, port), Handler)
+        address = f"http://{host}:{server.server_address[1]}"
+    else:
+        socket_path.unlink(missing_ok=True)
+        server = UnixHTTPServer(str(socket_path), Handler)
+        address = f"unix:{socket_path}"
+    server.queue = queue
+    rich.print(f"[green]Listening on {address} with {workers} worker(s).[/green]")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        rich.print("[yellow]Shutting down...[/yellow]")
+    finally:
+        server.server_close()
+        queue.close()
+        if not isinstance(socket_path, type(None)):
+            socket_path.unlink(missing_ok=True)
@@ -0,0 +1,407 @@
+"""Hooks into the CP-SAT solves performed by Reiuji's designers."""
+
+from . import profiler
+
+import contextlib
+import dataclasses
+import itertools
+import math
+import threading
+import time
+import typing
+
+import reiuji
+import rich
+import rich.markup
+from ortools.sat.python import cp_model
+from ortools.sat import cp_model_pb2
+
+
+@dataclasses.dataclass
+class SolveRecord:
+    """Statistics about the solves performed within a session."""
+    status: typing.Optional[str] = None
+    objective: typing.Optional[float] = None
+    bound: typing.Optional[float] = None
+    wall_time: float = 0.0
+    solves: int = 0
+    solutions: int = 0
+    maximize: typing.Optional[bool] = None
+
+
+@dataclasses.dataclass
+class SolverOptions:
+    """Parameters applied to every CP-SAT solve in a session."""
+    workers: typing.Optional[int] = None
+    seed: typing.Optional[int] = None
+    params: list[str] = dataclasses.field(default_factory=list)
+
+    def apply(self, parameters: typing.Any) -> None:
+        """Applies the options to a `SatParameters` message, raising `ValueError` for invalid parameters."""
+        if not isinstance(self.workers, type(None)):
+            if hasattr(parameters, "num_workers"):
+                parameters.num_workers = self.workers
+            else:
+                parameters.num_search_workers = self.workers
+        if not isinstance(self.seed, type(None)):
+            parameters.random_seed = self.seed
+        for param in self.params:
+            key, sep, value = param.partition("=")
+            key, value = key.strip(), value.strip()
+            if sep == "" or not hasattr(parameters, key):
+                raise ValueError(f"Invalid solver parameter: {param}")
+            current = getattr(parameters, key)
+            try:
+                if isinstance(current, bool):
+                    if value.lower() not in ("true", "false", "1", "0"):
+                        raise ValueError
+                    setattr(parameters, key, value.lower() in ("true", "1"))
+                elif isinstance(current, int):
+                    setattr(parameters, key, _enum_value(parameters, key, value))
+                elif isinstance(current, float):
+                    setattr(parameters, key, float(value))
+                elif isinstance(current, str):
+                    setattr(parameters, key, value)
+                elif hasattr(type(current), value):
+                    setattr(parameters, key, getattr(type(current), value))
+                else:
+                    raise ValueError
+            except (ValueError, TypeError, AttributeError, KeyError):
+                raise ValueError(f"Invalid value for solver parameter {key}: {value}") from None
+
+    def validate(self) -> None:
+        """Checks that the options can be applied, raising `ValueError` otherwise."""
+        self.apply(cp_model.CpSolver().parameters)
+
+    def time_limit(self, timeout: typing.Optional[float]) -> typing.Optional[float]:
+        """Returns the time limit a solve with the given timeout actually runs under, or None if it is unlimited.
+
+        A `max_time_in_seconds` solver parameter is applied after the designer's timeout, so it takes precedence.
+        """
+        parameters = cp_model.CpSolver().parameters
+        if not isinstance(timeout, type(None)):
+            parameters.max_time_in_seconds = timeout
+        self.apply(parameters)
+        return None if math.isinf(parameters.max_time_in_seconds) else parameters.max_time_in_seconds
+
+
+def _enum_value(parameters: typing.Any, key: str, value: str) -> int:
+    try:
+        return int(value)
+    except ValueError:
+        field = parameters.DESCRIPTOR.fields_by_name[key]
+        if isinstance(field.enum_type, type(None)) or value not in field.enum_type.values_by_name:
+            raise
+        return field.enum_type.values_by_name[value].number
+
+
+class Decoder:
+    """Maps the cell variables of a designer's model back to components.
+
+    Reiuji's designers create one integer variable per cell, in order, before any other variable, and each holds an index into the designer's component list.
+    """
+
+    def __init__(self, components: list[reiuji.components.types.Component], shape: tuple[int, ...]) -> None:
+        self.components = components
+        self.shape = tuple(shape)
+        self.size = math.prod(self.shape)
+
+    @classmethod
+    def from_designer(cls, designer: typing.Any) -> typing.Optional["Decoder"]:
+        components = getattr(designer, "components", None)
+        shape = getattr(designer, "seq_shape", None) or getattr(designer, "shape", None)
+        if isinstance(components, type(None)) or isinstance(shape, type(None)):
+            return None
+        return cls(components, shape)
+
+    def variables(self, model: cp_model.CpModel) -> list[cp_model.IntVar]:
+        return [model.get_int_var_from_proto_index(i) for i in range(self.size)]
+
+    def decode(self, values: list[int]) -> reiuji.core.multi_sequence.MultiSequence[reiuji.components.types.Component]:
+        return reiuji.core.multi_sequence.MultiSequence([self.components[value] for value in values], self.shape)
+
+    def encode(self, design: reiuji.core.multi_sequence.MultiSequence[reiuji.components.types.Component]) -> list[typing.Optional[int]]:
+        """Maps a design onto the cells, leaving cells outside its shape or with unknown components unset."""
+        indices = {comp.full_name: i for i, comp in enumerate(self.components)}
+        values = []
+        for idx in itertools.product(*(range(length) for length in self.shape)):
+            if len(idx) != len(design.shape) or any(i >= length for i, length in zip(idx, design.shape)):
+                values.append(None)
+                continue
+            values.append(indices.get(design[idx if len(idx) > 1 else idx[0]].full_name))
+        return values
+
+
+@dataclasses.dataclass
+class Solution:
+    """An intermediate solution reported while a solve is running."""
+    index: int
+    elapsed: float
+    objective: typing.Optional[float] = None
+    bound: typing.Optional[float] = None
+    values: typing.Optional[list[int]] = None
+    decoder: typing.Optional[Decoder] = None
+    maximize: typing.Optional[bool] = None
+
+    def design(self) -> typing.Optional[reiuji.core.multi_sequence.MultiSequence[reiuji.components.types.Component]]:
+        if isinstance(self.values, type(None)) or isinstance(self.decoder, type(None)):
+            return None
+        return self.decoder.decode(self.values)
+
+
+def maximizes(model: cp_model.CpModel) -> bool:
+    """Whether the objective of a model is maximized."""
+    proto = model.proto if hasattr(model, "proto") else model.Proto()
+    floating = proto.has_floating_point_objective() if hasattr(proto, "has_floating_point_objective") else proto.HasField("floating_point_objective")
+    if floating:
+        return proto.floating_point_objective.maximize
+    return proto.objective.scaling_factor < 0
+
+
+def improves(candidate: typing.Optional[float], incumbent: typing.Optional[float], maximize: typing.Optional[bool]) -> bool:
+    """Whether an objective value is strictly better than the incumbent's."""
+    if isinstance(candidate, type(None)) or isinstance(incumbent, type(None)):
+        return False
+    return candidate > incumbent if maximize else candidate < incumbent
+
+
+class _SolutionCallback(cp_model.CpSolverSolutionCallback):
+    def __init__(self, session: "Session", model: cp_model.CpModel) -> None:
+        super().__init__()
+        self.session = session
+        self.start = time.perf_counter()
+        self.has_objective = model.has_objective()
+        self.maximize = maximizes(model) if self.has_objective else None
+        self.cells = self.session.decoder.variables(model) if not isinstance(self.session.decoder, type(None)) else None
+
+    def on_solution_callback(self) -> None:
+        for session in self.session.lineage():
+            session.record.solutions += 1
+        solution = Solution(
+            index=self.session.record.solutions,
+            elapsed=time.perf_counter() - self.start,
+            objective=self.objective_value if self.has_objective else None,
+            bound=self.best_objective_bound if self.has_objective else None,
+            values=[self.value(cell) for cell in self.cells] if not isinstance(self.cells, type(None)) else None,
+            decoder=self.session.decoder,
+            maximize=self.maximize
+        )
+        for listener in itertools.chain.from_iterable(session.listeners for session in self.session.lineage()):
+            try:
+                listener(solution)
+            except Exception as e:
+                rich.print(f"[yellow][bold]WARNING:[/bold] {rich.markup.escape(str(e))}[/yellow]")
+
+
+class Session:
+    """Configures and collects information about the solves performed on the current thread."""
+
+    def __init__(
+            self,
+            options: typing.Optional[SolverOptions] = None,
+            *,
+            decoder: typing.Optional[Decoder] = None,
+            listeners: typing.Optional[list[typing.Callable[[Solution], None]]] = None,
+            hint: typing.Optional[reiuji.core.multi_sequence.MultiSequence[reiuji.components.types.Component]] = None,
+            solutions: int = 1,
+            min_distance: int = 1
+        ) -> None:
+        self.options = options or SolverOptions()
+        self.decoder = decoder
+        self.listeners = listeners or []
+        self.hint = hint
+        self.solutions = solutions
+        self.min_distance = min_distance
+        self.alternatives: list[Solution] = []
+        self.record = SolveRecord()
+        self.parent: typing.Optional[Session] = None
+        self.stopped = False
+        self._solvers: set[cp_model.CpSolver] = set()
+        self._lock = threading.Lock()
+
+    def lineage(self) -> typing.Iterator["Session"]:
+        """Yields this session followed by the sessions enclosing it."""
+        session = self
+        while not isinstance(session, type(None)):
+            yield session
+            session = session.parent
+
+    def stop(self) -> None:
+        """Stops the running solves of this session and the sessions nested in it, and makes later solves return immediately."""
+        with self._lock:
+            self.stopped = True
+            solvers = list(self._solvers)
+        for solver in solvers:
+            _stop_search(solver)
+
+    def restore(self, status: cp_model_pb2.CpSolverStatus, objective: typing.Optional[float]) -> None:
+        """Records a result that was reused instead of solved, such as a cached one, in this session and the sessions enclosing it."""
+        for session in self.lineage():
+            session.record.status = cp_model_pb2.CpSolverStatus.Name(status)
+            if not isinstance(objective, type(None)):
+                session.record.objective = objective
+
+    def add_hint(self, model: cp_model.CpModel) -> None:
+        if isinstance(self.decoder, type(None)):
+            rich.print("[yellow][bold]WARNING:[/bold] Hints are not supported for this designer.[/yellow]")
+            return
+        hinted = 0
+        for cell, value in zip(self.decoder.variables(model), self.decoder.encode(self.hint)):
+            if not isinstance(value, type(None)):
+                model.add_hint(cell, value)
+                hinted += 1
+        rich.print(f"[blue][bold]HINT:[/bold] Hinted {hinted} of {self.decoder.size} cells[/blue]")
+
+    def solve(self, solve: typing.Callable, solver: cp_model.CpSolver, model: cp_model.CpModel, callback: typing.Optional[cp_model.CpSolverSolutionCallback]) -> cp_model_pb2.CpSolverStatus:
+        self.options.apply(solver.parameters)
+        if not isinstance(self.hint, type(None)):
+            self.add_hint(model)
+        if any(len(session.listeners) > 0 for session in self.lineage()):
+            if isinstance(callback, type(None)):
+                callback = _SolutionCallback(self, model)
+            else:
+                rich.print("[yellow][bold]WARNING:[/bold] The designer uses its own solution callback; progress is unavailable.[/yellow]")
+        status = self._run(solve, solver, model, callback)
+        for session in self.lineage():
+            session.record.status = cp_model_pb2.CpSolverStatus.Name(status)
+            if status in (cp_model.OPTIMAL, cp_model.FEASIBLE) and model.has_objective():
+                session.record.objective = solver.objective_value
+                session.record.bound = solver.best_objective_bound
+                session.record.maximize = maximizes(model)
+        if self.solutions > 1 and status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            self.find_alternatives(solve, solver, model)
+        return status
+
+    def _run(self, solve: typing.Callable, solver: cp_model.CpSolver, model: cp_model.CpModel, callback: typing.Optional[cp_model.CpSolverSolutionCallback]) -> cp_model_pb2.CpSolverStatus:
+        lineage = list(self.lineage())
+        for session in lineage:
+            with session._lock:
+                session._solvers.add(solver)
+        if any(session.stopped for session in lineage):
+            solver.parameters.max_time_in_seconds = 0.0
+        capture = profiler.SolveCapture(solver, model) if not isinstance(profiler.active(), type(None)) else None
+        start = time.perf_counter()
+        try:
+            with profiler.span("solve"):
+                status = solve(solver, model, callback)
+        finally:
+            for session in lineage:
+                with session._lock:
+                    session._solvers.discard(solver)
+        elapsed = time.perf_counter() - start
+        if not isinstance(capture, type(None)):
+            capture.finish(solver, cp_model_pb2.CpSolverStatus.Name(status))
+        for session in lineage:
+            session.record.wall_time += elapsed
+            session.record.solves += 1
+        return status
+
+    def find_alternatives(self, solve: typing.Callable, solver: cp_model.CpSolver, model: cp_model.CpModel) -> None:
+        """Re-solves a solved model for up to `solutions - 1` more designs, each differing from every earlier one in at least `min_distance` cells.
+
+        The model is only built once, and each solve starts from the previous design.
+        The first solver is left untouched so that the designer still reads the first design from it.
+        The alternatives share whatever remains of the first solve's time limit, so asking for more solutions never extends the total solve time.
+        """
+        if isinstance(self.decoder, type(None)):
+            rich.print("[yellow][bold]WARNING:[/bold] Multiple solutions are not supported for this designer.[/yellow]")
+            return
+        cells = self.decoder.variables(model)
+        values = [solver.value(cell) for cell in cells]
+        start = time.perf_counter()
+        limit = solver.parameters.max_time_in_seconds
+        deadline = start + limit - solver.wall_time if not math.isinf(limit) else math.inf
+        while len(self.alternatives) + 1 < self.solutions and not any(session.stopped for session in self.lineage()):
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            differs = []
+            for cell, value in zip(cells, values):
+                differ = model.new_bool_var("")
+                model.add(cell != value).only_enforce_if(differ)
+                differs.append(differ)
+            model.add(sum(differs) >= self.min_distance)
+            if hasattr(model, "clear_hints"):
+                model.clear_hints()
+            else:
+                model.ClearHints()
+            for cell, value in zip(cells, values):
+                model.add_hint(cell, value)
+            alternative = cp_model.CpSolver()
+            alternative.parameters.CopyFrom(solver.parameters)
+            if not math.isinf(remaining):
+                alternative.parameters.max_time_in_seconds = remaining
+            status = self._run(solve, alternative, model, None)
+            if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+                break
+            values = [alternative.value(cell) for cell in cells]
+            self.alternatives.append(Solution(
+                index=len(self.alternatives) + 2,
+                elapsed=time.perf_counter() - start,
+                objective=alternative.objective_value if model.has_objective() else None,
+                bound=alternative.best_objective_bound if model.has_objective() else None,
+                values=values,
+                decoder=self.decoder,
+                maximize=maximizes(model) if model.has_objective() else None
+            ))
+
+
+def _stop_search(solver: cp_model.CpSolver) -> None:
+    if hasattr(solver, "stop_search"):
+        solver.stop_search()
+    else:
+        solver.StopSearch()
+
+
+_local = threading.local()
+_install_lock = threading.Lock()
+_installed = False
+
+
+def _wrap(original: typing.Callable) -> typing.Callable:
+    def solve(self: cp_model.CpSolver, model: cp_model.CpModel, *args, **kwargs) -> cp_model_pb2.CpSolverStatus:
+        session = getattr(_local, "session", None)
+        if isinstance(session, type(None)) or getattr(_local, "solving", False):
+            return original(self, model, *args, **kwargs)
+        callback = args[0] if len(args) > 0 else next(iter(kwargs.values()), None)
+        _local.solving = True
+        try:
+            return session.solve(original, self, model, callback)
+        finally:
+            _local.solving = False
+    return solve
+
+
+def install() -> None:
+    """Routes CP-SAT solves through the active session of the calling thread."""
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        for name in ("solve", "Solve"):
+            if hasattr(cp_model.CpSolver, name):
+                setattr(cp_model.CpSolver, name, _wrap(getattr(cp_model.CpSolver, name)))
+        _installed = True
+
+
+def current() -> typing.Optional[Session]:
+    """Returns the active session of the calling thread, if any."""
+    return getattr(_local, "session", None)
+
+
+@contextlib.contextmanager
+def session(active: typing.Optional[Session] = None) -> typing.Iterator[Session]:
+    """Activates a session for the solves performed on the current thread.
+
+    A session activated on a thread without one keeps its parent, which lets worker threads report to the session that started them.
+    """
+    install()
+    active = active or Session()
+    previous = getattr(_local, "session", None)
+    if previous is not active and not isinstance(previous, type(None)):
+        active.parent = previous
+    _local.session = active
+    try:
+        yield active
+    finally:
+        _local.session = previous
@@ -0,0 +1,356 @@
+"""A local catalog of designer results, deduplicated up to symmetry and indexed for querying."""
+
+from . import registry
+from . import rjb
+from . import utils
+
+import hashlib
+import itertools
+import json
+import math
+import os
+import pathlib
+import re
+import sqlite3
+import time
+import typing
+
+import reiuji
+import typer
+import rich
+import rich.markup
+import rich.table
+from ortools.sat.python import cp_model
+from ortools.sat import cp_model_pb2
+
+
+KINDS = {
+    "TurbineRotorDesigner": "overhauled turbine-rotor",
+    "TurbineDynamoDesigner": "overhauled turbine-dynamo",
+    "LinearAcceleratorDesigner": "qmd linear",
+    "SynchrotronDesigner": "qmd synchrotron",
+    "DeceleratorDesigner": "qmd decelerator",
+    "NucleosynthesisDesigner": "qmd nucleosynthesis"
+}
+# The axes each designer's symmetry options mirror. Mirroring a design along them gives an equivalent design, so mirror images are stored once.
+SYMMETRY_AXES = {
+    "overhauled turbine-rotor": (),
+    "overhauled turbine-dynamo": (0, 1),
+    "qmd linear": (1, 2),
+    "qmd synchrotron": (2,),
+    "qmd decelerator": (2,),
+    "qmd nucleosynthesis": (0, 1)
+}
+PREVIEW_AXES = {
+    "overhauled turbine-rotor": (0,),
+    "overhauled turbine-dynamo": (0, 1),
+    "qmd linear": (0, 2, 1),
+    "qmd synchrotron": (2, 0, 1),
+    "qmd decelerator": (2, 0, 1),
+    "qmd nucleosynthesis": (2, 0, 1)
+}
+COLUMNS = {
+    "kind": "r.kind",
+    "status": "r.status",
+    "objective": "r.objective",
+    "created": "r.created",
+    "hash": "r.design",
+    "cells": "d.cells"
+}
+OPERATORS = (">=", "<=", "!=", "=", ">", "<")
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS designs (
+    hash TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    shape TEXT NOT NULL,
+    cells INTEGER NOT NULL,
+    counts TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    objective REAL,
+    design TEXT REFERENCES designs (hash),
+    created REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS results_unique ON results (kind, params, ifnull(design, ''));
+CREATE INDEX IF NOT EXISTS results_kind ON results (kind, status);
+"""
+
+
+def store_dir() -> pathlib.Path:
+    """Returns the directory holding the design store."""
+    if "REIUJI_STORE_DIR" in os.environ:
+        return pathlib.Path(os.environ["REIUJI_STORE_DIR"])
+    return pathlib.Path(os.environ.get("XDG_DATA_HOME", pathlib.Path.home() / ".local" / "share")) / "reiuji" / "store"
+
+
+def blob_path(key: str) -> pathlib.Path:
+    return store_dir() / "blobs" / key[:2] / f"{key}.rjb"
+
+
+def connect() -> sqlite3.Connection:
+    directory = store_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(directory / "catalog.sqlite", timeout=30.0)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def index_params(params: dict[str, typing.Any]) -> dict[str, typing.Any]:
+    """Converts designer arguments to JSON, replacing the component list by its hash."""
+    args = {}
+    for name, value in params.items():
+        if name == "components":
+            args[name] = "default" if isinstance(value, type(None)) else registry.digest(value)
+        elif name == "component_limits":
+            args[name] = {comp: list(limit) for comp, limit in value.items()}
+        else:
+            args[name] = value
+    return args
+
+
+def flips(shape: tuple[int, ...], axes: tuple[int, ...]) -> typing.Iterator[list[int]]:
+    """Yields, for every combination of mirrors along the given axes, the flat index each cell of the mirrored design is read from."""
+    strides = [math.prod(shape[i + 1:]) for i in range(len(shape))]
+    cells = list(itertools.product(*(range(length) for length in shape)))
+    for mirrored in itertools.product((False, True), repeat=len(axes)):
+        flipped = {axis for axis, mirror in zip(axes, mirrored) if mirror}
+        yield [
+            sum((shape[axis] - 1 - i if axis in flipped else i) * strides[axis] for axis, i in enumerate(idx))
+            for idx in cells
+        ]
+
+
+def canonicalize(
+        kind: str,
+        design: reiuji.core.multi_sequence.MultiSequence[reiuji.components.types.Component],
+        axes: tuple[int, ...] = ()
+    ) -> tuple[str, reiuji.core.multi_sequence.MultiSequence[reiuji.components.types.Component]]:
+    """Picks the same representative for a design and all of its mirror images along the given axes, and hashes it."""
+    cells = [design[i] for i in range(len(design))]
+    names = [comp.full_name for comp in cells]
+    order = min(flips(design.shape, tuple(axis for axis in axes if axis < len(design.shape))), key=lambda order: [names[i] for i in order])
+    palette = {comp.full_name: comp for comp in cells}
+    payload = json.dumps({
+        "kind": kind,
+        "shape": list(design.shape),
+        "cells": [names[i] for i in order],
+        "palette": json.loads(registry.component_adapter().dump_json([palette[name] for name in sorted(palette)]))
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest(), reiuji.core.multi_sequence.MultiSequence([cells[i] for i in order], design.shape)
+
+
+def publish(
+        designer_cls: type,
+        params: dict[str, typing.Any],
+        status: cp_model_pb2.CpSolverStatus,
+        design: reiuji.core.multi_sequence.MultiSequence[reiuji.components.types.Component] | None,
+        objective: float | None = None
+    ) -> str | None:
+    """Adds a designer result to the store and returns the hash of its design.
+
+    Designs that are mirror images of a stored design are not stored again, but the parameters and status of every result are indexed.
+    """
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE, cp_model.INFEASIBLE):
+        return None
+    kind = KINDS.get(designer_cls.__name__, designer_cls.__name__)
+    key = None
+    now = time.time()
+    with connect() as connection:
+        if not isinstance(design, type(None)):
+            key, canonical = canonicalize(kind, design, SYMMETRY_AXES.get(kind, ()))
+            path = blob_path(key)
+            if not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = path.with_name(f".{key}.tmp")
+                rjb.write(canonical, tmp_path)
+                os.replace(tmp_path, path)
+            counts: dict[str, int] = {}
+            for comp in canonical:
+                counts[comp.full_name] = counts.get(comp.full_name, 0) + 1
+            connection.execute(
+                "INSERT OR IGNORE INTO designs (hash, kind, shape, cells, counts, created) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, kind, json.dumps(list(design.shape)), len(design), json.dumps(counts, sort_keys=True), now)
+            )
+        # A later run with the same parameters may prove the same design optimal.
+        connection.execute(
+            "INSERT INTO results (kind, params, status, objective, design, created) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (kind, params, ifnull(design, '')) DO UPDATE SET status = excluded.status, objective = ifnull(excluded.objective, objective) WHERE excluded.status = 'OPTIMAL'",
+            (kind, json.dumps(index_params(params), sort_keys=True), cp_model_pb2.CpSolverStatus.Name(status), objective, key, now)
+        )
+    connection.close()
+    return key
+
+
+def parse_filter(text: str) -> tuple[str, str, typing.Any]:
+    """Splits a `field<op>value` filter, converting the value to a number or boolean where possible."""
+    match = re.fullmatch(rf"\s*(.+?)\s*({'|'.join(re.escape(op) for op in OPERATORS)})\s*(.*?)\s*", text)
+    if isinstance(match, type(None)):
+        raise ValueError(f"Expected a filter such as side_length<=12, got: {text}")
+    field, op, value = match.groups()
+    if value.lower() in ("true", "false"):
+        return field, op, int(value.lower() == "true")
+    try:
+        return field, op, float(value)
+    except ValueError:
+        return field, op, value
+
+
+def field_sql(field: str) -> tuple[str, list[typing.Any]]:
+    """Maps a query field to an SQL expression: a result column, `count.<component>` for a component count, or a designer parameter."""
+    if field in COLUMNS:
+        return COLUMNS[field], []
+    if field.startswith("count."):
+        return "ifnull(json_extract(d.counts, ?), 0)", [f'$."{field[len("count."):]}"']
+    return "json_extract(r.params, ?)", [f'$."{field.replace("-", "_")}"']
+
+
+def query(
+        kind: str | None = None,
+        filters: list[tuple[str, str, typing.Any]] = [],
+        statuses: list[str] = ["OPTIMAL", "FEASIBLE"],
+        order_by: list[str] = [],
+        descending: bool = False,
+        limit: int | None = None
+    ) -> list[dict[str, typing.Any]]:
+    """Looks up indexed results matching every filter."""
+    clauses = []
+    args: list[typing.Any] = []
+    if not isinstance(kind, type(None)):
+        clauses.append("r.kind = ?")
+        args.append(kind)
+    if len(statuses) > 0:
+        clauses.append(f"r.status IN ({", ".join("?" for _ in statuses)})")
+        args.extend(statuses)
+    for field, op, value in filters:
+        expression, params = field_sql(field)
+        clauses.append(f"{expression} {op} ?")
+        args.extend([*params, value])
+    sql = "SELECT r.kind, r.status, r.objective, r.params, r.design, d.shape, d.counts FROM results r LEFT JOIN designs d ON d.hash = r.design"
+    if len(clauses) > 0:
+        sql += " WHERE " + " AND ".join(clauses)
+    orders = []
+    for field in order_by:
+        expression, params = field_sql(field)
+        orders.append(f"{expression} {"DESC" if descending else "ASC"}")
+        args.extend(params)
+    orders.append("r.created DESC")
+    sql += " ORDER BY " + ", ".join(orders)
+    if not isinstance(limit, type(None)):
+        sql += " LIMIT ?"
+        args.append(limit)
+    with connect() as connection:
+        rows = connection.execute(sql, args).fetchall()
+    connection.close()
+    return [
+        {
+            "kind": kind,
+            "status": status,
+            "objective": objective,
+            "params": json.loads(params),
+            "hash": key,
+            "shape": None if isinstance(shape, type(None)) else json.loads(shape),
+            "counts": None if isinstance(counts, type(None)) else json.loads(counts)
+        }
+        for kind, status, objective, params, key, shape, counts in rows
+    ]
+
+
+def resolve(prefix: str) -> tuple[str, str]:
+    """Expands a unique hash prefix to a full design hash and its kind, raising `KeyError` if none or several match."""
+    with connect() as connection:
+        matches = connection.execute("SELECT hash, kind FROM designs WHERE hash LIKE ? LIMIT 2", (f"{prefix}%",)).fetchall()
+    connection.close()
+    if len(matches) != 1:
+        raise KeyError(prefix)
+    return matches[0]
+
+
+store_app = typer.Typer(help="Commands for querying the design store.\n\nDesigns published with `--store` are kept in `$REIUJI_STORE_DIR` (default `~/.local/share/reiuji/store`). Mirror images of a design are stored once, and the parameters, status and component counts of every result are indexed.")
+
+
+@store_app.command("query")
+def store_query(
+    kind: typing.Annotated[typing.Optional[str], typer.Option("--kind", "-k", help="The kind of design to look for, such as \"qmd synchrotron\".", rich_help_panel="Filter Options")] = None,
+    where: typing.Annotated[list[str], typer.Option("--where", "-w", help="A filter of the form field<op>value, where field is a designer parameter (e.g. maximum_energy), count.<component>, status or objective and op is one of =, !=, <, <=, > or >=.", rich_help_panel="Filter Options")] = [],
+    statuses: typing.Annotated[list[str], typer.Option("--status", help="The solver statuses to include. Defaults to OPTIMAL and FEASIBLE.", rich_help_panel="Filter Options")] = [],
+    order_by: typing.Annotated[list[str], typer.Option("--order-by", "-o", help="A field to sort the results by, such as side_length.", rich_help_panel="Output Options")] = [],
+    descending: typing.Annotated[bool, typer.Option("--descending", help="Whether to sort the results in descending order.", rich_help_panel="Output Options")] = False,
+    limit: typing.Annotated[int, typer.Option("--limit", "-n", help="The maximum number of results to show.", rich_help_panel="Output Options")] = 20,
+    as_json: typing.Annotated[bool, typer.Option("--json", help="Whether to print the results as JSON instead of a table.", rich_help_panel="Output Options")] = False
+) -> None:
+    """Find stored designs without solving again.
+
+    For example, the smallest synchrotron reaching at least 400 MeV with a focus of at least 1.5:
+    `reiuji store query -k "qmd synchrotron" -w "minimum_energy>=400" -w "target_focus>=1.5" -o side_length -n 1`
+    """
+    try:
+        filters = [parse_filter(text) for text in where]
+    except ValueError as e:
+        rich.print(f"[red][bold]ERROR:[/bold] {rich.markup.escape(str(e))}[/red]")
+        raise typer.Exit(code=1)
+    results = query(kind, filters, [status.upper() for status in statuses] or ["OPTIMAL", "FEASIBLE"], order_by, descending, limit)
+    if as_json:
+        print(json.dumps(results, indent=4))
+        return
+    shown = list(dict.fromkeys(field.partition("<")[0].partition(">")[0].partition("=")[0].partition("!")[0].strip() for field in [*where, *order_by]))
+    table = rich.table.Table(title="Stored Designs")
+    table.add_column("Hash")
+    table.add_column("Kind")
+    table.add_column("Status")
+    table.add_column("Objective")
+    for field in shown:
+        table.add_column(field)
+    for result in results:
+        values = []
+        for field in shown:
+            if field.startswith("count."):
+                value = (result["counts"] or {}).get(field[len("count."):], 0)
+            else:
+                value = result.get(field, result["params"].get(field.replace("-", "_")))
+            values.append(rich.markup.escape(str(value)))
+        objective = result["objective"]
+        table.add_row((result["hash"] or "-")[:12], result["kind"], result["status"], "-" if isinstance(objective, type(None)) else f"{objective:g}", *values)
+    rich.print(table)
+
+
+@store_app.command("get")
+def store_get(
+    key: typing.Annotated[str, typer.Argument(help="The hash of the design, or a unique prefix of it.")],
+    output: typing.Annotated[list[pathlib.Path], typer.Option("--output", "-O", help="The path(s) to output the design to.", rich_help_panel="Output Options")] = [],
+    preview: typing.Annotated[utils.PreviewMode, typer.Option("--preview", "-p", help="How to print the design to the terminal.", rich_help_panel="Output Options")] = utils.PreviewMode.FULL
+) -> None:
+    """Print a stored design and write it to JSON or binary blueprints."""
+    try:
+        key, kind = resolve(key)
+        design = rjb.read(blob_path(key))
+    except (KeyError, OSError):
+        rich.print(f"[red][bold]ERROR:[/bold] No single stored design matches {rich.markup.escape(key)}.[/red]")
+        raise typer.Exit(code=1)
+    utils.print_design(design, PREVIEW_AXES.get(kind, tuple(range(len(design.shape)))), preview)
+    utils.write_designs(design, output)
+
+
+@store_app.command("stats")
+def store_stats() -> None:
+    """Show statistics about the design store."""
+    with connect() as connection:
+        kinds = connection.execute(
+            "SELECT r.kind, count(*), count(DISTINCT r.design), sum(r.status = 'INFEASIBLE') FROM results r GROUP BY r.kind ORDER BY r.kind"
+        ).fetchall()
+    connection.close()
+    size = sum(path.stat().st_size for path in store_dir().rglob("*") if path.is_file())
+    table = rich.table.Table(title="Design Store")
+    table.add_column("Kind")
+    table.add_column("Results")
+    table.add_column("Unique Designs")
+    table.add_column("Infeasible")
+    for kind, results, designs, infeasible in kinds:
+        table.add_row(kind, str(results), str(designs), str(infeasible))
+    rich.print(table)
+    rich.print(f"[blue]{store_dir()}: {size / 1024 / 1024:.2f} MiB[/blue]")
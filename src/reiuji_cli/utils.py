@@ -1,12 +1,18 @@
 """Utility functions for the Reiuji CLI."""
 
+from . import rjb
+from . import registry
+from . import profiler
+from . import schematic
+
 import enum
+import itertools
+import os
 import pathlib
 import json
 
 import rich
 import rich.markup
-import pydantic
 import reiuji
 from ortools.sat.python import cp_model
 from ortools.sat import cp_model_pb2
@@ -17,6 +23,7 @@ class Facing(enum.StrEnum):
     Z = "z"
 
 
+@profiler.traced("load limits")
 def load_limits(path: pathlib.Path | None) -> dict[str, tuple[int, int]]:
     if isinstance(path, pathlib.Path):
         with path.open("r") as file:
@@ -24,17 +31,28 @@ def load_limits(path: pathlib.Path | None) -> dict[str, tuple[int, int]]:
     return {}
 
 
+@profiler.traced("load components")
 def load_component_list(path: pathlib.Path | None) -> list[reiuji.components.types.Component] | None:
     if isinstance(path, pathlib.Path):
-        with path.open("r") as file:
-            return pydantic.TypeAdapter(list[reiuji.components.types.Component]).validate_json(file.read())
+        return registry.load(path, rjb.loads_components if path.suffix == ".rjb" else registry.component_adapter().validate_json)
     return None
 
 
+@profiler.traced("load design")
+def load_design(path: pathlib.Path) -> reiuji.core.multi_sequence.MultiSequence[reiuji.components.types.Component]:
+    if path.suffix == ".rjb":
+        return rjb.read(path)
+    with path.open("r") as file:
+        return reiuji.io.serialization.SerializableMultiSequence.model_validate_json(file.read()).to_multi_sequence()
+
+
 def write_component_list(components: list[reiuji.components.types.Component], path: pathlib.Path) -> None:
     if path.suffix == ".json":
         with path.open("w") as file:
-            file.write(pydantic.TypeAdapter(list[reiuji.components.types.Component]).dump_json(components, indent=4).decode("utf-8"))
+            file.write(registry.component_adapter().dump_json(components, indent=4).decode("utf-8"))
+    elif path.suffix == ".rjb":
+        with path.open("wb") as file:
+            file.write(rjb.dumps_components(components))
     else:
         rich.print(f"[yellow][bold]WARNING:[/bold] Unsupported file format: {path.suffix}[/yellow]")
 
@@ -54,6 +72,65 @@ def format_text_rich(text: str, *, bold: bool = False, italic: bool = False, col
     return f"[{" ".join(tags)}]{rich.markup.escape(text)}[/{" ".join(tags)}]"
 
 
+class PreviewMode(enum.StrEnum):
+    FULL = "full"
+    COMPACT = "compact"
+    NONE = "none"
+
+
+class SymmetryMode(enum.StrEnum):
+    MANUAL = "manual"
+    AUTO = "auto"
+
+
+def format_component_rich(comp: reiuji.components.types.Component) -> str:
+    return format_text_rich(comp.display.short_name, bold=comp.display.bold, italic=comp.display.italic, color=comp.display.color, bg_color=comp.display.bg_color)
+
+
+@profiler.traced("preview")
+def print_design(
+        design: reiuji.core.multi_sequence.MultiSequence[reiuji.components.types.Component],
+        axes: tuple[int, ...],
+        mode: PreviewMode = PreviewMode.FULL
+    ) -> None:
+    """Prints a design to the terminal.
+
+    `axes` lists the design's axes in the order (layer, row, column) for 3D designs and (row, column) for 2D designs.
+    Each layer is rendered into a single buffer before being written, and the markup for each distinct component is only built once.
+    """
+    if mode == PreviewMode.NONE:
+        return
+    console = rich.get_console()
+    markup: dict[str, str] = {}
+    # Lower-dimensional designs are treated as a single layer (and a single row).
+    missing = 3 - len(axes)
+    shape = [1] * missing + [design.shape[axis] for axis in axes]
+
+    def cell(coords: tuple[int, int, int]) -> str:
+        idx = [0] * len(axes)
+        for axis, coord in zip(axes, coords[missing:]):
+            idx[axis] = coord
+        comp = design[tuple(idx) if len(idx) > 1 else idx[0]]
+        if comp.full_name not in markup:
+            markup[comp.full_name] = format_component_rich(comp)
+        return markup[comp.full_name]
+
+    totals: dict[str, int] = {}
+    for layer in range(shape[0]):
+        grid = [[cell((layer, row, col)) for col in range(shape[2])] for row in range(shape[1])]
+        if mode == PreviewMode.COMPACT:
+            counts: dict[str, int] = {}
+            for name in itertools.chain.from_iterable(grid):
+                counts[name] = counts.get(name, 0) + 1
+                totals[name] = totals.get(name, 0) + 1
+            if len(axes) == 3:
+                console.print(f"Layer {layer}: " + ", ".join(f"{name} x{count}" for name, count in counts.items()), soft_wrap=True)
+        else:
+            console.print("\n".join(" ".join(row) for row in grid) + ("\n" if len(axes) == 3 else ""), soft_wrap=True)
+    if mode == PreviewMode.COMPACT:
+        console.print("Total: " + ", ".join(f"{name} x{count}" for name, count in totals.items()), soft_wrap=True)
+
+
 def print_status(status: cp_model_pb2.CpSolverStatus) -> None:
     if status == cp_model.OPTIMAL:
         rich.print("[green][bold]STATUS:[/bold] Optimal solution found[/green]")
@@ -67,6 +144,13 @@ def print_status(status: cp_model_pb2.CpSolverStatus) -> None:
         rich.print("[red][bold]STATUS:[/bold] Error[/red]")
 
 
+def print_progress(solution) -> None:
+    text = f"[bold]{solution.elapsed:8.2f}s[/bold] solution #{solution.index}"
+    if not isinstance(solution.objective, type(None)):
+        text += f", objective {solution.objective:g}, bound {solution.bound:g}"
+    rich.print(f"[cyan]{text}[/cyan]")
+
+
 def write_design(
         design: reiuji.core.multi_sequence.MultiSequence[reiuji.components.types.Component],
         path: pathlib.Path,
@@ -74,15 +158,56 @@ def write_design(
         schematic_type: str | None = None,
         **kwargs
     ) -> None:
-    if path.suffix == ".json":
-        with path.open("w") as file:
-            file.write(reiuji.io.serialization.SerializableMultiSequence.from_multi_sequence(design).model_dump_json(indent=4))
-    elif path.suffix == ".schematic":
-        if schematic_type == "accelerator":
-            reiuji.io.schematics.accelerator.AcceleratorSchematicWriter(design, **kwargs).write(path)
-        elif schematic_type == "nucleosynthesis":
-            reiuji.io.schematics.nucleosynthesis.NucleosynthesisSchematicWriter(design, **kwargs).write(path)
+    # Write to a temporary file first so that an interrupted write never leaves a truncated design behind.
+    tmp_path = path.with_name(f".{path.stem}.tmp{path.suffix}")
+    with profiler.span("write", path=str(path)):
+        if path.suffix == ".json":
+            with tmp_path.open("w") as file:
+                file.write(reiuji.io.serialization.SerializableMultiSequence.from_multi_sequence(design).model_dump_json(indent=4))
+        elif path.suffix == ".rjb":
+            rjb.write(design, tmp_path, **kwargs)
+        elif path.suffix == ".schematic":
+            if schematic_type == "accelerator":
+                schematic.write(reiuji.io.schematics.accelerator.AcceleratorSchematicWriter(design, **kwargs), tmp_path)
+            elif schematic_type == "nucleosynthesis":
+                schematic.write(reiuji.io.schematics.nucleosynthesis.NucleosynthesisSchematicWriter(design, **kwargs), tmp_path)
+            else:
+                rich.print("[yellow][bold]WARNING:[/bold] Schematic output is not supported for this designer.[/yellow]")
+                return
         else:
-            rich.print("[yellow][bold]WARNING:[/bold] Schematic output is not supported for this designer.[/yellow]")
-    else:
+            rich.print(f"[yellow][bold]WARNING:[/bold] Unsupported file format: {path.suffix}[/yellow]")
+            return
+        os.replace(tmp_path, path)
+
+
+def write_turbine(
+        rotor: reiuji.core.multi_sequence.MultiSequence[reiuji.components.types.Component],
+        dynamo: reiuji.core.multi_sequence.MultiSequence[reiuji.components.types.Component],
+        path: pathlib.Path,
+        *,
+        shaft_width: int,
+        **kwargs
+    ) -> None:
+    if path.suffix != ".schematic":
         rich.print(f"[yellow][bold]WARNING:[/bold] Unsupported file format: {path.suffix}[/yellow]")
+        return
+    tmp_path = path.with_name(f".{path.stem}.tmp{path.suffix}")
+    with profiler.span("write", path=str(path)):
+        schematic.write(reiuji.io.schematics.turbine.TurbineSchematicWriter(dynamo, rotor, shaft_width, **kwargs), tmp_path)
+        os.replace(tmp_path, path)
+
+
+def write_designs(
+        design: reiuji.core.multi_sequence.MultiSequence[reiuji.components.types.Component],
+        paths: list[pathlib.Path],
+        **kwargs
+    ) -> None:
+    for path in paths:
+        write_design(design, path, **kwargs)
+
+
+def solution_paths(paths: list[pathlib.Path], index: int, solutions: int) -> list[pathlib.Path]:
+    """Returns the output paths of the `index`-th of several designs, e.g. `design-2.json` for `design.json`, or the paths unchanged for a single design."""
+    if solutions == 1:
+        return paths
+    return [path.with_name(f"{path.stem}-{index}{path.suffix}") for path in paths]
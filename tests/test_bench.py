@@ -0,0 +1,53 @@
+import pytest
+
+from reiuji_cli import bench
+
+
+def result(name: str = "case", status: str = "OPTIMAL", **metrics) -> dict:
+    return {"name": name, "status": status, **metrics}
+
+
+def compare(results: list[dict], baseline: list[dict]) -> list[str]:
+    return bench.compare(results, {"results": baseline}, time_threshold=0.25, memory_threshold=0.1, min_delta=0.5)
+
+
+def test_no_regressions() -> None:
+    baseline = [result(first_solution=2.0, optimal_time=4.0, peak_rss=100 * 1024 * 1024)]
+    assert compare([result(first_solution=2.4, optimal_time=3.0, peak_rss=105 * 1024 * 1024)], baseline) == []
+
+
+@pytest.mark.parametrize(
+    ("before", "after"),
+    [
+        ({"status": "OPTIMAL"}, {"status": "FEASIBLE"}),
+        ({"status": "INFEASIBLE"}, {"status": "UNKNOWN"}),
+        ({"optimal_time": 4.0}, {"optimal_time": 6.0}),
+        ({"write_time": 1.0}, {"write_time": 2.0}),
+        ({"peak_rss": 100 * 1024 * 1024}, {"peak_rss": 120 * 1024 * 1024}),
+        ({"first_solution": 1.0}, {}),
+    ]
+)
+def test_regressions(before: dict, after: dict) -> None:
+    regressions = compare([result(**after)], [result(**before)])
+    assert len(regressions) == 1
+    assert regressions[0].startswith("case: ")
+
+
+def test_small_slowdowns_are_noise() -> None:
+    assert compare([result(first_solution=0.3)], [result(first_solution=0.1)]) == []
+
+
+def test_better_status_and_new_cases_are_ignored() -> None:
+    assert compare([result(status="OPTIMAL"), result("new", status="ERROR")], [result(status="FEASIBLE")]) == []
+
+
+def test_select_cases_adds_requirements() -> None:
+    corpus = [
+        bench.BenchCase(name="rotor", kind="overhauled turbine-rotor", args={}),
+        bench.BenchCase(name="dynamo", kind="overhauled turbine-dynamo", args={}, requires=["rotor"]),
+        bench.BenchCase(name="linear", kind="qmd linear", args={})
+    ]
+    assert [case.name for case in bench.select_cases(corpus, ["dyn*"])] == ["rotor", "dynamo"]
+    assert [case.name for case in bench.select_cases(corpus, None)] == ["rotor", "dynamo", "linear"]
+    with pytest.raises(ValueError):
+        bench.select_cases([bench.BenchCase(name="x", kind="qmd linear", args={}, requires=["missing"])], ["x"])
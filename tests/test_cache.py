@@ -0,0 +1,90 @@
+import os
+import pathlib
+
+import pytest
+import reiuji
+from ortools.sat.python import cp_model
+
+from reiuji_cli import cache
+from reiuji_cli import solver
+
+
+class Designer:
+    pass
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> pathlib.Path:
+    monkeypatch.setenv("REIUJI_CACHE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def design() -> reiuji.core.multi_sequence.MultiSequence:
+    components = reiuji.components.defaults.OVERHAULED_TURBINE_ROTOR_COMPONENTS
+    return reiuji.core.multi_sequence.MultiSequence(components[:3], (3,))
+
+
+def test_key_is_canonical() -> None:
+    params = {"length": 8, "component_limits": {"a": (0, 1)}}
+    key = cache.make_key(Designer, params)
+    assert key == cache.make_key(Designer, {"component_limits": {"a": [0, 1]}, "length": 8})
+    assert key != cache.make_key(Designer, {**params, "length": 9})
+    assert cache.make_key(Designer, {"components": None}) == cache.make_key(Designer, {"components": None})
+
+
+def test_key_includes_solver_params() -> None:
+    params = {"length": 8}
+    key = cache.make_key(Designer, params, ["relative_gap_limit=0.5"])
+    assert key != cache.make_key(Designer, params)
+    assert key == cache.make_key(Designer, params, [" relative_gap_limit = 0.5 "])
+    assert cache.make_key(Designer, params, ["a=1", "b=2"]) == cache.make_key(Designer, params, ["b=2", "a=1"])
+
+
+def test_round_trip() -> None:
+    cache.put("key", 10.0, cp_model.OPTIMAL, design(), 12.5)
+    status, cached, objective = cache.get("key", None)
+    assert status == cp_model.OPTIMAL
+    assert [comp.full_name for comp in cached] == [comp.full_name for comp in design()]
+    assert objective == 12.5
+
+
+def test_missing_objective_loads() -> None:
+    cache.put("key", None, cp_model.INFEASIBLE, None)
+    assert cache.get("key", 5.0) == (cp_model.INFEASIBLE, None, None)
+    assert cache.get("other", 5.0) is None
+
+
+@pytest.mark.parametrize(("stored", "requested", "hit"), [
+    (10.0, 5.0, True),
+    (10.0, 10.0, True),
+    (10.0, 20.0, False),
+    (10.0, None, False),
+    (None, None, True),
+    (None, 20.0, True)
+])
+def test_feasible_depends_on_time_limit(stored: float | None, requested: float | None, hit: bool) -> None:
+    cache.put("key", stored, cp_model.FEASIBLE, design(), 1.0)
+    assert (cache.get("key", requested) is not None) == hit
+
+
+def test_unknown_is_not_stored(cache_dir: pathlib.Path) -> None:
+    cache.put("key", 1.0, cp_model.UNKNOWN, None)
+    assert cache.get("key", 1.0) is None
+    assert list(cache_dir.iterdir()) == []
+
+
+def test_evict_removes_least_recently_used(cache_dir: pathlib.Path) -> None:
+    for i, key in enumerate(("old", "new")):
+        cache.put(key, None, cp_model.INFEASIBLE, None)
+        os.utime(cache_dir / f"{key}.json", (i, i))
+    size = (cache_dir / "new.json").stat().st_size
+    assert cache.evict(size) == 1
+    assert cache.get("old", None) is None
+    assert cache.get("new", None) is not None
+
+
+def test_time_limit_follows_solver_params() -> None:
+    assert solver.SolverOptions().time_limit(None) is None
+    assert solver.SolverOptions().time_limit(5.0) == 5.0
+    assert solver.SolverOptions(params=["max_time_in_seconds=2"]).time_limit(None) == 2.0
+    assert solver.SolverOptions(params=["max_time_in_seconds=2"]).time_limit(5.0) == 2.0
@@ -0,0 +1,67 @@
+import pytest
+
+from reiuji_cli import feasibility
+
+reiuji = pytest.importorskip("reiuji")
+
+
+def dynamo(**kwargs):
+    return reiuji.designer.overhauled.turbine_dynamo.designer.TurbineDynamoDesigner(5, shaft_width=1, **kwargs)
+
+
+def test_sizes() -> None:
+    assert feasibility.check_sizes({"side_length": 5, "shaft_width": 1}) == []
+    assert len(feasibility.check_sizes({"length": 0})) == 1
+    assert len(feasibility.check_sizes({"side_length": 5, "shaft_width": 2})) == 1
+
+
+def test_energies() -> None:
+    assert feasibility.check_energies({"minimum_energy": 10, "maximum_energy": None}) == []
+    assert len(feasibility.check_energies({"minimum_energy": 20, "maximum_energy": 10})) == 1
+
+
+def test_limits_null_bounds() -> None:
+    components = dynamo().components
+    assert feasibility.check_limits({"coil:gold": (None, 4), "coil:copper": (2, None)}, components, 25) == []
+
+
+@pytest.mark.parametrize(
+    ("limits", "cells"),
+    [
+        ({"coil:gold": (-1, None)}, 25),
+        ({"coil:gold": (None, -1)}, 25),
+        ({"coil:gold": (5, 4)}, 25),
+        ({"coil:unobtainium": (0, 1)}, 25),
+        ({"coil:gold": (20, None), "coil:copper": (20, None)}, 25),
+    ]
+)
+def test_limits_errors(limits: dict, cells: int) -> None:
+    assert len(feasibility.check_limits(limits, dynamo().components, cells)) > 0
+
+
+def test_limits_capacity() -> None:
+    components = dynamo().components
+    limits = {comp.full_name: (0, 1) for comp in components}
+    assert len(feasibility.check_limits(limits, components, 25)) == 1
+
+
+def test_required_types() -> None:
+    assert feasibility.required_types(dynamo()) == {"casing": 24, "bearing": 1}
+
+
+@pytest.mark.parametrize(
+    ("limits", "kind"),
+    [
+        ({"casing:": (0, 10)}, "casing"),
+        ({"bearing:": (0, 0)}, "bearing"),
+    ]
+)
+def test_type_capacity(limits: dict, kind: str) -> None:
+    errors = feasibility.check({"side_length": 5, "shaft_width": 1, "component_limits": limits}, dynamo(component_limits=limits))
+    assert len(errors) == 1
+    assert f"{kind} cells" in errors[0]
+
+
+def test_type_capacity_satisfied() -> None:
+    limits = {"casing:": (0, 24), "bearing:": (1, 1)}
+    assert feasibility.check({"side_length": 5, "shaft_width": 1, "component_limits": limits}, dynamo(component_limits=limits)) == []
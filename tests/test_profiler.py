@@ -0,0 +1,36 @@
+import pathlib
+
+import pytest
+
+from reiuji_cli import profiler
+
+cp_model = pytest.importorskip("ortools.sat.python.cp_model")
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_presolve_split(workers: int, tmp_path: pathlib.Path) -> None:
+    model = cp_model.CpModel()
+    x = model.NewIntVar(0, 10, "x")
+    y = model.NewIntVar(0, 10, "y")
+    model.Add(x + y >= 7)
+    model.Minimize(3 * x + 2 * y)
+    solver = cp_model.CpSolver()
+    solver.parameters.num_workers = workers
+    with profiler.profile(tmp_path / "profile.json", command="test") as recorded:
+        capture = profiler.SolveCapture(solver, model)
+        status = solver.Solve(model)
+        capture.finish(solver, solver.StatusName(status))
+    assert len(recorded.solves) == 1
+    stats = recorded.solves[0]
+    assert stats["status"] == "OPTIMAL"
+    assert stats["workers"] == workers
+    assert stats["presolve_time"] is not None
+    assert stats["search_time"] is not None
+    assert stats["first_solution_time"] is not None
+
+
+@pytest.mark.parametrize("line", ["Starting search at 0.12s with 1 workers.", "Starting sequential search at 0.12s"])
+def test_search_start_log_forms(line: str) -> None:
+    capture = profiler.SolveCapture.__new__(profiler.SolveCapture)
+    capture.log = ["Starting presolve at 0.00s", line]
+    assert capture._log_time(profiler.SEARCH_START) == 0.12
@@ -0,0 +1,83 @@
+import os
+import pathlib
+import pickle
+
+import pytest
+
+from reiuji_cli import registry
+
+reiuji = pytest.importorskip("reiuji")
+
+
+@pytest.fixture(autouse=True)
+def empty_registry() -> None:
+    registry.clear()
+    yield
+    registry.clear()
+
+
+class CountingParser:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def __call__(self, data: bytes) -> list:
+        self.calls += 1
+        return registry.component_adapter().validate_json(data)
+
+
+def write_components(path: pathlib.Path, components: list) -> pathlib.Path:
+    path.write_bytes(registry.component_adapter().dump_json(components))
+    return path
+
+
+def test_memoized_by_path(tmp_path: pathlib.Path) -> None:
+    path = write_components(tmp_path / "components.json", reiuji.components.defaults.OVERHAULED_TURBINE_DYNAMO_COMPONENTS)
+    parse = CountingParser()
+    first = registry.load(path, parse)
+    assert registry.load(path, parse) is first
+    assert parse.calls == 1
+
+
+def test_shared_by_content(tmp_path: pathlib.Path) -> None:
+    components = reiuji.components.defaults.OVERHAULED_TURBINE_DYNAMO_COMPONENTS
+    parse = CountingParser()
+    first = registry.load(write_components(tmp_path / "a.json", components), parse)
+    assert registry.load(write_components(tmp_path / "b.json", components), parse) is first
+    assert parse.calls == 1
+
+
+def test_invalidated_by_changes(tmp_path: pathlib.Path) -> None:
+    path = write_components(tmp_path / "components.json", reiuji.components.defaults.OVERHAULED_TURBINE_DYNAMO_COMPONENTS)
+    parse = CountingParser()
+    first = registry.load(path, parse)
+    write_components(path, reiuji.components.defaults.OVERHAULED_TURBINE_DYNAMO_COMPONENTS[:3])
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    second = registry.load(path, parse)
+    assert second is not first
+    assert len(second) == 3
+    assert parse.calls == 2
+
+
+def test_evicts_oldest(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(registry, "MAX_ENTRIES", 2)
+    components = reiuji.components.defaults.OVERHAULED_TURBINE_DYNAMO_COMPONENTS
+    parse = CountingParser()
+    paths = [write_components(tmp_path / f"{i}.json", components[:i + 1]) for i in range(3)]
+    for path in paths:
+        registry.load(path, parse)
+    registry.load(paths[2], parse)
+    assert parse.calls == 3
+    registry.load(paths[0], parse)
+    assert parse.calls == 4
+
+
+def test_lists_are_immutable(tmp_path: pathlib.Path) -> None:
+    components = registry.load(write_components(tmp_path / "components.json", reiuji.components.defaults.OVERHAULED_TURBINE_DYNAMO_COMPONENTS), CountingParser())
+    with pytest.raises(TypeError):
+        components.append(components[0])
+    with pytest.raises(TypeError):
+        components[0] = components[1]
+    copy = pickle.loads(pickle.dumps(components))
+    assert isinstance(copy, registry.ComponentList)
+    assert registry.digest(copy) == registry.digest(list(components))
@@ -0,0 +1,68 @@
+import pathlib
+
+import pytest
+
+from reiuji_cli import converter
+from reiuji_cli import rjb
+from reiuji_cli import utils
+
+reiuji = pytest.importorskip("reiuji")
+
+
+def components() -> list:
+    return reiuji.designer.overhauled.turbine_dynamo.designer.TurbineDynamoDesigner(3).components
+
+
+def names(design) -> list[str]:
+    return [comp.full_name for comp in design]
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_round_trip(compress: bool) -> None:
+    palette = components()
+    design = reiuji.core.multi_sequence.MultiSequence([palette[i % len(palette)] for i in range(24)], (2, 3, 4))
+    data = rjb.dumps(design, compress)
+    assert data[4] & rjb.FLAG_COMPRESSED == (rjb.FLAG_COMPRESSED if compress else 0)
+    loaded = rjb.loads(data)
+    assert loaded.shape == design.shape
+    assert names(loaded) == names(design)
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_empty(compress: bool) -> None:
+    loaded = rjb.loads(rjb.dumps(reiuji.core.multi_sequence.MultiSequence([], (0,)), compress))
+    assert loaded.shape == (0,)
+    assert len(loaded) == 0
+
+
+@pytest.mark.parametrize(("size", "width"), [(1, 1), (0xFF, 1), (0x100, 2), (0xFFFF, 2), (0x10000, 4)])
+def test_index_widths(size: int, width: int) -> None:
+    comp = components()[0]
+    cells = [size - 1, 0, size // 2]
+    data = rjb._pack((len(cells),), [comp] * size, cells, False)
+    shape, palette, indices = rjb._unpack(data)
+    assert indices.itemsize == width
+    assert list(indices) == cells
+    assert shape == (len(cells),)
+    assert len(palette) == size
+
+
+def test_components_round_trip() -> None:
+    assert [comp.full_name for comp in rjb.loads_components(rjb.dumps_components(components()))] == [comp.full_name for comp in components()]
+
+
+def test_rejects_other_files() -> None:
+    with pytest.raises(ValueError):
+        rjb.loads(b"{}")
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_convert_format(compress: bool, tmp_path: pathlib.Path) -> None:
+    palette = components()
+    design = reiuji.core.multi_sequence.MultiSequence([palette[i % len(palette)] for i in range(9)], (3, 3))
+    utils.write_design(design, tmp_path / "design.json")
+    converter.convert_format(tmp_path / "design.json", tmp_path / "design.rjb", compress=compress)
+    converter.convert_format(tmp_path / "design.rjb", tmp_path / "copy.json")
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["copy.json", "design.json", "design.rjb"]
+    assert (rjb.read(tmp_path / "design.rjb").shape, names(utils.load_design(tmp_path / "copy.json"))) == ((3, 3), names(design))
+    assert (tmp_path / "design.rjb").read_bytes()[4] & rjb.FLAG_COMPRESSED == (rjb.FLAG_COMPRESSED if compress else 0)
@@ -0,0 +1,51 @@
+import pathlib
+
+import pytest
+
+from reiuji_cli import schematic
+
+reiuji = pytest.importorskip("reiuji")
+nbt = pytest.importorskip("nbt.nbt")
+
+
+def cycle(components: list, shape: tuple[int, ...]) -> reiuji.core.multi_sequence.MultiSequence:
+    count = 1
+    for length in shape:
+        count *= length
+    return reiuji.core.multi_sequence.MultiSequence([components[i % len(components)] for i in range(count)], shape)
+
+
+def decode(path: pathlib.Path) -> dict:
+    """Reads a schematic with palette numbering resolved, since Reiuji numbers blocks in set order."""
+    file = nbt.NBTFile(str(path))
+    names = {tag.value: tag.name for tag in file["SchematicaMapping"].tags}
+    blocks = file["Blocks"].value
+    add_blocks = file["AddBlocks"].value
+    ids = [blocks[i] + ((add_blocks[i // 2] >> (4 * (i % 2))) & 0x0F) * 256 for i in range(len(blocks))]
+    return {
+        "size": (file["Width"].value, file["Height"].value, file["Length"].value),
+        "materials": file["Materials"].value,
+        "blocks": [names[i] for i in ids],
+        "data": list(file["Data"].value),
+        "entities": len(file["Entities"].tags),
+        "tile_entities": [sorted((tag.name, tag.value) for tag in entity.tags) for entity in file["TileEntities"].tags]
+    }
+
+
+def assert_same(writer, tmp_path: pathlib.Path) -> None:
+    writer.write(tmp_path / "reiuji.schematic")
+    schematic.write(writer, tmp_path / "streamed.schematic")
+    assert decode(tmp_path / "streamed.schematic") == decode(tmp_path / "reiuji.schematic")
+
+
+@pytest.mark.parametrize("transparent", [True, False])
+def test_accelerator(transparent: bool, tmp_path: pathlib.Path) -> None:
+    design = cycle(reiuji.components.defaults.QMD_ACCELERATOR_COMPONENTS, (4, 3, 5))
+    assert_same(reiuji.io.schematics.accelerator.AcceleratorSchematicWriter(design, transparent=transparent), tmp_path)
+
+
+@pytest.mark.parametrize("facing", ["x", "z"])
+def test_turbine(facing: str, tmp_path: pathlib.Path) -> None:
+    dynamo = cycle(reiuji.components.defaults.OVERHAULED_TURBINE_DYNAMO_COMPONENTS, (5, 5))
+    rotor = cycle(reiuji.components.defaults.OVERHAULED_TURBINE_ROTOR_COMPONENTS, (4,))
+    assert_same(reiuji.io.schematics.turbine.TurbineSchematicWriter(dynamo, rotor, 1, facing=facing), tmp_path)
@@ -0,0 +1,66 @@
+import pathlib
+
+import pytest
+
+from reiuji_cli import store
+
+reiuji = pytest.importorskip("reiuji")
+cp_model = pytest.importorskip("ortools.sat.python.cp_model")
+
+
+@pytest.fixture(autouse=True)
+def store_dir(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> pathlib.Path:
+    monkeypatch.setenv("REIUJI_STORE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def design(rows: list[list[int]]) -> reiuji.core.multi_sequence.MultiSequence:
+    components = reiuji.designer.overhauled.turbine_dynamo.designer.TurbineDynamoDesigner(3).components
+    return reiuji.core.multi_sequence.MultiSequence([components[i] for row in rows for i in row], (len(rows), len(rows[0])))
+
+
+def test_mirrors_canonicalize_together() -> None:
+    rows = [[1, 3, 1], [4, 2, 5], [1, 6, 1]]
+    key, canonical = store.canonicalize("overhauled turbine-dynamo", design(rows), (0, 1))
+    for mirrored in ([row[::-1] for row in rows], rows[::-1], [row[::-1] for row in rows[::-1]]):
+        other_key, other = store.canonicalize("overhauled turbine-dynamo", design(mirrored), (0, 1))
+        assert other_key == key
+        assert [comp.full_name for comp in other] == [comp.full_name for comp in canonical]
+
+
+def test_mirrors_differ_without_symmetry() -> None:
+    rows = [[1, 3, 1], [4, 2, 5], [1, 6, 1]]
+    key, _ = store.canonicalize("overhauled turbine-dynamo", design(rows), ())
+    other_key, _ = store.canonicalize("overhauled turbine-dynamo", design([row[::-1] for row in rows]), ())
+    assert key != other_key
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("side_length<=12", ("side_length", "<=", 12.0)),
+        (" minimum_energy >= 400 ", ("minimum_energy", ">=", 400.0)),
+        ("x_symmetry=true", ("x_symmetry", "=", 1)),
+        ("status!=FEASIBLE", ("status", "!=", "FEASIBLE")),
+        ("count.coil:gold>2", ("count.coil:gold", ">", 2.0)),
+    ]
+)
+def test_parse_filter(text: str, expected: tuple) -> None:
+    assert store.parse_filter(text) == expected
+
+
+def test_parse_filter_rejects_missing_operator() -> None:
+    with pytest.raises(ValueError):
+        store.parse_filter("side_length")
+
+
+def test_publish_and_query() -> None:
+    designer_cls = reiuji.designer.overhauled.turbine_dynamo.designer.TurbineDynamoDesigner
+    rows = [[1, 3, 1], [4, 2, 5], [1, 6, 1]]
+    key = store.publish(designer_cls, {"side_length": 3, "shaft_width": 1}, cp_model.OPTIMAL, design(rows), 1.5)
+    assert store.publish(designer_cls, {"side_length": 3, "shaft_width": 1, "x_symmetry": True}, cp_model.FEASIBLE, design(rows[::-1]), 1.2) == key
+    assert store.blob_path(key).exists()
+    results = store.query("overhauled turbine-dynamo", [store.parse_filter("side_length>=3"), store.parse_filter("count.casing:=4")])
+    assert sorted(result["status"] for result in results) == ["FEASIBLE", "OPTIMAL"]
+    assert store.query(filters=[store.parse_filter("side_length>3")]) == []
+    assert store.resolve(key[:8]) == (key, "overhauled turbine-dynamo")